@@ -0,0 +1,46 @@
+# file: async_demo.py
+#
+'''
+This example demonstrates instantiation of the AsyncMemberAgent class.
+Several groups are driven concurrently from a single event loop.
+'''
+
+# import modules
+#
+import sys
+import logging
+import asyncio
+from tgdhstruct import AsyncMemberAgent
+
+# function: run_group
+#
+async def run_group(size: int, eid: int) -> None:
+    '''This function sets up a group, then runs a join and a leave event.'''
+
+    async with AsyncMemberAgent(size, display=False) as group_tree:
+        await group_tree.join_protocol()
+        await group_tree.leave_protocol(eid)
+#
+# end function: run_group
+
+# function: main
+#
+async def main(argv):
+    '''This is the main function.'''
+
+    # show the protocol events
+    #
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # run one group per size given on the command line
+    #
+    sizes = [int(arg) for arg in argv[1:]] or [4, 5]
+    await asyncio.gather(*(run_group(size, 1) for size in sizes))
+
+# begin gracefully
+#
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv))
+
+#
+# end file: async_demo.py
@@ -0,0 +1,81 @@
+# file: churn_benchmark.py
+#
+'''
+This example benchmarks the rebalancing policies of the BinaryTree class.
+A single member's tree is driven through asymmetric join/leave churn and the
+average and maximum co-path lengths are reported over time for each policy.
+'''
+
+# import modules
+#
+import sys
+import random
+from tgdhstruct import BinaryTree
+
+# function: copath_stats
+#
+def copath_stats(tree: BinaryTree) -> tuple[float, int, int]:
+    '''This function returns the average co-path length, maximum co-path length and member count.'''
+
+    depths = [leaf.l for leaf in tree.get_leaves()]
+    return sum(depths)/len(depths), max(depths), len(depths)
+#
+# end function: copath_stats
+
+# function: run_churn
+#
+def run_churn(policy: str, size: int, steps: int, seed: int, interval: int) -> list[tuple[int, float, int, int]]:
+    '''This function drives one tree through the churn schedule and samples its co-path lengths.'''
+
+    # the churn grows the group for the first half and shrinks it for the second half;
+    # departures are drawn from the leftmost eighth of the tree
+    #
+    rng = random.Random(seed)
+    tree = BinaryTree(size, 1, display=False, rebalance=policy)
+    samples = []
+    for step in range(1, steps+1):
+        join_rate = 0.7 if step <= steps//2 else 0.3
+        members = len(tree.get_leaves())
+        if members <= 4 or rng.random() < join_rate:
+            tree.join_event()
+        else:
+            leaves = [leaf for leaf in tree.get_leaves() if leaf.mid != tree.uid]
+            eid = rng.choice(leaves[:max(1, len(leaves)//8)]).mid
+            tree.leave_event(eid)
+        if step % interval == 0:
+            samples.append((step,)+copath_stats(tree))
+    return samples
+#
+# end function: run_churn
+
+# function: main
+#
+def main(argv):
+    '''This is the main function.'''
+
+    # read the benchmark parameters
+    #
+    size = int(argv[1]) if len(argv) > 1 else 32
+    steps = int(argv[2]) if len(argv) > 2 else 2000
+    seed = int(argv[3]) if len(argv) > 3 else 1
+    interval = max(steps//20, 1)
+
+    # run the same churn schedule under every policy
+    #
+    for policy in ('none', 'lazy', 'eager'):
+        samples = run_churn(policy, size, steps, seed, interval)
+        print(f"\n{f' Policy: {policy} '.center(80, '=')}")
+        print(f"{'step'.rjust(8)} {'members'.rjust(8)} {'avg co-path'.rjust(12)} {'max co-path'.rjust(12)} {'ideal'.rjust(6)}")
+        for step, avg, peak, members in samples:
+            print(f"{step:8d} {members:8d} {avg:12.2f} {peak:12d} {(members-1).bit_length():6d}")
+        print(f"\nMean avg co-path: {sum(s[1] for s in samples)/len(samples):.2f}")
+        print(f"Peak max co-path: {max(s[2] for s in samples)}")
+        print(f"Samples over ideal: {sum(1 for s in samples if s[2] > (s[3]-1).bit_length())}/{len(samples)}")
+
+# begin gracefully
+#
+if __name__ == '__main__':
+    main(sys.argv)
+
+#
+# end file: churn_benchmark.py
@@ -0,0 +1,49 @@
+# file: hierarchical_demo.py
+#
+'''
+This example demonstrates instantiation of a HierarchicalAgent class.
+A large group is split into subgroups combined by a top-level tree.
+'''
+
+# import modules
+#
+import sys
+import logging
+from tgdhstruct import HierarchicalAgent
+
+# function: main
+#
+def main(argv):
+    '''This is the main function.'''
+
+    # show the protocol events
+    #
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # create the subgroups and the top-level tree
+    #
+    subgroup_size = int(argv[2]) if len(argv) > 2 else 8
+    group_tree = HierarchicalAgent(int(argv[1]), subgroup_size=subgroup_size, display=False)
+
+    # demonstrate a join event (only the smallest subgroup is rekeyed)
+    #
+    input("\n>> Press 'enter' or 'return' to trigger a join event ")
+    new_id = group_tree.join_protocol()
+
+    # demonstrate a leave event
+    #
+    input("\n>> Press 'enter' or 'return' to trigger a leave event ")
+    group_tree.leave_protocol(new_id)
+
+    # exit gracefully
+    #
+    print(f"\nSYS: Members agree on the group key: {len(group_tree.group_keys()) == 1}")
+    group_tree.close()
+
+# begin gracefully
+#
+if __name__ == '__main__':
+    main(sys.argv)
+
+#
+# end file: hierarchical_demo.py
@@ -0,0 +1,45 @@
+# file: merge_demo.py
+#
+'''
+This example demonstrates the merge protocol of the MemberAgent class.
+Two groups are merged at about the cost of a single rekey.
+'''
+
+# import modules
+#
+import sys
+import logging
+from tgdhstruct import MemberAgent
+
+# function: main
+#
+def main(argv):
+    '''This is the main function.'''
+
+    # show the protocol events
+    #
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    # create the two groups
+    #
+    group_a = MemberAgent(int(argv[1]), display=False)
+    group_b = MemberAgent(int(argv[2]), display=False)
+
+    # demonstrate a merge event (the members of the second group are renumbered)
+    #
+    input("\n>> Press 'enter' or 'return' to trigger a merge event ")
+    group_a.merge_protocol(group_b)
+
+    # exit gracefully
+    #
+    keys = {agent.get_data().root.key for agent in group_a.agents.values()}
+    print(f"\nSYS: Members agree on the group key: {len(keys) == 1}")
+    group_a.close()
+
+# begin gracefully
+#
+if __name__ == '__main__':
+    main(sys.argv)
+
+#
+# end file: merge_demo.py
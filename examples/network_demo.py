@@ -8,6 +8,7 @@ A TGDH scheme is carried out using the multi-agent system.
 # import modules
 #
 import sys
+import logging
 import time
 from tgdhstruct import MemberAgent
 
@@ -16,9 +17,14 @@ from tgdhstruct import MemberAgent
 def main(argv):
     '''This is the main function.'''
 
-    # create an initial tree
+    # show the protocol events
     #
-    group_tree = MemberAgent(int(argv[1]))
+    logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+
+    # create an initial tree (optionally hosting several members per agent process)
+    #
+    members_per_host = int(argv[2]) if len(argv) > 2 else 1
+    group_tree = MemberAgent(int(argv[1]), members_per_host=members_per_host)
 
     # demonstrate a join event
     #
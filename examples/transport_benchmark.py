@@ -0,0 +1,76 @@
+# file: transport_benchmark.py
+#
+'''
+This example benchmarks the transports that MemberAgent can run on.
+The same group setup, join and leave are timed on every transport and the
+members are checked to agree on the group key after each event.
+'''
+
+# import modules
+#
+import io
+import sys
+import time
+import contextlib
+from tgdhstruct import MemberAgent
+from tgdhstruct.transport import OsbrainTransport, InProcessTransport, PipeTransport, ZmqTransport
+
+# function: agreed
+#
+def agreed(group: MemberAgent) -> bool:
+    '''This function returns whether all members hold the same group key.'''
+
+    keys = {agent.get_data().root.key for agent in group.agents.values()}
+    return len(keys) == 1 and None not in keys
+#
+# end function: agreed
+
+# function: run_transport
+#
+def run_transport(transport, size: int, group: str) -> tuple[float, float, float, bool]:
+    '''This function times the setup, a join and a leave on one transport.'''
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        members = MemberAgent(size, transport=transport, display=False, group=group)
+        setup = time.perf_counter()-start
+        ok = agreed(members)
+        start = time.perf_counter()
+        members.join_protocol()
+        join = time.perf_counter()-start
+        ok = ok and agreed(members)
+        start = time.perf_counter()
+        members.leave_protocol(1)
+        leave = time.perf_counter()-start
+        ok = ok and agreed(members)
+        members.close()
+    return setup, join, leave, ok
+#
+# end function: run_transport
+
+# function: main
+#
+def main(argv):
+    '''This is the main function.'''
+
+    # read the benchmark parameters
+    #
+    size = int(argv[1]) if len(argv) > 1 else 8
+    group = argv[2] if len(argv) > 2 else 'p256'
+
+    # run the same events on every transport
+    #
+    transports = (('osbrain', OsbrainTransport), ('inprocess', InProcessTransport),
+                  ('pipe', PipeTransport), ('zmq', ZmqTransport))
+    print(f"{'transport'.ljust(10)} {'setup (s)'.rjust(10)} {'join (s)'.rjust(10)} {'leave (s)'.rjust(10)} {'agreed'.rjust(7)}")
+    for name, transport in transports:
+        setup, join, leave, ok = run_transport(transport(), size, group)
+        print(f"{name.ljust(10)} {setup:10.2f} {join:10.2f} {leave:10.2f} {str(ok).rjust(7)}")
+
+# begin gracefully
+#
+if __name__ == '__main__':
+    main(sys.argv)
+
+#
+# end file: transport_benchmark.py
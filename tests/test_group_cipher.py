@@ -0,0 +1,119 @@
+# file: test_group_cipher.py
+#
+'''This file contains tests for the GroupCipher class.'''
+
+# import modules
+#
+import pytest
+from tgdhstruct import GroupCipher, MemberAgent, InProcessTransport
+from tgdhstruct.group_cipher import OVERHEAD
+
+# function: group
+#
+@pytest.fixture
+def group():
+    '''This fixture runs a small group on the in-process transport.'''
+
+    group = MemberAgent(3, exponent_bits=256, transport=InProcessTransport(), display=False)
+    yield group
+    group.close()
+#
+# end function: group
+
+# function: test_round_trip
+#
+def test_round_trip(group):
+    '''This function checks that a message sealed by one member opens at another, with and without buffers.'''
+
+    sender = GroupCipher(group.agents[1].get_data())
+    receiver = GroupCipher(group.agents[3].get_data())
+    message = sender.encrypt(b'hello group', b'channel-1')
+    assert len(message) == len(b'hello group')+OVERHEAD
+    assert receiver.decrypt(message, b'channel-1') == b'hello group'
+
+    out = bytearray(64)
+    size = sender.encrypt_into(b'into', out)
+    plain = bytearray(16)
+    assert receiver.decrypt_into(memoryview(out)[:size], plain) == 4 and plain[:4] == b'into'
+#
+# end function: test_round_trip
+
+# function: test_tamper
+#
+def test_tamper(group):
+    '''This function checks that a tampered message or wrong associated data fails and leaves no plaintext behind.'''
+
+    sender = GroupCipher(group.agents[1].get_data())
+    receiver = GroupCipher(group.agents[2].get_data())
+    message = bytearray(sender.encrypt(b'hello', b'ad'))
+    with pytest.raises(ValueError):
+        receiver.decrypt(bytes(message), b'other')
+    message[-1] = message[-1] ^ 1
+    out = bytearray(b'x'*8)
+    with pytest.raises(ValueError):
+        receiver.decrypt_into(message, out, b'ad')
+    assert out == bytes(5)+b'xxx'
+#
+# end function: test_tamper
+
+# function: test_batches
+#
+def test_batches(group):
+    '''This function checks the batch helpers, including the variants that work on one shared buffer.'''
+
+    sender = GroupCipher(group.agents[1].get_data())
+    receiver = GroupCipher(group.agents[2].get_data())
+    messages = [b'a', b'bc', b'', b'defg']
+    assert receiver.decrypt_batch(sender.encrypt_batch(messages, b'ad'), b'ad') == messages
+
+    sealed = bytearray(sum(len(data)+OVERHEAD for data in messages))
+    sizes = sender.encrypt_batch_into(messages, sealed, b'ad')
+    views = []
+    offset = 0
+    for size in sizes:
+        views.append(memoryview(sealed)[offset:offset+size])
+        offset = offset+size
+    plain = bytearray(16)
+    lengths = receiver.decrypt_batch_into(views, plain, b'ad')
+    assert lengths == [len(data) for data in messages] and bytes(plain[:sum(lengths)]) == b''.join(messages)
+#
+# end function: test_batches
+
+# function: test_stream
+#
+def test_stream(group):
+    '''This function checks that a chunked stream round-trips and that a tampered stream fails at the end.'''
+
+    sender = GroupCipher(group.agents[1].get_data())
+    receiver = GroupCipher(group.agents[2].get_data())
+    chunks = [b'x'*100, b'y'*7, b'z'*33]
+    sealed = b''.join(sender.encrypt_stream(chunks, b'ad'))
+    pieces = [sealed[i:i+9] for i in range(0, len(sealed), 9)]
+    assert b''.join(receiver.decrypt_stream(pieces, b'ad')) == b''.join(chunks)
+    with pytest.raises(ValueError):
+        list(receiver.decrypt_stream([sealed[:-1]+bytes([sealed[-1] ^ 1])], b'ad'))
+#
+# end function: test_stream
+
+# function: test_epoch_rotation
+#
+def test_epoch_rotation(group):
+    '''This function checks that a join rotates the epoch and that the previous epoch still decrypts.'''
+
+    sender = GroupCipher(group.agents[1].get_data())
+    old = sender.encrypt(b'before')
+    old_epoch = group.agents[1].get_data().current_group_key().epoch
+    group.join_protocol()
+    receiver = GroupCipher(group.agents[group.new_id].get_data())
+    sender = GroupCipher(group.agents[1].get_data())
+    new = sender.encrypt(b'after')
+    assert group.agents[1].get_data().current_group_key().epoch == old_epoch+1
+    assert receiver.decrypt(new) == b'after'
+    assert GroupCipher(group.agents[2].get_data()).decrypt(old) == b'before'
+    with pytest.raises(ValueError):
+        receiver.decrypt(old)
+#
+# end function: test_epoch_rotation
+
+#
+# end file: test_group_cipher.py
@@ -0,0 +1,40 @@
+# file: test_key_cache.py
+#
+'''This file contains tests for the node key cache shared by the members of a group.'''
+
+# import modules
+#
+import logging
+from tgdhstruct import MemberAgent, InProcessTransport, PipeTransport
+from tgdhstruct.key_cache import get_cache
+
+# function: test_cache_shared_in_process
+#
+def test_cache_shared_in_process():
+    '''This function checks that members on the in-process transport reuse each other's node keys.'''
+
+    group = MemberAgent(8, shared_cache=True, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        cache = get_cache(group.key_cache)
+        assert cache.hits > 0
+        keys = {agent.get_data().root.key for agent in group.agents.values()}
+        assert len(keys) == 1 and None not in keys
+    finally:
+        group.close()
+#
+# end function: test_cache_shared_in_process
+
+# function: test_cache_warns_across_processes
+#
+def test_cache_warns_across_processes(caplog):
+    '''This function checks that a shared cache requested with one process per member is reported.'''
+
+    with caplog.at_level(logging.WARNING, logger='tgdhstruct'):
+        MemberAgent(4, shared_cache=True, transport=PipeTransport(), display=False, start=False)
+        MemberAgent(4, shared_cache=True, transport=InProcessTransport(), display=False, start=False)
+    assert [record.event for record in caplog.records] == ['cache_not_shared']
+#
+# end function: test_cache_warns_across_processes
+
+#
+# end file: test_key_cache.py
@@ -0,0 +1,76 @@
+# file: test_key_engine.py
+#
+'''This file contains tests for the ParallelKeyEngine class.'''
+
+# import modules
+#
+from copy import deepcopy
+from tgdhstruct import MemberAgent, ParallelKeyEngine, InProcessTransport
+
+# function: serial_root_key
+#
+def serial_root_key(tree) -> int:
+    '''This helper function recomputes the root key of a member's tree on the serial path.'''
+
+    tree = deepcopy(tree)
+    for node in tree.my_node.get_key_path()[1:]:
+        node.key = None
+    tree.calculate_group_key()
+    return tree.root.key
+#
+# end function: serial_root_key
+
+# function: check_group
+#
+def check_group(group: MemberAgent) -> None:
+    '''This helper function checks that every member's engine-computed root key matches the serial path.'''
+
+    keys = set()
+    for agent in group.agents.values():
+        tree = agent.get_data()
+        assert tree.root.key == serial_root_key(tree)
+        keys.add(tree.root.key)
+    assert len(keys) == 1 and None not in keys
+#
+# end function: check_group
+
+# function: test_pool_matches_serial
+#
+def test_pool_matches_serial():
+    '''This function checks that a pool of workers gives the serial root keys after init, join and leave.'''
+
+    with ParallelKeyEngine(workers=2, chunksize=2) as engine:
+        group = MemberAgent(7, engine=engine, exponent_bits=256, transport=InProcessTransport(), display=False)
+        try:
+            assert engine.executor is not None
+            check_group(group)
+            group.join_protocol()
+            check_group(group)
+            group.leave_protocol(3)
+            check_group(group)
+        finally:
+            group.close()
+    assert engine.executor is None
+#
+# end function: test_pool_matches_serial
+
+# function: test_inline_fallback
+#
+def test_inline_fallback():
+    '''This function checks that a single worker computes inline, without starting a pool.'''
+
+    engine = ParallelKeyEngine(workers=1)
+    group = MemberAgent(5, engine=engine, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        check_group(group)
+        group.leave_protocol(2)
+        check_group(group)
+        assert engine.executor is None
+    finally:
+        group.close()
+        engine.close()
+#
+# end function: test_inline_fallback
+
+#
+# end file: test_key_engine.py
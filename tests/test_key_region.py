@@ -0,0 +1,85 @@
+# file: test_key_region.py
+#
+'''This file contains tests for the memory-mapped regions members publish their group keys to.'''
+
+# import modules
+#
+import os
+import sys
+import time
+import struct
+import threading
+import subprocess
+from tgdhstruct import MemberAgent, InProcessTransport, KeyRegion, open_region, region_path
+from tgdhstruct.key_region import SEQ_OFFSET, KEY_OFFSET
+
+# function: read_in_process
+#
+def read_in_process(path: str) -> tuple[int, int]:
+    '''This helper function reads a region from a separate interpreter and returns its epoch and key.'''
+
+    code = ('import sys\nfrom tgdhstruct import open_region\n'
+            'region = open_region(sys.argv[1])\nprint(*region.read())\nregion.close()\n')
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, '-c', code, path], capture_output=True, text=True, check=True, env=env)
+    epoch, key = result.stdout.split()
+    return int(epoch), int(key)
+#
+# end function: read_in_process
+
+# function: test_region_read_from_other_process
+#
+def test_region_read_from_other_process(tmp_path):
+    '''This function checks that another process reads the current group key and sees it change after a join.'''
+
+    prefix = str(tmp_path/'group')
+    group = MemberAgent(4, exponent_bits=256, transport=InProcessTransport(), display=False, key_region=prefix)
+    try:
+        path = region_path(prefix, 1)
+        tree = group.agents[1].get_data()
+        assert read_in_process(path) == (tree.epoch, tree.root.key)
+        group.join_protocol()
+        tree = group.agents[1].get_data()
+        assert read_in_process(path) == (tree.epoch, tree.root.key)
+    finally:
+        group.close()
+#
+# end function: test_region_read_from_other_process
+
+# function: test_torn_write_retried
+#
+def test_torn_write_retried(tmp_path):
+    '''This function checks that a reader waits out a write in progress and never returns a torn key.'''
+
+    path = str(tmp_path/'member.key')
+    writer = KeyRegion(path, 8)
+    writer.write(1, 0x1111111111111111)
+    reader = open_region(path)
+    try:
+        # leave a write half done: odd sequence number, new epoch, half of the new key
+        #
+        seq = struct.unpack_from('<Q', writer._map, SEQ_OFFSET)[0]
+        struct.pack_into('<Q', writer._map, SEQ_OFFSET, seq+1)
+        struct.pack_into('<Q', writer._map, SEQ_OFFSET+8, 2)
+        writer._map[KEY_OFFSET:KEY_OFFSET+4] = b'\x22'*4
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(reader.read()))
+        thread.start()
+        time.sleep(0.2)
+        assert thread.is_alive() and not results
+
+        # finish the write, and the reader returns the whole new key
+        #
+        writer._map[KEY_OFFSET+4:KEY_OFFSET+8] = b'\x22'*4
+        struct.pack_into('<Q', writer._map, SEQ_OFFSET, seq+2)
+        thread.join(5)
+        assert results == [(2, 0x2222222222222222)]
+    finally:
+        reader.close()
+        writer.close()
+#
+# end function: test_torn_write_retried
+
+#
+# end file: test_key_region.py
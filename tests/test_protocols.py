@@ -0,0 +1,319 @@
+# file: test_protocols.py
+#
+'''This file contains protocol-level tests that run groups on the in-process transport.'''
+
+# import modules
+#
+import asyncio
+import threading
+import pytest
+from tgdhstruct import BinaryTree, MemberAgent, AsyncMemberAgent, HierarchicalAgent, InProcessTransport, open_region, region_path
+
+# function: group_keys
+#
+def group_keys(group: MemberAgent) -> set[int]:
+    '''This helper function returns the group keys held by the members of a group.'''
+
+    return {agent.get_data().root.key for agent in group.agents.values()}
+#
+# end function: group_keys
+
+# function: record_received_keys
+#
+def record_received_keys(monkeypatch) -> list[int]:
+    '''This helper function records the private keys in every tree a joining member receives.'''
+
+    received = []
+    protocol = BinaryTree.new_member_protocol
+
+    def recording(tree, *args):
+        received.extend(node.key for node in tree.walk_pre_order(tree.root) if node.key is not None)
+        return protocol(tree, *args)
+
+    monkeypatch.setattr(BinaryTree, 'new_member_protocol', recording)
+    return received
+#
+# end function: record_received_keys
+
+# function: check_stats
+#
+def check_stats(tree: BinaryTree) -> None:
+    '''This helper function checks every node's cached statistics against a fresh walk of its subtree.'''
+
+    for node in tree.walk_pre_order(tree.root):
+        depths = [leaf.depth-node.depth for leaf in tree.walk_pre_order(node) if not leaf.children]
+        assert node.subtree_size == len(depths), node.name
+        assert node.subtree_height == max(depths), node.name
+        assert node.leaf_depths == tuple(depths.count(depth) for depth in range(max(depths)+1)), node.name
+#
+# end function: check_stats
+
+# function: test_joiner_receives_no_private_keys
+#
+def test_joiner_receives_no_private_keys(monkeypatch):
+    '''This function checks that a joining member cannot learn the keys of the previous epoch.'''
+
+    received = record_received_keys(monkeypatch)
+    group = MemberAgent(4, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        group.join_protocol()
+        assert received == []
+        assert group.agents[group.new_id].get_data().current_group_key().epoch == 1
+        assert len(group_keys(group)) == 1 and None not in group_keys(group)
+    finally:
+        group.close()
+#
+# end function: test_joiner_receives_no_private_keys
+
+# function: test_hierarchical_joiner_receives_no_private_keys
+#
+def test_hierarchical_joiner_receives_no_private_keys(monkeypatch):
+    '''This function checks that a member joining a subgroup cannot learn earlier subgroup or group keys.'''
+
+    received = record_received_keys(monkeypatch)
+    group = HierarchicalAgent(8, subgroup_size=4, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        uid = group.join_protocol()
+        sid, local = group.members[uid]
+        top = group.subgroups[sid].agents[local].get_data().top
+        assert received == []
+        assert all(node.key is None for node in top.walk_pre_order(top.root) if node not in top.my_node.path)
+        assert len(group.group_keys()) == 1
+    finally:
+        group.close()
+#
+# end function: test_hierarchical_joiner_receives_no_private_keys
+
+# function: test_eager_rebalancing_churn
+#
+def test_eager_rebalancing_churn():
+    '''This function checks that members inside rebalanced subtrees still reach the group key.'''
+
+    # departures from the left side leave it shallow, so the last leave reorders the sponsor's co-path
+    #
+    group = MemberAgent(6, exponent_bits=256, transport=InProcessTransport(), display=False, rebalance='eager')
+    try:
+        for event in (1, 4, None, None, None, 2, 9, 3, None, None):
+            if event is None:
+                group.join_protocol()
+            else:
+                group.leave_protocol(event)
+            assert len(group_keys(group)) == 1 and None not in group_keys(group)
+            if event == 3:
+                assert group.sponsor.get_data().moved
+    finally:
+        group.close()
+#
+# end function: test_eager_rebalancing_churn
+
+# function: test_stats_after_partition_and_merge
+#
+def test_stats_after_partition_and_merge():
+    '''This function checks that the cached subtree statistics match a fresh walk after partitions and merges.'''
+
+    # tree level: repeated partitions and merges of groups of different shapes
+    #
+    tree = BinaryTree(13, 1, display=False)
+    for size, eids in ((5, [2, 7, 8]), (9, [4, 5, 6, 11]), (2, [3])):
+        tree.partition_event(eids)
+        check_stats(tree)
+        tree.merge_event(BinaryTree(size, 1, display=False))
+        check_stats(tree)
+
+    # agent level: the trees the members hold after the protocols run
+    #
+    transport = InProcessTransport()
+    group = MemberAgent(7, exponent_bits=256, transport=transport, display=False, name='a')
+    other = MemberAgent(4, exponent_bits=256, transport=transport, display=False, name='b')
+    try:
+        group.partition_protocol([2, 3, 6])
+        for agent in group.agents.values():
+            check_stats(agent.get_data())
+        group.merge_protocol(other)
+        for agent in group.agents.values():
+            check_stats(agent.get_data())
+    finally:
+        group.close()
+        other.close()
+#
+# end function: test_stats_after_partition_and_merge
+
+# function: test_async_partition
+#
+def test_async_partition():
+    '''This function checks that an async partition is awaited and leaves the remaining members agreeing.'''
+
+    async def run():
+        async with AsyncMemberAgent(8, exponent_bits=256, transport=InProcessTransport(), display=False) as group:
+            await group.partition_protocol([2, 5, 6])
+            assert sorted(group.agents) == [1, 3, 4, 7, 8]
+            return group_keys(group)
+
+    keys = asyncio.run(run())
+    assert len(keys) == 1 and None not in keys
+#
+# end function: test_async_partition
+
+# function: test_async_setup_off_loop
+#
+def test_async_setup_off_loop(monkeypatch):
+    '''This function checks that an async group builds its trees and, without forking, starts its agents (joins included) off the event loop thread.'''
+
+    threads = {'make_tree': set(), 'spawn_member': set()}
+    for name in threads:
+        original = getattr(MemberAgent, name)
+
+        def recording(self, uid, original=original, name=name):
+            threads[name].add(threading.get_ident())
+            return original(self, uid)
+        monkeypatch.setattr(MemberAgent, name, recording)
+
+    async def run():
+        async with AsyncMemberAgent(5, exponent_bits=256, transport=InProcessTransport(), display=False) as group:
+            await group.join_protocol()
+            return threading.get_ident(), group_keys(group)
+
+    loop_thread, keys = asyncio.run(run())
+    assert len(keys) == 1 and None not in keys
+    assert threads['make_tree'] and loop_thread not in threads['make_tree']
+    assert threads['spawn_member'] and loop_thread not in threads['spawn_member']
+#
+# end function: test_async_setup_off_loop
+
+# function: test_async_merge
+#
+def test_async_merge():
+    '''This function checks that an async merge is awaited and gives both groups one group key.'''
+
+    async def run():
+        transport = InProcessTransport()
+        async with AsyncMemberAgent(4, exponent_bits=256, transport=transport, display=False, name='a') as group:
+            other = AsyncMemberAgent(3, exponent_bits=256, transport=transport, display=False, name='b')
+            await other.initial_key_exchange()
+            await group.merge_protocol(other)
+            assert sorted(group.agents) == list(range(1, 8)) and not other.agents
+            return group_keys(group)
+
+    keys = asyncio.run(run())
+    assert len(keys) == 1 and None not in keys
+#
+# end function: test_async_merge
+
+# function: test_merge_rejects_other_exponent_bits
+#
+def test_merge_rejects_other_exponent_bits():
+    '''This function checks that groups with different exponent lengths refuse to merge and are left untouched.'''
+
+    tree = BinaryTree(4, 1, display=False, exponent_bits=256)
+    with pytest.raises(ValueError):
+        tree.merge_event(BinaryTree(3, 1, display=False, exponent_bits=512))
+    assert tree.tree_stats()['members'] == 4
+
+    transport = InProcessTransport()
+    group = MemberAgent(4, exponent_bits=256, transport=transport, display=False, name='a')
+    other = MemberAgent(3, exponent_bits=512, transport=transport, display=False, name='b')
+    try:
+        before = group_keys(group)
+        with pytest.raises(ValueError):
+            group.merge_protocol(other)
+        assert sorted(group.agents) == [1, 2, 3, 4] and sorted(other.agents) == [1, 2, 3]
+        assert group_keys(group) == before
+    finally:
+        group.close()
+        other.close()
+#
+# end function: test_merge_rejects_other_exponent_bits
+
+# function: test_hierarchical_leave_from_smallest_subgroup
+#
+def test_hierarchical_leave_from_smallest_subgroup():
+    '''This function checks that a leave from a two-member subgroup moves its last member instead of failing.'''
+
+    group = HierarchicalAgent(6, subgroup_size=2, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        before = group.group_keys()
+        group.leave_protocol(3)
+        assert len(group.subgroups) == 2 and 4 in group.members and 3 not in group.members
+        assert all(len(sub.agents) >= 2 for sub in group.subgroups.values())
+        after = group.group_keys()
+        assert len(after) == 1 and None not in after and after != before
+
+        # with two subgroups left, a member of the larger subgroup moves over instead
+        #
+        sid = min(group.subgroups, key=lambda key: len(group.subgroups[key].agents))
+        eid = next(uid for uid, (member_sid, _) in group.members.items() if member_sid == sid)
+        group.leave_protocol(eid)
+        assert sorted(len(sub.agents) for sub in group.subgroups.values()) == [2, 2]
+        assert len(group.group_keys()) == 1 and None not in group.group_keys()
+    finally:
+        group.close()
+#
+# end function: test_hierarchical_leave_from_smallest_subgroup
+
+# function: test_hierarchical_split_and_settings
+#
+def test_hierarchical_split_and_settings(tmp_path):
+    '''This function checks that full subgroups split off a new subgroup and that the group settings reach every subgroup.'''
+
+    prefix = str(tmp_path/'group')
+    group = HierarchicalAgent(6, subgroup_size=3, exponent_bits=256, transport=InProcessTransport(), display=False,
+                              sponsor_policy='least_recent', key_region=prefix)
+    try:
+        before = group.group_keys()
+        uid = group.join_protocol()
+        assert len(group.subgroups) == 3 and group.members[uid][0] == 3
+        assert all(2 <= len(sub.agents) <= 3 for sub in group.subgroups.values())
+        keys = group.group_keys()
+        assert len(keys) == 1 and None not in keys and keys != before
+
+        # every member publishes the group key (not its subgroup key) under its subgroup's prefix
+        #
+        for sid, local in group.members.values():
+            tree = group.subgroups[sid].agents[local].get_data()
+            assert tree.sub.sponsor_policy == 'least_recent'
+            region = open_region(region_path(f'{prefix}_{sid}', local))
+            assert region.read() == (tree.top.epoch, tree.group_key())
+            region.close()
+    finally:
+        group.close()
+#
+# end function: test_hierarchical_split_and_settings
+
+# function: test_find_divergence
+#
+def test_find_divergence():
+    '''This function checks that the sync and async agents locate a corrupted blind key the same way.'''
+
+    # function: corrupt
+    #
+    def corrupt(tree):
+        '''This helper function replaces a co-path blind key and recomputes the key path.'''
+
+        tree.my_node.get_co_path()[1].b_key = 12345
+        tree.calculate_group_key()
+        return tree
+    #
+    # end function: corrupt
+
+    group = MemberAgent(6, exponent_bits=256, transport=InProcessTransport(), display=False)
+    try:
+        assert group.find_divergence(1, 6) is None
+        tree = corrupt(group.agents[6].get_data())
+        group.agents[6].set_data(tree)
+        found = group.find_divergence(1, 6)
+        assert found in [node.name for node in tree.my_node.get_key_path()] and found != '<0,0>'
+    finally:
+        group.close()
+
+    async def run():
+        async with AsyncMemberAgent(6, exponent_bits=256, transport=InProcessTransport(), display=False) as group:
+            assert await group.find_divergence(1, 6) is None
+            group.agents[6].set_data(corrupt(group.agents[6].get_data()))
+            return await group.find_divergence(1, 6)
+
+    assert asyncio.run(run()) == found
+#
+# end function: test_find_divergence
+
+#
+# end file: test_protocols.py
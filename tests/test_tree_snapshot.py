@@ -0,0 +1,57 @@
+# file: test_tree_snapshot.py
+#
+'''This file contains tests for saving and restoring tree snapshots.'''
+
+# import modules
+#
+from tgdhstruct import BinaryTree
+from tgdhstruct.tree_snapshot import save_snapshot, load_snapshot
+
+# function: test_restore_keeps_display
+#
+def test_restore_keeps_display(tmp_path):
+    '''This function checks that a restored tree keeps the display setting unless it is overridden.'''
+
+    path = str(tmp_path/'tree.snap')
+    save_snapshot(BinaryTree(8, 3, display=False), path)
+    snapshot = load_snapshot(path)
+    try:
+        tree = snapshot.restore()
+        assert tree.display is False
+        tree.join_event()
+    finally:
+        snapshot.close()
+    snapshot = load_snapshot(path)
+    try:
+        assert snapshot.restore(display=True).display is True
+    finally:
+        snapshot.close()
+#
+# end function: test_restore_keeps_display
+
+# function: test_restore_matches_tree
+#
+def test_restore_matches_tree(tmp_path):
+    '''This function checks that a restored tree has the shape, statistics and fingerprint of the saved tree.'''
+
+    tree = BinaryTree(13, 5, display=False)
+    tree.leave_event(2)
+    tree.join_event()
+    path = str(tmp_path/'tree.snap')
+    save_snapshot(tree, path)
+    snapshot = load_snapshot(path)
+    try:
+        restored = snapshot.restore()
+        assert [node.name for node in restored.walk_pre_order(restored.root)] == [node.name for node in tree.walk_pre_order(tree.root)]
+        assert all(node.parent is None or node in node.parent.children for node in restored.walk_pre_order(restored.root))
+        assert restored.tree_stats() == tree.tree_stats()
+        assert restored.tree_fingerprint() == tree.tree_fingerprint()
+        restored.leave_event(7)
+        assert restored.tree_stats()['members'] == 12
+    finally:
+        snapshot.close()
+#
+# end function: test_restore_matches_tree
+
+#
+# end file: test_tree_snapshot.py
@@ -1,2 +1,14 @@
-from tgdhstruct.binary_tree import BinaryTree
-from tgdhstruct.member_agent import MemberAgent
+from tgdhstruct.binary_tree import BinaryTree, GroupKey
+from tgdhstruct.member_agent import MemberAgent, BroadcastError
+from tgdhstruct.async_member_agent import AsyncMemberAgent
+from tgdhstruct.group_manager import GroupManager
+from tgdhstruct.hierarchical_tree import HierarchicalTree
+from tgdhstruct.hierarchical_agent import HierarchicalAgent
+from tgdhstruct.tree_snapshot import TreeSnapshot, save_snapshot, load_snapshot
+from tgdhstruct.key_engine import ParallelKeyEngine
+from tgdhstruct.key_region import KeyRegion, open_region, region_path
+from tgdhstruct.group_cipher import GroupCipher
+from tgdhstruct.event_log import fingerprint, set_sampling
+from tgdhstruct.dh_group import DHGroup, ModpGroup, EccGroup, get_group
+from tgdhstruct.member_host import MemberHandle
+from tgdhstruct.transport import Transport, OsbrainTransport, InProcessTransport, PipeTransport, ZmqTransport
@@ -0,0 +1,630 @@
+# file: async_member_agent.py
+#
+'''This file contains the AsyncMemberAgent class.'''
+
+# import modules
+#
+from __future__ import annotations
+import asyncio
+import functools
+import logging
+from typing import Any, Callable, Iterable, Optional
+from concurrent.futures import Executor
+from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.event_log import log_event
+from tgdhstruct.key_cache import drop_cache
+from tgdhstruct.member_host import MemberHandle
+from tgdhstruct.member_agent import MemberAgent, BroadcastError, receive_bkeys, receive_join_tree, receive_join_bkey, receive_merge
+
+# class: AsyncMemberAgent
+#
+class AsyncMemberAgent(MemberAgent):
+    '''
+    Description
+    -----------
+    This class runs the TGDH protocols of a MemberAgent as asyncio coroutines.
+
+    Calls to the agents run on an executor and per-member work is gathered concurrently,
+    so one event loop can drive many groups (and any other I/O) at the same time.
+
+    Attributes
+    ----------
+    executor : Executor
+        The executor used for blocking agent calls (None uses the default executor of the loop)
+
+    Methods
+    -------
+    call(self, function: Callable, *args: Any, **kwargs: Any) -> Any
+        This method runs a blocking agent call without blocking the event loop.
+    member_call(self, key: int, method: str, *args: Any, **kwargs: Any) -> Any
+        This method calls a member's agent, one call at a time per agent process.
+    broadcast(self, calls: dict[int, list[tuple[str, tuple]]]) -> dict[int, dict[str, Any]]
+        This method runs tree methods on many members concurrently and collects the results.
+    close_connections(self) -> None
+        This method closes all agent connections concurrently.
+    calculate_keys(self, members: list[int], max_iters: Optional[list[int]]=None) -> None
+        This method calculates the path keys of a set of members.
+    initial_key_exchange(self) -> None
+        This method deploys the system and facilitates the initial key exchange.
+    sponsor_exchange(self, excluded: tuple[int, ...], skip: int, last: int) -> None
+        This method lets the sponsor publish the refreshed blind keys of its key path.
+    moved_key_exchange(self, update_paths: dict[int, Optional[Iterable[str]]]) -> None
+        This method lets the sponsor resend the blind keys of the co-path subtrees its rebalancing moved.
+    join_key_exchange(self) -> None
+        This method facilitates the key exchange for a join event.
+    prepare_joining_member(self) -> int
+        This method generates the joining member's key pair, subscribes it to the sponsor and returns its blind key.
+    join_protocol(self) -> None
+        This method facilitates a new member joining the group.
+    leave_key_exchange(self, event: str='leave') -> None
+        This method facilitates the key exchange for a leave (or merge) event.
+    leave_protocol(self, eid: int) -> None
+        This method facilitates a member leaving the group.
+    partition_key_exchange(self, sponsors: list[int], update_paths: dict[int, set[str]]) -> None
+        This method facilitates the key exchange for a partition event.
+    partition_protocol(self, eids: list[int]) -> None
+        This method facilitates several members leaving the group at once.
+    merge_protocol(self, other: AsyncMemberAgent) -> None
+        This method merges another group into this group.
+    fingerprints(self) -> dict[int, str]
+        This method returns the tree fingerprint of every member.
+    find_divergence(self, a: int, b: int) -> Optional[str]
+        This method returns the deepest node on the shared key path of two members where their trees disagree (None if they agree).
+    close(self) -> None
+        This method shuts down the transport.
+    '''
+
+    # constructor
+    #
+    def __init__(self, size: int, executor: Optional[Executor]=None, **kwargs: Any) -> None:
+        '''This is the constructor.'''
+
+        # the system is deployed by initial_key_exchange (or by entering an async with block)
+        #
+        super().__init__(size, start=False, **kwargs)
+        self.executor = executor
+        self._semaphore = None
+        self._locks = {}
+    #
+    # end constructor
+
+    # method: __aenter__
+    #
+    async def __aenter__(self) -> AsyncMemberAgent:
+        '''This method deploys the group at the start of an async with block.'''
+
+        await self.initial_key_exchange()
+        return self
+    #
+    # end method: __aenter__
+
+    # method: __aexit__
+    #
+    async def __aexit__(self, *args) -> None:
+        '''This method shuts down the group at the end of an async with block.'''
+
+        await self.close()
+    #
+    # end method: __aexit__
+
+    # method: call
+    #
+    async def call(self, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        '''This method runs a blocking agent call without blocking the event loop.'''
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(function, *args, **kwargs))
+    #
+    # end method: call
+
+    # method: member_call
+    #
+    async def member_call(self, key: int, method: str, *args: Any, **kwargs: Any) -> Any:
+        '''This method calls a member's agent, one call at a time per agent process.'''
+
+        # members that share a host agent are served one after another, as in broadcast
+        #
+        agent = self.agents[key]
+        owner = agent.host if isinstance(agent, MemberHandle) else agent
+        lock = self._locks.setdefault(id(owner), asyncio.Lock())
+        async with lock:
+            return await self.call(getattr(agent, method), *args, **kwargs)
+    #
+    # end method: member_call
+
+    # method: broadcast
+    #
+    async def broadcast(self, calls: dict[int, list[tuple[str, tuple]]]) -> dict[int, dict[str, Any]]:
+        '''This method runs tree methods on many members concurrently and collects the results.'''
+
+        keys = list(calls)
+        outcomes = await asyncio.gather(*(self.member_call(key, 'run_calls', calls[key]) for key in keys),
+                                        return_exceptions=True)
+        results = {}
+        errors = {}
+        for key, outcome in zip(keys, outcomes):
+            if isinstance(outcome, Exception):
+                errors[key] = outcome
+            else:
+                results[key] = outcome
+        if errors:
+            raise BroadcastError(errors, results)
+        return results
+    #
+    # end method: broadcast
+
+    # method: close_connections
+    #
+    async def close_connections(self) -> None:
+        '''This method closes all agent connections concurrently.'''
+
+        await asyncio.gather(*(self.member_call(key, 'close_all') for key in self.agents))
+    #
+    # end method: close_connections
+
+    # method: calculate_keys
+    #
+    async def calculate_keys(self, members: list[int], max_iters: Optional[list[int]]=None) -> None:
+        '''This method calculates the path keys of a set of members.'''
+
+        # without an engine every agent computes its own keys, all at once
+        #
+        if self.engine is None:
+            if max_iters is None:
+                calls = {key: [('calculate_group_key', ()), ('tree_print', ())] for key in members}
+            else:
+                calls = {key: [('initial_calculate_group_key', (iters,)), ('tree_print', ())]
+                         for key, iters in zip(members, max_iters)}
+            await self.broadcast(calls)
+            return
+
+        # gather the trees so that the engine can batch each level across members
+        #
+        trees = await asyncio.gather(*(self.member_call(key, 'get_data') for key in members))
+        if max_iters is None:
+            await self.call(self.engine.calculate_group_keys, trees)
+        else:
+            await self.call(self.engine.initial_calculate_group_keys, trees, max_iters)
+        await asyncio.gather(*(self.member_call(key, 'set_data', tree) for key, tree in zip(members, trees)))
+        for tree in trees:
+            tree.tree_print()
+    #
+    # end method: calculate_keys
+
+    # method: initial_key_exchange
+    #
+    async def initial_key_exchange(self) -> None:
+        '''This method deploys the system and facilitates the initial key exchange.'''
+
+        log_event(logging.INFO, 'key_exchange', kind='init')
+
+        # the trees (and their key generation) are built on the executor; a transport that forks
+        # starts its agents on the event loop thread first, since forking while an executor thread
+        # holds a lock (stdout, the curve table, ...) would leave the lock held in the child
+        #
+        self.transport.start()
+        uids = list(range(1, self.size+1))
+        building = [self.call(self.make_tree, uid) for uid in uids]
+        if self.transport.forks():
+            self.agents = self.spawn_members(uids)
+            trees = await asyncio.gather(*building)
+        else:
+            self.agents, *trees = await asyncio.gather(self.call(self.spawn_members, uids), *building)
+        trees = dict(zip(uids, trees))
+        await asyncio.gather(*(self.member_call(uid, 'set_data', trees[uid]) for uid in uids))
+
+        # pad the key paths and co-paths so that every member lines up by level
+        #
+        key_paths, co_paths = self.exchange_paths(trees)
+        iters = {uid: 0 for uid in uids}
+
+        # perform the send-receive communication protocol
+        #
+        for i in range(self.max_height):
+
+            # establish publishers (each node will publish)
+            #
+            addrs = await asyncio.gather(*(self.member_call(uid, 'bind', 'PUB', alias=f'mem_{uid}') for uid in uids))
+            self.addr = dict(zip(uids, addrs))
+
+            # establish subscribers (proper co-path member)
+            #
+            subscribers = [uid for uid in uids if co_paths[uid][i] is not None]
+            sources = [self.co_path_source(trees[uid], co_paths[uid][i]) for uid in subscribers]
+            await asyncio.gather(*(self.member_call(uid, 'connect', self.addr[src], handler=receive_bkeys)
+                                   for uid, src in zip(subscribers, sources)))
+            await self.transport.settle_async()
+
+            # send blind keys for the proper node (once the subscriptions have taken effect)
+            #
+            senders = [uid for uid in uids if key_paths[uid][i] is not None]
+            current = await asyncio.gather(*(self.member_call(uid, 'get_data') for uid in senders))
+            messages = [self.blind_key_message(tree, key_paths[uid][i]) for uid, tree in zip(senders, current)]
+            await asyncio.gather(*(self.member_call(uid, 'send', f'mem_{uid}', message)
+                                   for uid, message in zip(senders, messages)))
+
+            # calculate appropriate blind keys
+            #
+            await self.transport.settle_async()
+            await self.calculate_keys(subscribers, [iters[uid] for uid in subscribers])
+            for uid in subscribers:
+                iters[uid] = iters[uid]+1
+
+            # close connections to prevent unnecessary sending/receiving
+            #
+            await self.close_connections()
+            await self.transport.settle_async()
+            log_event(logging.DEBUG, 'level_done', level=self.max_height-i)
+
+        log_event(logging.INFO, 'rekey_done', kind='init', members=len(self.agents))
+    #
+    # end method: initial_key_exchange
+
+    # method: sponsor_exchange
+    #
+    async def sponsor_exchange(self, excluded: tuple[int, ...], skip: int, last: int) -> None:
+        '''This method lets the sponsor publish the refreshed blind keys of its key path.'''
+
+        # get the update paths of all other members and the sponsor's key path
+        #
+        results = await self.broadcast({key: [('get_update_path', ())] for key in self.agents if key not in excluded})
+        update_paths = {key: result['returns'][0] for key, result in results.items()}
+        sponsor_tree = await self.member_call(self.spon_id, 'get_data')
+        spon_key_path = [node.name for node in sponsor_tree.my_node.get_key_path()]
+        mem = f'mem_{self.spon_id}'
+
+        for i in range(len(spon_key_path)-last):
+
+            # only the sponsor will publish; members that need the node subscribe
+            #
+            self.addr[self.spon_id] = await self.member_call(self.spon_id, 'bind', 'PUB', alias=mem)
+            key_node = spon_key_path[i+skip]
+            await asyncio.gather(*(self.member_call(key, 'connect', self.addr[self.spon_id], handler=receive_bkeys)
+                                   for key in self.find_subscribers(update_paths, {key_node}, self.spon_id)))
+            await self.transport.settle_async()
+
+            # sponsor sends the blind key, lets it arrive and closes connections
+            #
+            await self.member_call(self.spon_id, 'send', mem, self.blind_key_message(sponsor_tree, key_node))
+            await self.transport.settle_async()
+            await self.close_connections()
+            log_event(logging.DEBUG, 'level_done', level=sponsor_tree.my_node.l-i-skip)
+        await self.moved_key_exchange(update_paths)
+    #
+    # end method: sponsor_exchange
+
+    # method: moved_key_exchange
+    #
+    async def moved_key_exchange(self, update_paths: dict[int, Optional[Iterable[str]]]) -> None:
+        '''This method lets the sponsor resend the blind keys of the co-path subtrees its rebalancing moved.'''
+
+        # only members whose co-path gained a moved subtree subscribe
+        #
+        view = await self.member_call(self.spon_id, 'get_data')
+        subscribers = self.find_subscribers(update_paths, {node.name for node in view.moved}, self.spon_id)
+        if not subscribers:
+            return
+        mem = f'mem_{self.spon_id}'
+        self.addr[self.spon_id] = await self.member_call(self.spon_id, 'bind', 'PUB', alias=mem)
+        await asyncio.gather(*(self.member_call(key, 'connect', self.addr[self.spon_id], handler=receive_bkeys)
+                               for key in subscribers))
+        await self.transport.settle_async()
+
+        # the sponsor sends the blind keys, lets them arrive and closes connections
+        #
+        for node in view.moved:
+            await self.member_call(self.spon_id, 'send', mem, f'{node.name}:{node.b_key}')
+        await self.transport.settle_async()
+        await self.close_connections()
+    #
+    # end method: moved_key_exchange
+
+    # method: join_key_exchange
+    #
+    async def join_key_exchange(self) -> None:
+        '''This method facilitates the key exchange for a join event.'''
+
+        # the sponsor and the joining member already share the key of their parent node
+        #
+        log_event(logging.INFO, 'key_exchange', kind='join')
+        await self.sponsor_exchange((self.spon_id, self.new_id), 1, 2)
+    #
+    # end method: join_key_exchange
+
+    # method: prepare_joining_member
+    #
+    async def prepare_joining_member(self) -> int:
+        '''This method generates the joining member's key pair, subscribes it to the sponsor and returns its blind key.'''
+
+        b_key = await self.member_call(self.new_id, 'generate_leaf', self.exponent_bits, self.group)
+        await self.member_call(self.new_id, 'connect', self.addr[self.spon_id], handler=receive_join_tree)
+        return b_key
+    #
+    # end method: prepare_joining_member
+
+    # method: join_protocol
+    #
+    async def join_protocol(self) -> None:
+        '''This method facilitates a new member joining the group.'''
+
+        log_event(logging.INFO, 'group_event', kind='join')
+
+        # alert current members that a new member is joining; find the sponsor
+        #
+        results = await self.broadcast({key: [('join_event', ())] for key in self.agents})
+        self.new_id = next(iter(results.values()))['returns'][0]
+        self.set_sponsor(results)
+
+        # start the joining member (on the executor unless the transport forks) and bind the
+        # publishers; the sponsor subscribes to the joining member
+        #
+        if self.transport.forks():
+            self.new_memb = self.spawn_member(self.new_id)
+        else:
+            self.new_memb = await self.call(self.spawn_member, self.new_id)
+        self.agents[self.new_id] = self.new_memb
+        mem = f'mem_{self.spon_id}'
+        new_mem = f'mem_{self.new_id}'
+        self.addr[self.spon_id], self.addr[self.new_id] = await asyncio.gather(
+            self.member_call(self.spon_id, 'bind', 'PUB', alias=mem),
+            self.member_call(self.new_id, 'bind', 'PUB', alias=new_mem))
+        await self.member_call(self.spon_id, 'connect', self.addr[self.new_id], handler=receive_join_bkey)
+
+        # the joining member generates its key pair and then subscribes to the sponsor (so the tree
+        # never arrives before its leaf) while the sponsor's tree is fetched
+        #
+        blind_key, sponsor_tree = await asyncio.gather(self.prepare_joining_member(),
+                                                       self.member_call(self.spon_id, 'get_data'))
+        await self.transport.settle_async()
+
+        # the tree goes out first and the new member's blind key follows; each side computes the
+        # group key as soon as its message arrives
+        #
+        stree = await self.call(sponsor_tree.public_copy)
+        log_event(logging.DEBUG, 'tree_sent', sponsor=self.spon_id)
+        await self.member_call(self.spon_id, 'send', mem, stree)
+        await self.member_call(self.new_id, 'send', new_mem, f'{stree.find_node(self.new_id, True).name}:{blind_key}')
+        await self.transport.settle_async()
+        await self.close_connections()
+
+        # sponsor sends updated blind keys; all remaining members calculate the group key
+        #
+        await self.join_key_exchange()
+        await self.transport.settle_async()
+        await self.calculate_keys([key for key in self.agents if key not in (self.spon_id, self.new_id)])
+        await self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='join', members=len(self.agents))
+    #
+    # end method: join_protocol
+
+    # method: leave_key_exchange
+    #
+    async def leave_key_exchange(self, event: str='leave') -> None:
+        '''This method facilitates the key exchange for a leave (or merge) event.'''
+
+        log_event(logging.INFO, 'key_exchange', kind=event)
+        await self.sponsor_exchange((self.spon_id,), 0, 1)
+    #
+    # end method: leave_key_exchange
+
+    # method: leave_protocol
+    #
+    async def leave_protocol(self, eid: int) -> None:
+        '''This method facilitates a member leaving the group.'''
+
+        log_event(logging.INFO, 'group_event', kind='leave')
+
+        # remove the agent
+        #
+        await self.member_call(eid, 'shutdown')
+        await self.transport.settle_async()
+        self.remove_members([eid])
+
+        # alert current members that a member is leaving the group; find the sponsor
+        #
+        results = await self.broadcast({key: [('leave_event', (eid,))] for key in self.agents})
+        self.set_sponsor(results)
+
+        # sponsor generates new keys and calculates new group key
+        #
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsor=self.spon_id)
+        await self.broadcast({self.spon_id: [('key_generation', ()), ('calculate_group_key', ()), ('tree_print', ())]})
+
+        # sponsor sends updated blind keys; all remaining members calculate the group key
+        #
+        await self.leave_key_exchange()
+        await self.transport.settle_async()
+        await self.calculate_keys([key for key in self.agents if key != self.spon_id])
+        await self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='leave', members=len(self.agents))
+    #
+    # end method: leave_protocol
+
+    # method: partition_key_exchange
+    #
+    async def partition_key_exchange(self, sponsors: list[int], update_paths: dict[int, set[str]]) -> None:
+        '''This method facilitates the key exchange for a partition event.'''
+
+        log_event(logging.INFO, 'key_exchange', kind='partition')
+
+        # the sponsors compute their key paths as far as they can and publish the new blind keys,
+        # until every sponsor has reached the group key
+        #
+        published = set()
+        rounds = 0
+        while True:
+            results = await self.broadcast({key: [('calculate_available_keys', ())] for key in sponsors})
+            fresh = self.fresh_names(results, sponsors, published)
+            if not fresh:
+                break
+
+            # every member subscribes to the sponsors that publish nodes of its co-path
+            #
+            spon_ids = list(fresh)
+            addrs = await asyncio.gather(*(self.member_call(spon_id, 'bind', 'PUB', alias=f'mem_{spon_id}')
+                                           for spon_id in spon_ids))
+            self.addr.update(zip(spon_ids, addrs))
+            await asyncio.gather(*(self.member_call(key, 'connect', self.addr[spon_id], handler=receive_bkeys)
+                                   for spon_id, names in fresh.items()
+                                   for key in self.find_subscribers(update_paths, set(names), spon_id)))
+            await self.transport.settle_async()
+
+            # sponsors send the new blind keys
+            #
+            views = await asyncio.gather(*(self.member_call(spon_id, 'get_data') for spon_id in spon_ids))
+            for spon_id, view in zip(spon_ids, views):
+                for key_node in fresh[spon_id]:
+                    await self.member_call(spon_id, 'send', f'mem_{spon_id}', self.blind_key_message(view, key_node))
+
+            # let the blind keys arrive, then close connections to prevent unnecessary sending/receiving
+            #
+            await self.transport.settle_async()
+            await self.close_connections()
+            rounds = rounds+1
+            log_event(logging.DEBUG, 'round_done', round=rounds)
+    #
+    # end method: partition_key_exchange
+
+    # method: partition_protocol
+    #
+    async def partition_protocol(self, eids: list[int]) -> None:
+        '''This method facilitates several members leaving the group at once.'''
+
+        # check the departing members before anything is torn down
+        #
+        eids = self.check_partition(eids)
+        log_event(logging.INFO, 'group_event', kind='partition')
+
+        # remove the agents
+        #
+        await asyncio.gather(*(self.member_call(eid, 'shutdown') for eid in eids))
+        await self.transport.settle_async()
+        self.remove_members(eids)
+
+        # alert current members that the members are leaving the group in one pass; find the sponsors
+        #
+        results = await self.broadcast({key: [('partition_event', (eids,)), ('get_update_path', ())] for key in self.agents})
+        sponsors = sorted(key for key, result in results.items() if result['ntype'] == 'spon')
+        update_paths = {key: set(result['returns'][1]) for key, result in results.items()}
+        self.spon_id = sponsors[0]
+        self.sponsor = self.agents[self.spon_id]
+
+        # sponsors generate new keys and exchange the blind keys of their paths
+        #
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsors=sponsors)
+        await self.broadcast({key: [('key_generation', ())] for key in sponsors})
+        await self.partition_key_exchange(sponsors, update_paths)
+        await self.moved_key_exchange(update_paths)
+        await self.broadcast({key: [('tree_print', ())] for key in sponsors})
+
+        # allow all remaining members to calculate the group key
+        #
+        await self.calculate_keys([key for key in self.agents if key not in sponsors])
+        await self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='partition', members=len(self.agents))
+    #
+    # end method: partition_protocol
+
+    # method: merge_protocol
+    #
+    async def merge_protocol(self, other: AsyncMemberAgent) -> None:
+        '''This method merges another group into this group.'''
+
+        if not isinstance(other, AsyncMemberAgent):
+            raise ValueError("An async group can only merge another async group")
+        self.check_merge(other)
+        log_event(logging.INFO, 'group_event', kind='merge')
+
+        # the sponsor (rightmost member) of each group sends its tree, with blind keys only, to the other group
+        #
+        first = await self.member_call(next(iter(self.agents)), 'get_data')
+        offset = first.nextmemb-1
+        packets = []
+        for side, peer, joining in ((self, other, True), (other, self, False)):
+            tree = await side.member_call(next(iter(side.agents)), 'get_data')
+            spon_id = list(tree.walk_pre_order(tree.root))[-1].mid
+            tree.blind_root()
+            mem = f'mem_{spon_id}'
+            side.addr[spon_id] = await side.member_call(spon_id, 'bind', 'PUB', alias=mem)
+            await asyncio.gather(*(peer.member_call(key, 'connect', side.addr[spon_id], handler=receive_merge)
+                                   for key in peer.agents))
+            packets.append((side, spon_id, mem, (tree.public_copy(), joining)))
+            log_event(logging.DEBUG, 'tree_sent', sponsor=spon_id)
+
+        # every member merges the received tree into its own (once the subscriptions have taken effect)
+        #
+        await self.transport.settle_async()
+        await asyncio.gather(*(side.member_call(spon_id, 'send', mem, packet) for side, spon_id, mem, packet in packets))
+        await self.transport.settle_async()
+        await asyncio.gather(self.close_connections(), other.close_connections())
+
+        # the members of the other group are renumbered after the members of this group
+        #
+        self.adopt_members(other, offset)
+
+        # the sponsor of the merged tree refreshes its key path
+        #
+        results = await self.broadcast({key: [('get_update_path', ())] for key in self.agents})
+        self.set_sponsor(results)
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsor=self.spon_id)
+        await self.broadcast({self.spon_id: [('key_generation', ()), ('calculate_group_key', ()), ('tree_print', ())]})
+
+        # sponsor sends updated blind keys; all remaining members calculate the group key
+        #
+        await self.leave_key_exchange('merge')
+        await self.transport.settle_async()
+        await self.calculate_keys([key for key in self.agents if key != self.spon_id])
+        await self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='merge', members=len(self.agents))
+    #
+    # end method: merge_protocol
+
+    # method: fingerprints
+    #
+    async def fingerprints(self) -> dict[int, str]:
+        '''This method returns the tree fingerprint of every member.'''
+
+        results = await self.broadcast({key: [('tree_fingerprint', ())] for key in self.agents})
+        return {key: result['returns'][0] for key, result in results.items()}
+    #
+    # end method: fingerprints
+
+    # method: find_divergence
+    #
+    async def find_divergence(self, a: int, b: int) -> Optional[str]:
+        '''This method returns the deepest node on the shared key path of two members where their trees disagree (None if they agree).'''
+
+        # compare the fingerprints; only if they disagree, gather the child fingerprints each member
+        # holds and walk them down from the root
+        #
+        results = await self.broadcast({a: [('tree_fingerprint', ())], b: [('tree_fingerprint', ())]})
+        if results[a]['returns'][0] == results[b]['returns'][0]:
+            return None
+        results = await self.broadcast({a: [('known_fingerprints', ())], b: [('known_fingerprints', ())]})
+        return BinaryTree.find_divergence(results[a]['returns'][0], results[b]['returns'][0])
+    #
+    # end method: find_divergence
+
+    # method: close
+    #
+    async def close(self) -> None:
+        '''This method shuts down the transport.'''
+
+        log_event(logging.INFO, 'close')
+        await self.call(self.transport.shutdown)
+        if self.key_cache is not None:
+            drop_cache(self.key_cache)
+        self.drop_regions()
+    #
+    # end method: close
+#
+# end class: AsyncMemberAgent
+#
+# end file: async_member_agent.py
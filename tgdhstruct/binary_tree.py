@@ -4,16 +4,44 @@
 
 # import modules
 #
-import sys
 import gc
-from typing import Union
+import sys
+import random
+import logging
+from copy import deepcopy
+from typing import Any, Union, Optional, NamedTuple
 import math
-import itertools
 from anytree.exporter import DotExporter
 from anytree import RenderTree
 from anytree import search
 from anytree import PreOrderIter
+from Crypto.Hash import SHA256
 from tgdhstruct.data_node import DataNode
+from tgdhstruct.event_log import log_event, log_enabled, fingerprint
+from tgdhstruct.key_cache import get_cache
+from tgdhstruct.key_region import get_region, region_path
+from tgdhstruct.dh_group import get_group
+
+# class: GroupKey
+#
+class GroupKey(NamedTuple):
+    '''
+    Description
+    -----------
+    This class is an immutable snapshot of a finished group key.
+
+    Attributes
+    ----------
+    epoch : int
+        The epoch of the tree when the key was computed
+    key : int
+        The group key
+    '''
+
+    epoch: int
+    key: int
+#
+# end class: GroupKey
 
 # class: BinaryTree
 #
@@ -43,6 +71,33 @@ class BinaryTree:
         The root of the tree
     refresh_path :
         The path of the keys that need to be updated after a join or leave event
+    moved : list[DataNode]
+        The co-path subtrees reordered by the last rebalancing (their blind keys are sent again)
+    display : bool
+        Whether the tree is exported and printed after each event
+    rebalance : str
+        The rebalancing policy applied after join and leave events: none, lazy, eager (both only
+        reorder the co-path of the event's key path, so neither bounds the height)
+    slack : int
+        The number of levels the height may exceed ceil(log2 n) before the lazy policy reorders
+    epoch : int
+        The number of group events (joins and leaves) applied to the tree
+    key_cache : str
+        The name of the shared node key cache used by this member (None to disable)
+    exponent_bits : int
+        The length of the exponents derived from node keys (None uses the full keys)
+    group : str
+        The name of the Diffie-Hellman group used for the node keys
+    sparse : bool
+        Whether key material is only kept on my key path and co-path (the rest of the tree is shape only)
+    sponsor_policy : str
+        How a sponsor is picked among the valid members: rightmost, least_recent, random
+    sponsored : dict[int, int]
+        The epoch in which each member last sponsored an event
+    published : tuple[Optional[GroupKey], Optional[GroupKey]]
+        The current and previous finished group keys (replaced as a whole, never modified)
+    key_region : str
+        The path prefix of the memory-mapped regions that members publish the group key to (None to disable)
 
     Methods
     -------
@@ -50,55 +105,109 @@ class BinaryTree:
         This method adds two children nodes to a specified parent node.
     get_leaves(self) -> tuple[DataNode]
         This method returns all of the leaves in the tree.
-    walk_tree_build(self, curr_n: DataNode) -> None
-        This method is called recursively to build the tree.
+    tree_stats(self) -> dict[str, Any]
+        This method returns the member count, height and leaf depth histogram of the tree without walking it.
+    build_shape(self) -> list[DataNode]
+        This method creates the nodes of the initial tree in a single pass.
     walk_pre_order(self, root: DataNode) -> PreOrderIter
         This method returns the pre-order traversal of the tree.
     type_assign(self) -> None
         This method assigns the 'ntype' attribute for the nodes in the tree.
-    id_assign(self) -> None
+    id_assign(self, leaves: list[DataNode]) -> None
         This method assigns the 'mid' attribute for the nodes in the initial tree.
+    member_id(self, l: int, v: int) -> int
+        This method returns the member ID of the initial leaf with index <l,v>.
+    member_index(self, mid: int) -> tuple[int, int]
+        This method returns the index <l,v> of the initial leaf of a member.
+    find_index(self, l: int, v: int) -> DataNode
+        This method finds the node with index <l,v> by walking down from the root.
     find_me(self) -> None:
         This function finds the node in the tree that corresponds to this user.
     key_generation(self) -> None
         This method generates keys only for my node.
+    calculate_path_node(self, child: DataNode, sibling: DataNode) -> None
+        This method calculates the key and blind key of the parent of two nodes.
     initial_calculate_group_key(self, max_iters: int) -> None:
         This method calculates the group key iteratively.
     calculate_group_key(self) -> None
         This method calculates the group key.
+    calculate_available_keys(self) -> list[DataNode]
+        This method calculates my path keys as far as the known blind keys allow.
+    publish_group_key(self) -> None
+        This method publishes the root key as the current group key once it is complete.
+    current_group_key(self) -> Optional[GroupKey]
+        This method returns the current group key without waiting for a rekey in progress.
+    group_key_for(self, epoch: int) -> Optional[int]
+        This method returns the published group key of the current or previous epoch.
+    tree_fingerprint(self) -> str
+        This method returns the fingerprint of the tree's shape, member IDs and blind keys.
+    child_fingerprints(self, name: str) -> list[tuple[str, Optional[str]]]
+        This method returns the names and fingerprints of the children of a node (None if I do not hold its blind key).
+    known_fingerprints(self) -> dict[str, list[tuple[str, Optional[str]]]]
+        This method returns the child fingerprints of the root and of every inner node whose blind key I hold.
+    find_divergence(children_a: dict[str, list[tuple[str, Optional[str]]]], children_b: dict[str, list[tuple[str, Optional[str]]]]) -> str
+        This method returns the deepest node on the shared key path of two trees where they disagree.
     build_tree(self) -> None
         This method builds the initial tree from the constructor.
     find_node(self, iden: Union[int, str], memflag: bool) -> DataNode
         This method finds a specific node in the tree.
     recalculate_names(self) -> None
         This method recalculates the names (position indices) for each node.
+    choose_sponsor(self, leaves: tuple[DataNode]) -> DataNode
+        This method picks the sponsor among the valid members (left to right) by the sponsor policy.
     find_insertion(self) -> DataNode
         This method finds the point of insertion for a joining node.
     get_update_path(self) -> set[DataNode]
         This method determines which keys need to be updated and receives them.
-    empty_check(self) -> None
+    reorder_threshold(self, members: int) -> int
+        This method returns the height above which the lazy policy reorders a key path.
+    rebalance_path(self, leaf: DataNode) -> None
+        This method reorders the subtrees hanging off the key path of a leaf to reduce the height.
+    empty_check(self, leaving: int=1) -> None
         This method determines if I am the only member left in the group and exits if so.
+    prune_keys(self) -> None
+        This method drops the key material of the nodes off my key path and co-path.
     tree_refresh(self) -> None
         This method refreshes tree attributes and keys after an event.
-    join_event(self) -> None
+    join_event(self) -> int
         This method updates the tree when a new member joins the group.
     leave_event(self, eid: int) -> None
         This method updates the tree when a member leaves the tree
-    new_member_protocol(self) -> None
+    partition_event(self, eids: list[int]) -> None
+        This method updates the tree when several members leave the tree at once.
+    new_member_protocol(self, leaf: Optional[DataNode]=None) -> None
         This method is used by the new member when joining the group.
+    blind_root(self) -> None
+        This method blinds the root key so that the tree can be merged under a new parent.
+    public_copy(self) -> BinaryTree
+        This method returns a copy of the tree that carries blind keys only.
+    merge_insertion(self, root: DataNode, height: int) -> Optional[DataNode]
+        This method finds the node where a tree of a given height is merged into the tree under <root>.
+    merge_event(self, other: BinaryTree, joining: bool=False) -> None
+        This method merges the tree of another group into this tree.
     tree_export(self) -> None
         This method exports the tree as a png file using Graphviz.
     tree_print(self) -> None
-        This method prints the tree to the terminal.
+        This method logs the tree with key fingerprints (at the debug level).
      verbose_node_print(self) -> None
         This method prints all attributes of all nodes in the tree.
     '''
 
     # constructor
     #
-    def __init__(self, size: int, uid: int) -> None:
+    def __init__(self, size: int, uid: int, build: bool=True, display: bool=True, rebalance: str='none', slack: int=0, key_cache: Optional[str]=None, exponent_bits: Optional[int]=None, group: str='modp2048', sparse: bool=False, sponsor_policy: str='rightmost', key_region: Optional[str]=None) -> None:
         '''This is the constructor.'''
 
+        if rebalance not in ('none', 'lazy', 'eager'):
+            raise ValueError(f"Unknown rebalancing policy: {rebalance}")
+        if sponsor_policy not in ('rightmost', 'least_recent', 'random'):
+            raise ValueError(f"Unknown sponsor policy: {sponsor_policy}")
+        if sparse and rebalance != 'none':
+            raise ValueError("A sparse tree cannot be rebalanced (other members' co-paths would need blind keys it dropped)")
+        if exponent_bits is not None and (exponent_bits < 128 or exponent_bits % 8 != 0):
+            raise ValueError(f"Exponent length must be a multiple of 8 of at least 128 bits: {exponent_bits}")
+        get_group(group)
+
         self.size = size
         self.uid = uid
         self.my_node = None
@@ -108,10 +217,24 @@ class BinaryTree:
         self.height = math.floor(math.log(self.nodemax,2))
         self.root = DataNode()
         self.refresh_path = None
-
-        # build the initial tree
+        self.moved = []
+        self.display = display
+        self.rebalance = rebalance
+        self.slack = slack
+        self.epoch = 0
+        self.key_cache = key_cache
+        self.exponent_bits = exponent_bits
+        self.group = group
+        self.sparse = sparse
+        self.sponsor_policy = sponsor_policy
+        self.sponsored = {}
+        self.published = (None, None)
+        self.key_region = key_region
+
+        # build the initial tree (skipped when the tree is restored from a snapshot)
         #
-        self.build_tree()
+        if build:
+            self.build_tree()
     #
     # end constructor
 
@@ -120,9 +243,9 @@ class BinaryTree:
     def add_nodes(self, curr_n: DataNode) -> None:
         '''This method adds two children nodes to a specified parent node.'''
 
-        curr_n.lchild = DataNode(
+        curr_n.lchild = DataNode.acquire(
             pos='left', l=curr_n.l+1, v=2*curr_n.v, parent=curr_n, ntype='inter')
-        curr_n.rchild = DataNode(
+        curr_n.rchild = DataNode.acquire(
             pos='right', l=curr_n.l+1, v=(2*curr_n.v)+1, parent=curr_n, ntype='inter')
     #
     # end method: add_nodes
@@ -136,20 +259,80 @@ class BinaryTree:
     #
     # end method: get_leaves
 
-    # method: walk_tree_build
+    # method: tree_stats
     #
-    def walk_tree_build(self, curr_n: DataNode) -> None:
-        '''This method is called recursively to build the tree.'''
+    def tree_stats(self) -> dict[str, Any]:
+        '''This method returns the member count, height and leaf depth histogram of the tree without walking it.'''
 
-        if not curr_n.is_leaf:
-            self.walk_tree_build(curr_n.rchild)
-            if self.nodetrack is not self.nodemax:
-                self.walk_tree_build(curr_n.lchild)
-        else:
-            self.add_nodes(curr_n)
-            self.nodetrack = self.nodetrack + 2
+        # the root carries statistics that are updated along the path of every structural change;
+        # the longest co-path is as long as the deepest leaf is deep
+        #
+        members = self.root.subtree_size
+        return {
+            'members': members,
+            'nodes': 2*members-1,
+            'height': self.root.subtree_height,
+            'longest_co_path': self.root.subtree_height,
+            'depth_histogram': {depth: count for depth, count in enumerate(self.root.leaf_depths) if count},
+            'epoch': self.epoch,
+        }
+    #
+    # end method: tree_stats
+
+    # method: build_shape
+    #
+    def build_shape(self) -> list[DataNode]:
+        '''This method creates the nodes of the initial tree in a single pass.'''
+
+        # function: join_children
+        #
+        def join_children(l: int, v: int, lchild: DataNode, rchild: DataNode, parent: DataNode=None) -> DataNode:
+            '''This helper function creates (or reuses) a parent node for two parentless nodes.'''
+
+            if parent is None:
+                parent = DataNode(l=l, v=v, ntype='inter')
+            parent.adopt(lchild, rchild)
+            return parent
+        #
+        # end function: join_children
+
+        # the initial tree is complete down to level k = floor(log2 n); the rightmost
+        # n - 2^k leaves of level k are then split to give exactly n leaves
+        #
+        level = self.size.bit_length()-1
+        split = (1 << level)-(self.size-(1 << level))
+        if level == 0:
+            self.nodetrack = self.nodemax
+            return [self.root]
+
+        # cyclic garbage collection is paused while the nodes are created: every node links to its
+        # parent and children, so each collection would rescan the whole partly built tree
+        #
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+
+            # build bottom-up so every node is linked before it has ancestors (no loop checks or
+            # statistics walks; each parent combines its children's statistics once)
+            #
+            leaves = [DataNode(l=level, v=v, ntype='inter') for v in range(split)]
+            current = list(leaves)
+            for v in range(split, 1 << level):
+                lchild = DataNode(l=level+1, v=2*v, ntype='inter')
+                rchild = DataNode(l=level+1, v=(2*v)+1, ntype='inter')
+                leaves.append(lchild)
+                leaves.append(rchild)
+                current.append(join_children(level, v, lchild, rchild))
+            for l in reversed(range(level)):
+                parent = self.root if l == 0 else None
+                current = [join_children(l, v, current[2*v], current[(2*v)+1], parent) for v in range(1 << l)]
+        finally:
+            if collecting:
+                gc.enable()
+        self.nodetrack = self.nodemax
+        return leaves
     #
-    # end method: walk_tree_build
+    # end method: build_shape
 
     # method: walk_pre_order
     #
@@ -172,32 +355,59 @@ class BinaryTree:
 
     # method: id_assign
     #
-    def id_assign(self) -> None:
+    def id_assign(self, leaves: list[DataNode]) -> None:
         '''This method assigns the 'mid' attribute for the nodes in the initial tree.'''
 
-        # generate member ID lists
+        for node in leaves:
+            node.mid = self.member_id(node.l, node.v)
+    #
+    # end method: id_assign
+
+    # method: member_id
+    #
+    def member_id(self, l: int, v: int) -> int:
+        '''This method returns the member ID of the initial leaf with index <l,v>.'''
+
+        # a leaf v = (2m+1)*2^t gets the ID 2^(l-t)-m; the leftmost leaf is member 1
         #
-        baselist = [1,2]
-        if self.height >= 1:
-            for i in range(0, self.height-1):
-                templist = list(reversed(range(pow(2,i+2)+1)))
-                newlist = templist[0:pow(2,i+1)]
-                baselist = list(itertools.chain(*zip(baselist, newlist)))
-        max_size = pow(2,self.height)
-        hlist = list(reversed(range(max_size+1)))
-        rm_nodes = hlist[0:max_size-self.size]
-        for num in rm_nodes:
-            baselist.remove(num)
+        if v == 0:
+            return 1
+        t = (v & -v).bit_length()-1
+        return (1 << (l-t))-(v >> (t+1))
+    #
+    # end method: member_id
 
-        # assign the ID numbers
+    # method: member_index
+    #
+    def member_index(self, mid: int) -> tuple[int, int]:
+        '''This method returns the index <l,v> of the initial leaf of a member.'''
+
+        # invert the ID mapping on the deepest level, then step up if that node was not split
         #
-        idlist = list(reversed(baselist))
-        count = len(baselist)-1
-        for node in self.get_leaves():
-            node.mid = idlist[count]
-            count = count-1
+        level = self.size.bit_length()-1
+        split = (1 << level)-(self.size-(1 << level))
+        if mid == 1:
+            v = 0
+        else:
+            s = (mid-1).bit_length()
+            v = ((2*((1 << s)-mid))+1) << (level+1-s)
+        if (v >> 1) >= split:
+            return level+1, v
+        return level, v >> 1
     #
-    # end method: id_assign
+    # end method: member_index
+
+    # method: find_index
+    #
+    def find_index(self, l: int, v: int) -> DataNode:
+        '''This method finds the node with index <l,v> by walking down from the root.'''
+
+        node = self.root
+        for bit in reversed(range(l)):
+            node = node.rchild if (v >> bit) & 1 else node.lchild
+        return node
+    #
+    # end method: find_index
 
     # method: find_me
     #
@@ -226,10 +436,35 @@ class BinaryTree:
         '''This method generates keys only for my node.'''
 
         self.my_node.gen_private_key()
-        self.my_node.gen_blind_key()
+        self.my_node.gen_blind_key(self.exponent_bits, self.group)
     #
     # end method: key_generation
 
+    # method: calculate_path_node
+    #
+    def calculate_path_node(self, child: DataNode, sibling: DataNode) -> None:
+        '''This method calculates the key and blind key of the parent of two nodes.'''
+
+        # reuse the key if another member of this group already computed it in this epoch
+        #
+        parent = child.parent
+        cache = get_cache(self.key_cache) if self.key_cache is not None else None
+        if cache is not None:
+            entry = cache.lookup(parent.name, self.epoch)
+            if entry is not None:
+                parent.key, parent.b_key = entry
+                return
+
+        # compute the key and publish it for the other members
+        #
+        parent.key = get_group(self.group).exp(int(sibling.b_key), child.exponent(self.exponent_bits))
+        if parent.ntype != 'root':
+            parent.gen_blind_key(self.exponent_bits, self.group)
+        if cache is not None:
+            cache.store(parent.name, self.epoch, parent.key, parent.b_key)
+    #
+    # end method: calculate_path_node
+
     # method: initial_calculate_group_key
     #
     def initial_calculate_group_key(self, max_iters: int) -> None:
@@ -239,12 +474,11 @@ class BinaryTree:
         key_path = self.my_node.get_key_path()
         co_path = self.my_node.get_co_path()
         for i, node in enumerate(co_path):
-            key_path[i+1].key = pow(int(node.b_key), key_path[i].key, DataNode.p)
-            if key_path[i+1].ntype != 'root':
-                key_path[i+1].gen_blind_key()
+            self.calculate_path_node(key_path[i], node)
             iters = iters+1
             if iters > max_iters:
                 break
+        self.publish_group_key()
         
         #root = self.find_node('0,0', False)
         #if (root.key is not None):
@@ -260,31 +494,152 @@ class BinaryTree:
         key_path = self.my_node.get_key_path()
         co_path = self.my_node.get_co_path()
         for i, node in enumerate(co_path):
-            key_path[i+1].key = pow(int(node.b_key), key_path[i].key, DataNode.p)
-            if key_path[i+1].ntype != 'root':
-                key_path[i+1].gen_blind_key()
+            self.calculate_path_node(key_path[i], node)
+        self.publish_group_key()
 
         #print_key_string = self.find_node('0,0', False).key.to_bytes(2048, 'big').encode('utf-8')
         #print(print_key_string)
     #
     # end method: calculate_group_key
 
+    # method: calculate_available_keys
+    #
+    def calculate_available_keys(self) -> list[DataNode]:
+        '''This method calculates my path keys as far as the known blind keys allow.'''
+
+        # stop at the first co-path node whose new blind key has not arrived yet
+        #
+        key_path = self.my_node.get_key_path()
+        co_path = self.my_node.get_co_path()
+        for i, node in enumerate(co_path):
+            if key_path[i+1].key is None:
+                if node.b_key is None:
+                    break
+                self.calculate_path_node(key_path[i], node)
+        self.publish_group_key()
+        return [node for node in key_path if node.ntype != 'root' and node.b_key is not None]
+    #
+    # end method: calculate_available_keys
+
+    # method: publish_group_key
+    #
+    def publish_group_key(self) -> None:
+        '''This method publishes the root key as the current group key once it is complete.'''
+
+        # readers never see the root key while it is being recomputed: the finished key goes into a
+        # new tuple, and swapping the tuple in is a single reference assignment
+        #
+        current = self.published[0]
+        if self.root.key is None or (current is not None and current.key == self.root.key):
+            return
+        self.published = (GroupKey(self.epoch, self.root.key), current)
+
+        # co-located processes read the key from my region instead of asking my agent for the tree
+        #
+        if self.key_region is not None:
+            region = get_region(region_path(self.key_region, self.uid), get_group(self.group).element_bytes)
+            region.write(self.epoch, self.root.key)
+    #
+    # end method: publish_group_key
+
+    # method: current_group_key
+    #
+    def current_group_key(self) -> Optional[GroupKey]:
+        '''This method returns the current group key without waiting for a rekey in progress.'''
+
+        return self.published[0]
+    #
+    # end method: current_group_key
+
+    # method: group_key_for
+    #
+    def group_key_for(self, epoch: int) -> Optional[int]:
+        '''This method returns the published group key of the current or previous epoch.'''
+
+        for snapshot in self.published:
+            if snapshot is not None and snapshot.epoch == epoch:
+                return snapshot.key
+        return None
+    #
+    # end method: group_key_for
+
+    # method: tree_fingerprint
+    #
+    def tree_fingerprint(self) -> str:
+        '''This method returns the fingerprint of the tree's shape, member IDs and blind keys.'''
+
+        # every member holds the blind keys of both children of the root, and those keys depend on
+        # every key in the tree, so members with the same group key agree on the fingerprint
+        #
+        digest = SHA256.new(self.root.subtree_digest())
+        for child in self.root.children:
+            digest.update(child.node_digest())
+        return digest.hexdigest()
+    #
+    # end method: tree_fingerprint
+
+    # method: child_fingerprints
+    #
+    def child_fingerprints(self, name: str) -> list[tuple[str, Optional[str]]]:
+        '''This method returns the names and fingerprints of the children of a node (None if I do not hold its blind key).'''
+
+        l, v = (int(index) for index in name.lstrip('<').rstrip('>').split(','))
+        node = self.find_index(l, v)
+        return [(child.name, child.node_digest().hex() if child.b_key is not None else None) for child in node.children]
+    #
+    # end method: child_fingerprints
+
+    # method: known_fingerprints
+    #
+    def known_fingerprints(self) -> dict[str, list[tuple[str, Optional[str]]]]:
+        '''This method returns the child fingerprints of the root and of every inner node whose blind key I hold.'''
+
+        # a comparison only descends into nodes whose blind key both members hold, so these are
+        # all the fingerprints it can need
+        #
+        return {node.name: self.child_fingerprints(node.name) for node in self.walk_pre_order(self.root)
+                if node.children and (node is self.root or node.b_key is not None)}
+    #
+    # end method: known_fingerprints
+
+    # method: find_divergence
+    #
+    @staticmethod
+    def find_divergence(children_a: dict[str, list[tuple[str, Optional[str]]]], children_b: dict[str, list[tuple[str, Optional[str]]]]) -> str:
+        '''This method returns the deepest node on the shared key path of two trees where they disagree.'''
+
+        # follow a disagreeing child down from the root; descend into a child both members hold a
+        # blind key for and disagree on, and stop where the shapes differ or where their key paths part
+        #
+        name = '<0,0>'
+        while name in children_a and name in children_b:
+            if [child[0] for child in children_a[name]] != [child[0] for child in children_b[name]]:
+                return name
+            differ = [child_a[0] for child_a, child_b in zip(children_a[name], children_b[name])
+                      if None not in (child_a[1], child_b[1]) and child_a[1] != child_b[1]]
+            if not differ:
+                return name
+            name = differ[0]
+        return name
+    #
+    # end method: find_divergence
+
     # method: build_tree
     #
     def build_tree(self) -> None:
         '''This method builds the initial tree from the constructor.'''
 
-        # recursively build the tree
+        # build the tree
         #
-        print(f"\nMEM {self.uid}: Generating Tree with {str(self.size).rjust(2)} members ...")
-        while self.nodetrack is not self.nodemax:
-            self.walk_tree_build(self.root)
+        log_event(logging.DEBUG, 'tree_build', uid=self.uid, size=self.size)
+        leaves = self.build_shape()
 
         # set node attributes
         #
-        self.type_assign()
-        self.id_assign()
-        self.find_me()
+        for node in leaves:
+            node.ntype = 'mem'
+        self.id_assign(leaves)
+        self.my_node = self.find_index(*self.member_index(self.uid))
 
         # generate keys and calculate the group key
         #
@@ -293,8 +648,9 @@ class BinaryTree:
 
         # view the tree
         #
-        self.tree_export()
-        self.tree_print()
+        if self.display:
+            self.tree_export()
+            self.tree_print()
     #
     # end method: build_tree
 
@@ -342,6 +698,26 @@ class BinaryTree:
     #
     # end method: recalculate_names
 
+    # method: choose_sponsor
+    #
+    def choose_sponsor(self, leaves: tuple[DataNode]) -> DataNode:
+        '''This method picks the sponsor among the valid members (left to right) by the sponsor policy.'''
+
+        # every member holds the same tree and sponsor history, so every member picks the same
+        # sponsor without exchanging a message
+        #
+        if self.sponsor_policy == 'least_recent':
+            sponsor_node = min(reversed(leaves), key=lambda node: self.sponsored.get(node.mid, -1))
+        elif self.sponsor_policy == 'random':
+            seed = f'{self.epoch}:{leaves[0].name}:{leaves[-1].name}'
+            sponsor_node = leaves[random.Random(seed).randrange(len(leaves))]
+        else:
+            sponsor_node = leaves[-1]
+        self.sponsored[sponsor_node.mid] = self.epoch
+        return sponsor_node
+    #
+    # end method: choose_sponsor
+
     # method: find_insertion
     #
     def find_insertion(self) -> DataNode:
@@ -356,11 +732,11 @@ class BinaryTree:
             plist.append(node)
         slevel = min(llist)
 
-        # find the rightmost node on the shallowest level with no children
+        # pick a node on the shallowest level with no children (its member sponsors the join)
         #
         slist = [node for node in plist if node.l == slevel]
         olist = [node for node in slist if node.is_leaf]
-        return olist[len(olist)-1]
+        return self.choose_sponsor(olist)
     #
     # end method: find_insertion
 
@@ -369,24 +745,93 @@ class BinaryTree:
     def get_update_path(self) -> set[DataNode]:
         '''This method determines which keys need to be updated and receives them.'''
 
-        new_path = set(self.refresh_path)
+        new_path = set(self.refresh_path).union(self.moved)
         our_path = set(self.my_node.get_co_path())
         update_path = our_path.intersection(new_path)
         return update_path
     #
     # end method: get_update_path
 
+    # method: reorder_threshold
+    #
+    def reorder_threshold(self, members: int) -> int:
+        '''This method returns the height above which the lazy policy reorders a key path.'''
+
+        # (n-1).bit_length() is ceil(log2 n) for n >= 1
+        #
+        return max(members-1, 0).bit_length()+self.slack
+    #
+    # end method: reorder_threshold
+
+    # method: rebalance_path
+    #
+    def rebalance_path(self, leaf: DataNode) -> None:
+        '''This method reorders the subtrees hanging off the key path of a leaf to reduce the height.'''
+
+        # the nodes on the key path are refreshed by the sponsor anyway, so the subtrees hanging
+        # off the path (the co-path) can be reordered freely without invalidating any other key;
+        # members inside a moved subtree get new co-path nodes, so the sponsor resends their blind keys;
+        # no leaf changes depth relative to its subtree, so this lowers the height without bounding it
+        #
+        self.moved = []
+        if self.rebalance == 'none':
+            return
+        if self.rebalance == 'lazy' and self.root.subtree_height <= self.reorder_threshold(self.root.subtree_size):
+            return
+        key_path = leaf.get_key_path()
+        co_path = list(reversed(leaf.get_co_path()))
+        ordered = sorted(co_path, key=lambda node: -node.subtree_height)
+        current = max(depth+node.subtree_height for depth, node in enumerate(co_path, 1))
+        balanced = max(depth+node.subtree_height for depth, node in enumerate(ordered, 1))
+        if balanced >= current:
+            return
+
+        # hang the tallest subtree next to the root and keep the path on its original side
+        #
+        self.moved = ordered
+        path = list(reversed(key_path))
+        for depth, node in enumerate(ordered):
+            parent = path[depth]
+            child = path[depth+1]
+            node.pos = 'right' if child.pos == 'left' else 'left'
+            if child.pos == 'left':
+                parent.children = (child, node)
+                parent.lchild, parent.rchild = child, node
+            else:
+                parent.children = (node, child)
+                parent.lchild, parent.rchild = node, child
+    #
+    # end method: rebalance_path
+
     # method: empty_check
     #
-    def empty_check(self) -> None:
+    def empty_check(self, leaving: int=1) -> None:
         '''This method determines if I am the only member left in the group and exits if so.'''
 
-        if self.root.lchild.is_leaf and self.root.rchild.is_leaf:
-            print("\nThis group is empty! Program will terminate.")
+        if self.root.subtree_size-leaving < 2:
+            log_event(logging.WARNING, 'group_empty', uid=self.uid)
             sys.exit(0)
     #
     # end method: empty_check
 
+    # method: prune_keys
+    #
+    def prune_keys(self) -> None:
+        '''This method drops the key material of the nodes off my key path and co-path.'''
+
+        # only my key path and the blind keys of my co-path are ever read; every other blind key
+        # that an event needs is sent again by a sponsor
+        #
+        keep = set(self.my_node.get_key_path()).union(self.my_node.get_co_path())
+        for node in self.walk_pre_order(self.root):
+            if node is not self.my_node:
+                node.rsa_pub = None
+            if node not in keep:
+                node.key = None
+                node.b_key = None
+    #
+    # end method: prune_keys
+
     # method: tree_refresh
     #
     def tree_refresh(self) -> None:
@@ -394,21 +839,23 @@ class BinaryTree:
 
         self.find_me()
         self.recalculate_names()
-        self.tree_export()
+        if self.sparse:
+            self.prune_keys()
+        if self.display:
+            self.tree_export()
         if self.my_node.ntype == 'spon':
-            print(f"MEM {self.uid}: I am the sponsor!")
-            print(f"MEM {self.uid}: Entering sponsor protocol ...")
+            log_event(logging.DEBUG, 'sponsor', uid=self.uid)
     #
     # end method: tree_refresh
 
     # method: join_event
     #
-    def join_event(self) -> None:
-        '''This method updates the tree when a new member joins the group.'''
+    def join_event(self) -> int:
+        '''This method updates the tree when a new member joins the group and returns the new member's id.'''
 
         # signal that a member is joining
         #
-        print(f"\nMEM {self.uid}: New member is joining the group!")
+        log_event(logging.DEBUG, 'member_event', uid=self.uid, kind='join')
 
         # prepare the tree by assigning types
         #
@@ -432,14 +879,17 @@ class BinaryTree:
         #
         inserti_node.insertion_assign()
         newmemb_node.new_memb_assign(self.nextmemb)
+        self.rebalance_path(newmemb_node)
 
         # signal that a new member has been added
         #
         self.nextmemb = self.nextmemb+1
+        self.epoch = self.epoch+1
 
         # refresh the tree
         #
         self.tree_refresh()
+        return newmemb_node.mid
     #
     # end method: join_event
 
@@ -450,7 +900,7 @@ class BinaryTree:
 
         # signal that a member is leaving
         #
-        print(f"\nMEM {self.uid}: Member {str(eid)} is leaving the group!")
+        log_event(logging.DEBUG, 'member_event', uid=self.uid, kind='leave', eid=eid)
 
         # determine if the tree is empty
         #
@@ -459,6 +909,7 @@ class BinaryTree:
         # prepare the tree by assigning types
         #
         self.type_assign()
+        self.sponsored.pop(eid, None)
 
         # find the member to be erased
         #
@@ -467,26 +918,29 @@ class BinaryTree:
                 if node.parent.ntype == 'root':
                     # if the parent of the leaving node is the root, the root must be relocated
                     #
+                    old_root = node.parent
                     new_root = node.get_sibling()
                     new_root.make_root()
                     self.root = new_root
-                    sponsor_node = list(self.walk_pre_order(self.root))[-1]
+                    sponsor_node = self.choose_sponsor(self.root.leaves)
                     sponsor_node.sponsor_assign(join=False)
-                    del node
-                    gc.collect()
+                    old_root.release()
+                    node.release()
 
                 else:
                     # assign the sponsor and transfer data
                     #
-                    sponsor_node = list(self.walk_pre_order(node.get_sibling()))[-1]
+                    sponsor_node = self.choose_sponsor(node.get_sibling().leaves)
                     sponsor_node.sponsor_assign(join=False)
                     node.parent.transfer_data_remove(node.get_sibling())
-                    del node
-                    gc.collect()
+                    node.release()
 
-        # determine the keys that need to be refreshed
+        # rebalance the sponsor's path and determine the keys that need to be refreshed
         #
-        self.refresh_path = self.find_node(sponsor_node.mid, True).get_key_path()
+        self.epoch = self.epoch+1
+        sponsor_node = self.find_node(sponsor_node.mid, True)
+        self.rebalance_path(sponsor_node)
+        self.refresh_path = sponsor_node.get_key_path()
 
         # refresh the tree
         #
@@ -494,27 +948,223 @@ class BinaryTree:
     #
     # end method: leave_event
 
+    # method: partition_event
+    #
+    def partition_event(self, eids: list[int]) -> None:
+        '''This method updates the tree when several members leave the tree at once.'''
+
+        # signal that members are leaving
+        #
+        log_event(logging.DEBUG, 'member_event', uid=self.uid, kind='partition', eids=eids)
+
+        # determine if the tree is empty
+        #
+        self.empty_check(len(eids))
+
+        # prepare the tree by assigning types
+        #
+        self.type_assign()
+
+        # prune every departed leaf; the nodes that take over a sibling's data are marked, since
+        # their blind keys and the keys above them are stale
+        #
+        marks = set()
+        for eid in eids:
+            node = self.find_node(eid, True)
+            sibling = node.get_sibling()
+            marks.discard(node)
+            self.sponsored.pop(eid, None)
+            if node.parent is self.root:
+                old_root = node.parent
+                sibling.make_root()
+                self.root = sibling
+                old_root.release()
+            else:
+                marks.discard(sibling)
+                marks.add(node.parent)
+                node.parent.transfer_data_remove(sibling)
+            node.release()
+
+        # one sponsor under each lowest stale node covers every stale key with its key path; like a
+        # leave, it is picked among the members under that node
+        #
+        stale = marks | {self.root}
+        for node in marks:
+            stale.update(node.ancestors)
+        sponsors = []
+        for node in self.walk_pre_order(self.root):
+            if node in stale and not any(child in stale for child in node.children):
+                sponsors.append(self.choose_sponsor(node.leaves))
+        for sponsor_node in sponsors:
+            sponsor_node.sponsor_assign(join=False)
+
+        # rebalance a lone sponsor's path and clear the keys that the sponsors refresh
+        #
+        self.epoch = self.epoch+1
+        self.moved = []
+        if len(sponsors) == 1:
+            self.rebalance_path(sponsors[0])
+        self.refresh_path = []
+        for sponsor_node in sponsors:
+            for node in sponsor_node.get_key_path():
+                if node not in self.refresh_path:
+                    self.refresh_path.append(node)
+                    node.key = None
+                    node.b_key = None
+
+        # refresh the tree
+        #
+        self.tree_refresh()
+    #
+    # end method: partition_event
+
     # method: new_member_protocol
     #
-    def new_member_protocol(self) -> None:
+    def new_member_protocol(self, leaf: Optional[DataNode]=None) -> None:
         '''This method is used by the new member when joining the group.'''
 
+        # a joining member may not hold any key of an earlier epoch
+        #
+        if any(node.key is not None for node in self.walk_pre_order(self.root)):
+            raise ValueError("A joining member received private keys; the sponsor must send a public copy")
+
         # determine unique member ID and find me in the tree
         #
         self.uid = self.nextmemb-1
+        self.published = (None, None)
         self.find_me()
+        if self.sparse:
+            self.prune_keys()
 
-        # generate keys and send blind key
+        # generate keys (or take the keys generated while the tree was on its way)
         #
-        self.key_generation()
+        if leaf is None:
+            self.key_generation()
+        else:
+            self.my_node.key = leaf.key
+            self.my_node.b_key = leaf.b_key
+            self.my_node.rsa_pub = leaf.rsa_pub
 
         # print the tree
         #
-        self.tree_export()
-        self.tree_print()
+        if self.display:
+            self.tree_export()
+            self.tree_print()
     #
     # end method: new_member_protocol
 
+    # method: blind_root
+    #
+    def blind_root(self) -> None:
+        '''This method blinds the root key so that the tree can be merged under a new parent.'''
+
+        if self.root.key is not None:
+            self.root.gen_blind_key(self.exponent_bits, self.group)
+    #
+    # end method: blind_root
+
+    # method: public_copy
+    #
+    def public_copy(self) -> 'BinaryTree':
+        '''This method returns a copy of the tree that carries blind keys only.'''
+
+        tree = deepcopy(self)
+        tree.published = (None, None)
+        for node in tree.walk_pre_order(tree.root):
+            node.key = None
+        return tree
+    #
+    # end method: public_copy
+
+    # method: merge_insertion
+    #
+    def merge_insertion(self, root: DataNode, height: int) -> Optional[DataNode]:
+        '''This method finds the node where a tree of a given height is merged into the tree under <root>.'''
+
+        # the smaller tree goes to the shallowest (then rightmost) node where it does not
+        # increase the height; None means the trees are joined under a new root
+        #
+        best = None
+        for node in self.walk_pre_order(root):
+            if node.depth+max(node.subtree_height, height)+1 <= root.subtree_height:
+                if best is None or node.depth <= best.depth:
+                    best = node
+        return best
+    #
+    # end method: merge_insertion
+
+    # method: merge_event
+    #
+    def merge_event(self, other: 'BinaryTree', joining: bool=False) -> None:
+        '''This method merges the tree of another group into this tree.'''
+
+        # both trees must derive their keys the same way, or the members would silently disagree
+        #
+        if (other.exponent_bits, other.group) != (self.exponent_bits, self.group):
+            raise ValueError(f"Cannot merge a tree with exponent_bits={other.exponent_bits}, group={other.group} into one with exponent_bits={self.exponent_bits}, group={self.group}")
+
+        # signal that a group is merging
+        #
+        log_event(logging.DEBUG, 'member_event', uid=self.uid, kind='merge', joining=joining)
+
+        # the members of the joining group are numbered after those of the other group
+        #
+        self.blind_root()
+        primary, secondary = (other, self) if joining else (self, other)
+        offset = primary.nextmemb-1
+        for node in secondary.get_leaves():
+            node.mid = node.mid+offset
+        shifted = {mid+offset: epoch for mid, epoch in secondary.sponsored.items()}
+        self.sponsored = {**primary.sponsored, **shifted}
+        if joining:
+            self.uid = self.uid+offset
+        primary.type_assign()
+        secondary.type_assign()
+
+        # hang the smaller tree next to the insertion node (or join both under a new root)
+        #
+        big, small = (primary, secondary) if primary.root.subtree_height >= secondary.root.subtree_height else (secondary, primary)
+        target = self.merge_insertion(big.root, small.root.subtree_height)
+        if target is None:
+            target = big.root
+            target.ntype = 'inter'
+            parent = DataNode.acquire()
+            root = parent
+        else:
+            parent = DataNode.acquire(ntype='inter')
+            upper = target.parent
+            children = list(upper.children)
+            children[children.index(target)] = parent
+            parent.pos = target.pos
+            if target.pos == 'left':
+                upper.lchild = parent
+            else:
+                upper.rchild = parent
+            parent.children = (target, small.root)
+            upper.children = tuple(children)
+            root = big.root
+        small.root.ntype = 'inter'
+        target.pos = 'left'
+        small.root.pos = 'right'
+        parent.children = (target, small.root)
+        parent.lchild, parent.rchild = target, small.root
+
+        # a member next to the insertion point sponsors the new keys
+        #
+        sponsor_node = self.choose_sponsor(target.leaves)
+        sponsor_node.ntype = 'spon'
+        self.root = root
+        self.nextmemb = offset+secondary.nextmemb
+        self.epoch = max(self.epoch, other.epoch)+1
+        self.refresh_path = sponsor_node.get_key_path()
+        self.moved = []
+
+        # refresh the tree
+        #
+        self.tree_refresh()
+    #
+    # end method: merge_event
+
     # method: tree_export
     #
     def tree_export(self) -> None:
@@ -543,14 +1193,18 @@ class BinaryTree:
     # method: tree_print
     #
     def tree_print(self) -> None:
-        '''This method prints the tree to the terminal.'''
+        '''This method logs the tree with key fingerprints (at the debug level).'''
 
-        print(f"\nMEM {self.uid}: Displaying the tree and key information ...")
-        print('')
+        # the tree is only rendered when it will be logged
+        #
+        if not log_enabled(logging.DEBUG):
+            return
+        lines = []
         for pre, _, node in RenderTree(self.root):
             treestr = f'{pre}{node.name}'
-            datastr = f'type: {node.ntype}, ID: {node.mid}, key: {node.key}, b_key: {node.b_key}'
-            print(treestr.ljust(8), datastr)
+            datastr = f'type: {node.ntype}, ID: {node.mid}, key: {fingerprint(node.key)}, b_key: {fingerprint(node.b_key)}'
+            lines.append(f'{treestr.ljust(8)} {datastr}')
+        log_event(logging.DEBUG, 'tree', uid=self.uid, tree='\n'+'\n'.join(lines))
     #
     # end method: tree_print
 
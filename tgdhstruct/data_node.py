@@ -5,11 +5,15 @@
 # import modules
 #
 from __future__ import annotations
-import gc
 from typing import Optional
+from itertools import zip_longest
 from anytree import NodeMixin
 from Crypto.Random.random import randint
 from Crypto.PublicKey import RSA
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+from tgdhstruct.dh_group import MODP_2048, get_group
+from tgdhstruct.event_log import fingerprint
 
 # class: DataNode
 #
@@ -22,9 +26,13 @@ class DataNode(NodeMixin):
     Global Data
     -----------
     int: g
-        The generator for Diffie-Hellman algorithm
+        The generator for Diffie-Hellman algorithm (default group)
     int: p
-        The modulus for Diffie-Hellman algorithm
+        The modulus for Diffie-Hellman algorithm (default group)
+    list: free
+        The released nodes kept for reuse
+    int: max_free
+        The maximum length of the free list (0 disables node reuse)
 
     Attributes
     ----------
@@ -50,6 +58,14 @@ class DataNode(NodeMixin):
         The private key of the node
     b_key: int
         The blind (public) key of the node
+    digest : bytes
+        The fingerprint of the subtree's shape and member IDs (None until recomputed)
+    subtree_size : int
+        The number of leaves in the subtree (kept up to date on every structural change)
+    leaf_depths : tuple[int]
+        The number of leaves at each depth below the node (kept up to date on every structural change)
+    subtree_height : int
+        The height of the subtree
 
     Methods
     -------
@@ -59,7 +75,11 @@ class DataNode(NodeMixin):
         This method determines the name of a node based on the name of its parent.
     gen_private_key(self) -> None
         This method generates a random private key.
-    gen_blind_key(self) -> None
+    derive_exponent(key: int, bits: Optional[int]=None) -> int
+        This method derives the exponent used for a key (short when bits is given).
+    exponent(self, bits: Optional[int]=None) -> int
+        This method returns the exponent used for the key of the node.
+    gen_blind_key(self, bits: Optional[int]=None, group: str='modp2048') -> None
         This method generates the blind key.
     get_key_path(self) -> list[DataNode]
         This method gets the path from the current node up to the root.
@@ -71,10 +91,24 @@ class DataNode(NodeMixin):
         This method tags a node as the insertion node.
     new_memb_assign(self, mid: int) -> None
         This method tags a node as the new member node.
+    acquire(**kwargs) -> DataNode
+        This method returns a node from the free list (or a new node).
+    release(self) -> None
+        This method unlinks the node, drops its key material and keeps it for reuse.
     transfer_data_remove(self, node: DataNode) -> None
         This method transfers data from a specified node and then removes that node.
     make_root(self) -> None
         This method makes the current node the root.
+    adopt(self, lchild: DataNode, rchild: DataNode) -> None
+        This method links two parentless subtrees below a parentless node in one step (for bulk builds).
+    invalidate(self) -> None
+        This method marks the fingerprints of the node and its ancestors for recomputation.
+    update_stats(self) -> None
+        This method updates the subtree sizes and leaf depths of the node and its ancestors.
+    subtree_digest(self) -> bytes
+        This method returns the fingerprint of the subtree's shape and member IDs, recomputing only the invalidated nodes.
+    node_digest(self) -> bytes
+        This method returns the fingerprint of the subtree together with the blind key of the node.
     print_attributes(self) -> None
         This method prints all node attributes.
     '''
@@ -84,15 +118,23 @@ class DataNode(NodeMixin):
     #g = 5
     #p = 23
     g = 2
-    p = 0xFFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DDEF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7EDEE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3BE39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF
+    p = MODP_2048
+
+    # define the free list of released nodes
+    #
+    free = []
+    max_free = 0
 
     # constructor
     #
     def __init__(self, pos: str='NA', l: int=0, v: int=0, parent: Optional[DataNode]=None, ntype: str='root', mid: Optional[int]=None, rchild: Optional[DataNode]=None, lchild: Optional[DataNode]=None) -> None:
         '''This is the constructor.'''
 
-        # tree data
+        # tree data (the fingerprint and statistics are set first, as setting the other fields updates them)
         #
+        self.digest = None
+        self.subtree_size = 1
+        self.leaf_depths = (1,)
         self.pos = pos
         self.l = l
         self.v = v
@@ -111,6 +153,53 @@ class DataNode(NodeMixin):
     #
     # end constructor
 
+    # method: mid
+    #
+    @property
+    def mid(self) -> Optional[int]:
+        '''This method returns the member ID of the node.'''
+
+        return self._mid
+
+    @mid.setter
+    def mid(self, mid: Optional[int]) -> None:
+        '''This method sets the member ID of the node.'''
+
+        self._mid = mid
+        self.invalidate()
+    #
+    # end method: mid
+
+    # method: subtree_height
+    #
+    @property
+    def subtree_height(self) -> int:
+        '''This method returns the height of the subtree.'''
+
+        return len(self.leaf_depths)-1
+    #
+    # end method: subtree_height
+
+    # method: _post_attach
+    #
+    def _post_attach(self, parent: DataNode) -> None:
+        '''This method updates the fingerprints and statistics above a node that was attached to a parent.'''
+
+        parent.invalidate()
+        parent.update_stats()
+    #
+    # end method: _post_attach
+
+    # method: _post_detach
+    #
+    def _post_detach(self, parent: DataNode) -> None:
+        '''This method updates the fingerprints and statistics above a node that was detached from a parent.'''
+
+        parent.invalidate()
+        parent.update_stats()
+    #
+    # end method: _post_detach
+
     # method: get_sibling
     #
     def get_sibling(self) -> DataNode:
@@ -152,12 +241,37 @@ class DataNode(NodeMixin):
     #
     # end method: gen_private_key
 
+    # method: derive_exponent
+    #
+    @staticmethod
+    def derive_exponent(key: int, bits: Optional[int]=None) -> int:
+        '''This method derives the exponent used for a key (short when bits is given).'''
+
+        # the full key is used unless the group runs in short-exponent mode
+        #
+        if bits is None:
+            return key
+        material = key.to_bytes((key.bit_length()+7)//8 or 1, 'big')
+        exponent = int.from_bytes(HKDF(material, bits//8, b'', SHA256, context=b'tgdhstruct exponent'), 'big')
+        return exponent | (1 << (bits-1))
+    #
+    # end method: derive_exponent
+
+    # method: exponent
+    #
+    def exponent(self, bits: Optional[int]=None) -> int:
+        '''This method returns the exponent used for the key of the node.'''
+
+        return DataNode.derive_exponent(self.key, bits)
+    #
+    # end method: exponent
+
     # method: gen_blind_key
     #
-    def gen_blind_key(self) -> None:
+    def gen_blind_key(self, bits: Optional[int]=None, group: str='modp2048') -> None:
         '''This method generates the blind key.'''
 
-        self.b_key = pow(DataNode.g, self.key, DataNode.p)
+        self.b_key = get_group(group).blind(self.exponent(bits))
     #
     # end method: gen_blind_key
 
@@ -214,6 +328,43 @@ class DataNode(NodeMixin):
     #
     # end method: new_memb_assign
 
+    # method: acquire
+    #
+    @classmethod
+    def acquire(cls, **kwargs) -> DataNode:
+        '''This method returns a node from the free list (or a new node).'''
+
+        # trees may be built on several threads, so the list can empty between a check and a pop
+        #
+        try:
+            node = cls.free.pop()
+        except IndexError:
+            return cls(**kwargs)
+        node.__init__(**kwargs)
+        return node
+    #
+    # end method: acquire
+
+    # method: release
+    #
+    def release(self) -> None:
+        '''This method unlinks the node, drops its key material and keeps it for reuse.'''
+
+        # breaking the parent, child and sibling links frees the node by reference counting,
+        # so no cyclic garbage collection is needed
+        #
+        self.parent = None
+        self.children = ()
+        self.lchild = None
+        self.rchild = None
+        self.key = None
+        self.b_key = None
+        self.rsa_pub = None
+        if len(DataNode.free) < DataNode.max_free:
+            DataNode.free.append(self)
+    #
+    # end method: release
+
     # method: transfer_data_remove
     #
     def transfer_data_remove(self, node: DataNode) -> None:
@@ -226,8 +377,7 @@ class DataNode(NodeMixin):
         self.children = node.children
         self.key = node.key
         self.b_key = node.b_key
-        del node
-        gc.collect()
+        node.release()
     #
     # end method: transfer_data_remove
 
@@ -248,6 +398,110 @@ class DataNode(NodeMixin):
     #
     # end method: make_root
 
+    # method: adopt
+    #
+    def adopt(self, lchild: DataNode, rchild: DataNode) -> None:
+        '''This method links two parentless subtrees below a parentless node in one step (for bulk builds).'''
+
+        # the children are complete and the node has no ancestors yet, so the statistics are
+        # combined once here instead of walked up on every attach, and no loop check is needed
+        #
+        lchild.pos = 'left'
+        rchild.pos = 'right'
+        self.lchild = lchild
+        self.rchild = rchild
+        self._NodeMixin__children = [lchild, rchild]
+        lchild._NodeMixin__parent = self
+        rchild._NodeMixin__parent = self
+        self.subtree_size = lchild.subtree_size+rchild.subtree_size
+        self.leaf_depths = (0,)+tuple(left+right for left, right in zip_longest(lchild.leaf_depths, rchild.leaf_depths, fillvalue=0))
+        self.digest = None
+    #
+    # end method: adopt
+
+    # method: invalidate
+    #
+    def invalidate(self) -> None:
+        '''This method marks the fingerprints of the node and its ancestors for recomputation.'''
+
+        # a valid fingerprint implies valid fingerprints below it, so the walk stops at the first
+        # node that is already invalid
+        #
+        node = self
+        while node is not None and node.digest is not None:
+            node.digest = None
+            node = node.parent
+    #
+    # end method: invalidate
+
+    # method: update_stats
+    #
+    def update_stats(self) -> None:
+        '''This method updates the subtree sizes and leaf depths of the node and its ancestors.'''
+
+        # only the path above a structural change is touched, and the walk stops at the first
+        # node whose statistics do not change
+        #
+        node = self
+        while node is not None:
+            size = 1
+            depths = (1,)
+            if node.children:
+                counts = [0]*(1+max(len(child.leaf_depths) for child in node.children))
+                for child in node.children:
+                    for depth, leaves in enumerate(child.leaf_depths, 1):
+                        counts[depth] = counts[depth]+leaves
+                size = sum(child.subtree_size for child in node.children)
+                depths = tuple(counts)
+            if size == node.subtree_size and depths == node.leaf_depths:
+                break
+            node.subtree_size = size
+            node.leaf_depths = depths
+            node = node.parent
+    #
+    # end method: update_stats
+
+    # method: subtree_digest
+    #
+    def subtree_digest(self) -> bytes:
+        '''This method returns the fingerprint of the subtree's shape and member IDs, recomputing only the invalidated nodes.'''
+
+        # collect the invalidated nodes top-down (without recursion, as unbalanced trees can be deep)
+        #
+        stale = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.digest is None:
+                stale.append(node)
+                stack.extend(node.children)
+
+        # hash them bottom-up: member ID and the children's fingerprints
+        #
+        for node in reversed(stale):
+            digest = SHA256.new(b'node' if node.children else b'leaf')
+            digest.update(f'{node.mid};'.encode('ascii'))
+            for child in node.children:
+                digest.update(child.digest)
+            node.digest = digest.digest()
+        return self.digest
+    #
+    # end method: subtree_digest
+
+    # method: node_digest
+    #
+    def node_digest(self) -> bytes:
+        '''This method returns the fingerprint of the subtree together with the blind key of the node.'''
+
+        # the blind key is derived from every key below the node, so it stands in for their blind keys
+        # (which most members do not hold)
+        #
+        digest = SHA256.new(self.subtree_digest())
+        digest.update(f'{self.b_key}'.encode('ascii'))
+        return digest.digest()
+    #
+    # end method: node_digest
+
     # method: print_attributes
     #
     def print_attributes(self) -> None:
@@ -265,8 +519,8 @@ class DataNode(NodeMixin):
             print(f"Node left child: {self.lchild.name}")
         if self.rchild is not None:
             print(f"Node right child: {self.rchild.name}")
-        print(f"Private key: {str(self.key)}")
-        print(f"Blind key: {str(self.b_key)}")
+        print(f"Private key (fingerprint): {fingerprint(self.key)}")
+        print(f"Blind key (fingerprint): {fingerprint(self.b_key)}")
         print("Key path:")
         for node in self.get_key_path():
             print(node.name)
@@ -0,0 +1,268 @@
+# file: dh_group.py
+#
+'''This file contains the Diffie-Hellman group classes along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+from Crypto.PublicKey import ECC
+
+# class: DHGroup
+#
+class DHGroup:
+    '''
+    Description
+    -----------
+    This is the base class for the Diffie-Hellman groups used to compute node keys.
+
+    Group elements are passed around as integers so that blind keys can be sent,
+    printed and stored the same way in every group.
+
+    Attributes
+    ----------
+    name : str
+        The name of the group
+    element_bytes : int
+        The length (in bytes) of an encoded group element
+
+    Methods
+    -------
+    blind(self, exponent: int) -> int
+        This method raises the generator to an exponent.
+    exp(self, element: int, exponent: int) -> int
+        This method raises a group element to an exponent.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, element_bytes: int) -> None:
+        '''This is the constructor.'''
+
+        self.name = name
+        self.element_bytes = element_bytes
+    #
+    # end constructor
+
+    # method: blind
+    #
+    def blind(self, exponent: int) -> int:
+        '''This method raises the generator to an exponent.'''
+
+        raise NotImplementedError
+    #
+    # end method: blind
+
+    # method: exp
+    #
+    def exp(self, element: int, exponent: int) -> int:
+        '''This method raises a group element to an exponent.'''
+
+        raise NotImplementedError
+    #
+    # end method: exp
+#
+# end class: DHGroup
+
+# class: ModpGroup
+#
+class ModpGroup(DHGroup):
+    '''
+    Description
+    -----------
+    This class is a multiplicative group modulo a safe prime (RFC 3526).
+
+    Attributes
+    ----------
+    g : int
+        The generator of the group
+    p : int
+        The modulus of the group
+
+    Methods
+    -------
+    blind(self, exponent: int) -> int
+        This method raises the generator to an exponent.
+    exp(self, element: int, exponent: int) -> int
+        This method raises a group element to an exponent.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, g: int, p: int) -> None:
+        '''This is the constructor.'''
+
+        super().__init__(name, (p.bit_length()+7)//8)
+        self.g = g
+        self.p = p
+    #
+    # end constructor
+
+    # method: blind
+    #
+    def blind(self, exponent: int) -> int:
+        '''This method raises the generator to an exponent.'''
+
+        return pow(self.g, exponent, self.p)
+    #
+    # end method: blind
+
+    # method: exp
+    #
+    def exp(self, element: int, exponent: int) -> int:
+        '''This method raises a group element to an exponent.'''
+
+        return pow(element, exponent, self.p)
+    #
+    # end method: exp
+#
+# end class: ModpGroup
+
+# class: EccGroup
+#
+class EccGroup(DHGroup):
+    '''
+    Description
+    -----------
+    This class is the group of points on a NIST elliptic curve.
+
+    Elements are SEC1 compressed points read as big-endian integers, and exponents
+    are reduced modulo the order of the curve before multiplying.
+
+    Attributes
+    ----------
+    curve : str
+        The name of the curve in pycryptodome
+    order : int
+        The order of the base point
+
+    Methods
+    -------
+    scalar(self, exponent: int) -> int
+        This method reduces an exponent to a non-zero scalar.
+    encode(self, point: ECC.EccPoint) -> int
+        This method encodes a point as an integer.
+    decode(self, element: int) -> ECC.EccPoint
+        This method decodes (and validates) an integer as a point.
+    blind(self, exponent: int) -> int
+        This method multiplies the base point by an exponent.
+    exp(self, element: int, exponent: int) -> int
+        This method multiplies a point by an exponent.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, curve: str, order: int) -> None:
+        '''This is the constructor.'''
+
+        self.curve = curve
+        self.order = order
+        self._generator = ECC.construct(curve=curve, d=1).pointQ
+        super().__init__(name, self._generator.size_in_bytes()+1)
+    #
+    # end constructor
+
+    # method: scalar
+    #
+    def scalar(self, exponent: int) -> int:
+        '''This method reduces an exponent to a non-zero scalar.'''
+
+        return (exponent % self.order) or 1
+    #
+    # end method: scalar
+
+    # method: encode
+    #
+    def encode(self, point: ECC.EccPoint) -> int:
+        '''This method encodes a point as an integer.'''
+
+        key = ECC.construct(curve=self.curve, point_x=point.x, point_y=point.y)
+        return int.from_bytes(key.export_key(format='SEC1', compress=True), 'big')
+    #
+    # end method: encode
+
+    # method: decode
+    #
+    def decode(self, element: int) -> ECC.EccPoint:
+        '''This method decodes (and validates) an integer as a point.'''
+
+        return ECC.import_key(element.to_bytes(self.element_bytes, 'big'), curve_name=self.curve).pointQ
+    #
+    # end method: decode
+
+    # method: blind
+    #
+    def blind(self, exponent: int) -> int:
+        '''This method multiplies the base point by an exponent.'''
+
+        return self.encode(self._generator*self.scalar(exponent))
+    #
+    # end method: blind
+
+    # method: exp
+    #
+    def exp(self, element: int, exponent: int) -> int:
+        '''This method multiplies a point by an exponent.'''
+
+        return self.encode(self.decode(element)*self.scalar(exponent))
+    #
+    # end method: exp
+#
+# end class: EccGroup
+
+# define the RFC 3526 MODP moduli
+#
+MODP_2048 = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DD'
+    'EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F'
+    '83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA0510'
+    '15728E5A8AACAA68FFFFFFFFFFFFFFFF', 16)
+MODP_3072 = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DD'
+    'EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F'
+    '83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA0510'
+    '15728E5A8AAAC42DAD33170D04507A33A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7'
+    'ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864D87602733EC86A64521F2B18177B200C'
+    'BBE117577A615D6C770988C0BAD946E208E24FA074E5AB3143DB5BFCE0FD108E4B82D120A93AD2CAFFFFFFFFFFFFFFFF', 16)
+MODP_4096 = int(
+    'FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A08798E3404DD'
+    'EF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0BFF5CB6F406B7ED'
+    'EE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55D39A69163FA8FD24CF5F'
+    '83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C08CA18217C32905E462E36CE3B'
+    'E39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183995497CEA956AE515D2261898FA0510'
+    '15728E5A8AAAC42DAD33170D04507A33A85521ABDF1CBA64ECFB850458DBEF0A8AEA71575D060C7DB3970F85A6E1E4C7'
+    'ABF5AE8CDB0933D71E8C94E04A25619DCEE3D2261AD2EE6BF12FFA06D98A0864D87602733EC86A64521F2B18177B200C'
+    'BBE117577A615D6C770988C0BAD946E208E24FA074E5AB3143DB5BFCE0FD108E4B82D120A92108011A723C12A787E6D7'
+    '88719A10BDBA5B2699C327186AF4E23C1A946834B6150BDA2583E9CA2AD44CE8DBBBC2DB04DE8EF92E8EFC141FBECAA6'
+    '287C59474E6BC05D99B2964FA090C3A2233BA186515BE7ED1F612970CEE2D7AFB81BDD762170481CD0069127D5B05AA9'
+    '93B4EA988D8FDDC186FFB7DC90A6C08F4DF435C934063199FFFFFFFFFFFFFFFF', 16)
+
+# define the registry of supported groups (trees refer to groups by name so they stay picklable)
+#
+_groups = {}
+_factories = {
+    'modp2048': lambda: ModpGroup('modp2048', 2, MODP_2048),
+    'modp3072': lambda: ModpGroup('modp3072', 2, MODP_3072),
+    'modp4096': lambda: ModpGroup('modp4096', 2, MODP_4096),
+    'p256': lambda: EccGroup('p256', 'P-256', 0xFFFFFFFF00000000FFFFFFFFFFFFFFFFBCE6FAADA7179E84F3B9CAC2FC632551),
+    'p384': lambda: EccGroup('p384', 'P-384', int(
+        'FFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFC7634D81F4372DDF581A0DB248B0A77AECEC196ACCC52973', 16)),
+}
+
+# function: get_group
+#
+def get_group(name: str) -> DHGroup:
+    '''This function returns the group with a given name.'''
+
+    if name not in _groups:
+        if name not in _factories:
+            raise ValueError(f"Unknown group: {name}")
+        _groups[name] = _factories[name]()
+    return _groups[name]
+#
+# end function: get_group
+#
+# end file: dh_group.py
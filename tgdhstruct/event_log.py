@@ -0,0 +1,81 @@
+# file: event_log.py
+#
+'''This file contains the structured event log used by the group protocols.'''
+
+# import modules
+#
+import logging
+from typing import Any, Optional
+from Crypto.Hash import SHA256
+
+# define the logger and the sampling state
+#
+# every protocol message goes through the 'tgdhstruct' logger; nothing is formatted unless
+# the level is enabled, and keys only ever appear as short fingerprints
+#
+LOGGER = logging.getLogger('tgdhstruct')
+SAMPLING = {}
+COUNTS = {}
+
+# function: fingerprint
+#
+def fingerprint(key: Optional[int]) -> str:
+    '''This function returns a short fingerprint of a key that does not reveal the key.'''
+
+    if key is None:
+        return '-'
+    material = int(key).to_bytes((int(key).bit_length()+7)//8 or 1, 'big')
+    return SHA256.new(material).hexdigest()[:12]
+#
+# end function: fingerprint
+
+# function: log_enabled
+#
+def log_enabled(level: int) -> bool:
+    '''This function returns whether events of a level are logged.'''
+
+    return LOGGER.isEnabledFor(level)
+#
+# end function: log_enabled
+
+# function: set_sampling
+#
+def set_sampling(event: str, every: int) -> None:
+    '''This function logs only one in every <every> occurrences of an event (1 logs them all).'''
+
+    if every < 1:
+        raise ValueError(f"Sampling interval must be at least 1: {every}")
+    SAMPLING[event] = every
+    COUNTS[event] = 0
+#
+# end function: set_sampling
+
+# function: log_event
+#
+def log_event(level: int, event: str, /, **fields: Any) -> None:
+    '''This function logs an event with its fields as key=value pairs.'''
+
+    # check the level (and the sample) before anything is formatted
+    #
+    if not LOGGER.isEnabledFor(level):
+        return
+    every = SAMPLING.get(event, 1)
+    if every > 1:
+        count = COUNTS.get(event, 0)
+        COUNTS[event] = count+1
+        if count % every:
+            return
+
+    # big integers are keys, so they are replaced by their fingerprints
+    #
+    pairs = []
+    for name, value in fields.items():
+        if isinstance(value, int) and not isinstance(value, bool) and value.bit_length() > 64:
+            value = fingerprint(value)
+        pairs.append(f'{name}={value}')
+    LOGGER.log(level, ' '.join([event]+pairs), extra={'event': event})
+#
+# end function: log_event
+
+#
+# end file: event_log.py
@@ -0,0 +1,321 @@
+# file: group_cipher.py
+#
+'''This file contains the GroupCipher class.'''
+
+# import modules
+#
+from __future__ import annotations
+import struct
+import threading
+from typing import Any, Iterable, Iterator, Union
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+from Crypto.Random import get_random_bytes
+from tgdhstruct.dh_group import get_group
+
+# define the message layout
+#
+# header: epoch (u64, big-endian), nonce (8 random bytes per cipher and epoch, 4-byte message counter)
+# body: ciphertext, followed by the 16-byte GCM tag
+#
+HEADER = struct.Struct('>Q8sI')
+TAG_SIZE = 16
+OVERHEAD = HEADER.size+TAG_SIZE
+KEPT_EPOCHS = 4
+MAX_MESSAGES = 1 << 32
+Buffer = Union[bytes, bytearray, memoryview]
+
+# class: GroupCipher
+#
+class GroupCipher:
+    '''
+    Description
+    -----------
+    This class encrypts group traffic with AES-GCM keys derived from the group key of a tree.
+
+    Every message carries the epoch of the group key it was sealed with. The AES key of an epoch is
+    derived once with HKDF and cached, and a new epoch is picked up as soon as the tree publishes the
+    group key of a completed join or leave. Messages of the previous epoch still decrypt during the
+    transition. The header is authenticated along with any associated data.
+
+    Attributes
+    ----------
+    tree : BinaryTree
+        The tree (or hierarchical view) whose published group keys are used
+    width : int
+        The width (in bytes) of the group key fed to HKDF
+    keys : dict[int, tuple[int, bytes]]
+        The group key and derived AES key of the most recent epochs
+
+    Methods
+    -------
+    epoch_key(self, epoch: int) -> bytes
+        This method returns the AES key of an epoch, deriving it on first use.
+    next_header(self) -> tuple[bytes, bytes]
+        This method returns the header and nonce of the next message in the current epoch.
+    encrypt(self, data: Buffer, associated_data: Buffer=b'') -> bytes
+        This method encrypts one message.
+    encrypt_into(self, data: Buffer, out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> int
+        This method encrypts one message into a caller-provided buffer and returns its length.
+    decrypt(self, message: Buffer, associated_data: Buffer=b'') -> bytes
+        This method decrypts and verifies one message.
+    decrypt_into(self, message: Buffer, out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> int
+        This method decrypts one message into a caller-provided buffer and returns its length.
+    encrypt_batch(self, messages: Iterable[Buffer], associated_data: Buffer=b'') -> list[bytes]
+        This method encrypts many messages.
+    decrypt_batch(self, messages: Iterable[Buffer], associated_data: Buffer=b'') -> list[bytes]
+        This method decrypts many messages.
+    encrypt_batch_into(self, messages: Iterable[Buffer], out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> list[int]
+        This method encrypts many messages back to back into one caller-provided buffer and returns their lengths.
+    decrypt_batch_into(self, messages: Iterable[Buffer], out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> list[int]
+        This method decrypts many messages back to back into one caller-provided buffer and returns their lengths.
+    encrypt_stream(self, chunks: Iterable[Buffer], associated_data: Buffer=b'') -> Iterator[bytes]
+        This method encrypts a stream of chunks as one message.
+    decrypt_stream(self, chunks: Iterable[Buffer], associated_data: Buffer=b'') -> Iterator[bytes]
+        This method decrypts a stream produced by encrypt_stream.
+    '''
+
+    # constructor
+    #
+    def __init__(self, tree: Any) -> None:
+        '''This is the constructor.'''
+
+        self.tree = tree
+        self.width = get_group(tree.group).element_bytes
+        self.keys = {}
+        self._lock = threading.Lock()
+        self._epoch = None
+        self._prefix = b''
+        self._seq = 0
+    #
+    # end constructor
+
+    # method: epoch_key
+    #
+    def epoch_key(self, epoch: int) -> bytes:
+        '''This method returns the AES key of an epoch, deriving it on first use.'''
+
+        # the tree keeps the group keys of the current and previous epochs
+        #
+        group_key = self.tree.group_key_for(epoch)
+        if group_key is None:
+            raise ValueError(f"No group key is available for epoch {epoch}")
+        entry = self.keys.get(epoch)
+        if entry is not None and entry[0] == group_key:
+            return entry[1]
+
+        # derive the key once per epoch and drop the oldest epochs
+        #
+        context = b'tgdhstruct group cipher'+epoch.to_bytes(8, 'big')
+        key = HKDF(int(group_key).to_bytes(self.width, 'big'), 32, None, SHA256, context=context)
+        with self._lock:
+            self.keys[epoch] = (group_key, key)
+            while len(self.keys) > KEPT_EPOCHS:
+                del self.keys[min(self.keys)]
+        return key
+    #
+    # end method: epoch_key
+
+    # method: next_header
+    #
+    def next_header(self) -> tuple[bytes, bytes]:
+        '''This method returns the header and nonce of the next message in the current epoch.'''
+
+        # a new epoch (or an exhausted counter) starts a fresh random nonce prefix
+        #
+        current = self.tree.current_group_key()
+        if current is None:
+            raise ValueError("The group key has not been computed yet")
+        with self._lock:
+            if current.epoch != self._epoch or self._seq >= MAX_MESSAGES:
+                self._epoch = current.epoch
+                self._prefix = get_random_bytes(8)
+                self._seq = 0
+            epoch, prefix, seq = self._epoch, self._prefix, self._seq
+            self._seq = seq+1
+        header = HEADER.pack(epoch, prefix, seq)
+        return header, header[8:]
+    #
+    # end method: next_header
+
+    # method: _open
+    #
+    def _open(self, message: Buffer, associated_data: Buffer) -> tuple[Any, memoryview, memoryview]:
+        '''This helper method prepares the cipher, ciphertext and tag of a received message.'''
+
+        view = memoryview(message)
+        if len(view) < OVERHEAD:
+            raise ValueError(f"Message is shorter than the {OVERHEAD}-byte header and tag")
+        epoch = HEADER.unpack_from(view, 0)[0]
+        cipher = AES.new(self.epoch_key(epoch), AES.MODE_GCM, nonce=view[8:HEADER.size])
+        cipher.update(view[:HEADER.size])
+        if associated_data:
+            cipher.update(associated_data)
+        return cipher, view[HEADER.size:len(view)-TAG_SIZE], view[len(view)-TAG_SIZE:]
+    #
+    # end method: _open
+
+    # method: encrypt
+    #
+    def encrypt(self, data: Buffer, associated_data: Buffer=b'') -> bytes:
+        '''This method encrypts one message.'''
+
+        out = bytearray(len(data)+OVERHEAD)
+        self.encrypt_into(data, out, associated_data)
+        return bytes(out)
+    #
+    # end method: encrypt
+
+    # method: encrypt_into
+    #
+    def encrypt_into(self, data: Buffer, out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> int:
+        '''This method encrypts one message into a caller-provided buffer and returns its length.'''
+
+        size = len(data)+OVERHEAD
+        view = memoryview(out)
+        if len(view) < size:
+            raise ValueError(f"Output buffer holds {len(view)} bytes, {size} are needed")
+        header, nonce = self.next_header()
+        cipher = AES.new(self.epoch_key(HEADER.unpack(header)[0]), AES.MODE_GCM, nonce=nonce)
+        cipher.update(header)
+        if associated_data:
+            cipher.update(associated_data)
+        view[:HEADER.size] = header
+        cipher.encrypt(data, output=view[HEADER.size:size-TAG_SIZE])
+        view[size-TAG_SIZE:size] = cipher.digest()
+        return size
+    #
+    # end method: encrypt_into
+
+    # method: decrypt
+    #
+    def decrypt(self, message: Buffer, associated_data: Buffer=b'') -> bytes:
+        '''This method decrypts and verifies one message.'''
+
+        out = bytearray(max(len(message)-OVERHEAD, 0))
+        self.decrypt_into(message, out, associated_data)
+        return bytes(out)
+    #
+    # end method: decrypt
+
+    # method: decrypt_into
+    #
+    def decrypt_into(self, message: Buffer, out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> int:
+        '''This method decrypts one message into a caller-provided buffer and returns its length.'''
+
+        cipher, body, tag = self._open(message, associated_data)
+        view = memoryview(out)
+        if len(view) < len(body):
+            raise ValueError(f"Output buffer holds {len(view)} bytes, {len(body)} are needed")
+
+        # the plaintext is written before the tag is checked, so it is wiped if the check fails
+        #
+        cipher.decrypt(body, output=view[:len(body)])
+        try:
+            cipher.verify(tag)
+        except ValueError:
+            view[:len(body)] = bytes(len(body))
+            raise
+        return len(body)
+    #
+    # end method: decrypt_into
+
+    # method: encrypt_batch
+    #
+    def encrypt_batch(self, messages: Iterable[Buffer], associated_data: Buffer=b'') -> list[bytes]:
+        '''This method encrypts many messages.'''
+
+        return [self.encrypt(data, associated_data) for data in messages]
+    #
+    # end method: encrypt_batch
+
+    # method: decrypt_batch
+    #
+    def decrypt_batch(self, messages: Iterable[Buffer], associated_data: Buffer=b'') -> list[bytes]:
+        '''This method decrypts many messages.'''
+
+        return [self.decrypt(message, associated_data) for message in messages]
+    #
+    # end method: decrypt_batch
+
+    # method: encrypt_batch_into
+    #
+    def encrypt_batch_into(self, messages: Iterable[Buffer], out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> list[int]:
+        '''This method encrypts many messages back to back into one caller-provided buffer and returns their lengths.'''
+
+        view = memoryview(out)
+        offset = 0
+        sizes = []
+        for data in messages:
+            size = self.encrypt_into(data, view[offset:], associated_data)
+            sizes.append(size)
+            offset = offset+size
+        return sizes
+    #
+    # end method: encrypt_batch_into
+
+    # method: decrypt_batch_into
+    #
+    def decrypt_batch_into(self, messages: Iterable[Buffer], out: Union[bytearray, memoryview], associated_data: Buffer=b'') -> list[int]:
+        '''This method decrypts many messages back to back into one caller-provided buffer and returns their lengths.'''
+
+        # a message that fails its tag check is wiped by decrypt_into; the messages before it are authentic
+        #
+        view = memoryview(out)
+        offset = 0
+        sizes = []
+        for message in messages:
+            size = self.decrypt_into(message, view[offset:], associated_data)
+            sizes.append(size)
+            offset = offset+size
+        return sizes
+    #
+    # end method: decrypt_batch_into
+
+    # method: encrypt_stream
+    #
+    def encrypt_stream(self, chunks: Iterable[Buffer], associated_data: Buffer=b'') -> Iterator[bytes]:
+        '''This method encrypts a stream of chunks as one message.'''
+
+        header, nonce = self.next_header()
+        cipher = AES.new(self.epoch_key(HEADER.unpack(header)[0]), AES.MODE_GCM, nonce=nonce)
+        cipher.update(header)
+        if associated_data:
+            cipher.update(associated_data)
+        yield header
+        for chunk in chunks:
+            yield cipher.encrypt(chunk)
+        yield cipher.digest()
+    #
+    # end method: encrypt_stream
+
+    # method: decrypt_stream
+    #
+    def decrypt_stream(self, chunks: Iterable[Buffer], associated_data: Buffer=b'') -> Iterator[bytes]:
+        '''This method decrypts a stream produced by encrypt_stream.'''
+
+        # plaintext is released as it arrives, so a consumer must discard it if the final tag check
+        # raises; the last 16 bytes are held back as they may be the tag
+        #
+        pending = bytearray()
+        cipher = None
+        for chunk in chunks:
+            pending += chunk
+            if cipher is None:
+                if len(pending) < HEADER.size:
+                    continue
+                cipher, _, _ = self._open(bytes(pending[:HEADER.size])+bytes(TAG_SIZE), associated_data)
+                del pending[:HEADER.size]
+            if len(pending) > TAG_SIZE:
+                yield cipher.decrypt(bytes(pending[:len(pending)-TAG_SIZE]))
+                del pending[:len(pending)-TAG_SIZE]
+        if cipher is None or len(pending) < TAG_SIZE:
+            raise ValueError("Stream ended before the header and tag")
+        cipher.verify(bytes(pending))
+    #
+    # end method: decrypt_stream
+#
+# end class: GroupCipher
+#
+# end file: group_cipher.py
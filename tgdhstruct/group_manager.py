@@ -0,0 +1,253 @@
+# file: group_manager.py
+#
+'''This file contains the GroupManager class.'''
+
+# import modules
+#
+from __future__ import annotations
+import time
+from collections import deque
+from typing import Any, Optional
+from tgdhstruct.key_engine import ParallelKeyEngine
+from tgdhstruct.member_agent import MemberAgent
+from tgdhstruct.transport import Transport, OsbrainTransport
+
+# class: GroupManager
+#
+class GroupManager:
+    '''
+    Description
+    -----------
+    This class hosts many independent TGDH groups over one transport and one key engine.
+
+    The nameserver (or broker) and the compute pool are started once and shared, so a group
+    only adds the agents and trees of its own members. Setup, join and leave events are queued
+    per group and served round-robin, one event per group per turn, so a busy group cannot
+    starve the others.
+
+    Attributes
+    ----------
+    transport : Transport
+        The transport shared by all groups
+    engine : ParallelKeyEngine
+        The key engine shared by all groups
+    own_engine : bool
+        Whether the engine was created (and is closed) by the manager
+    groups : dict[str, MemberAgent]
+        The groups by name
+    queues : dict[str, deque[tuple]]
+        The pending events of each group
+    stats : dict[str, dict[str, Any]]
+        The metrics of each group
+    turns : deque[str]
+        The round-robin order of the groups
+    defaults : dict[str, Any]
+        The MemberAgent arguments applied to every group
+
+    Methods
+    -------
+    add_group(self, name: str, size: int, **kwargs: Any) -> MemberAgent
+        This method adds a group and queues its initial key exchange.
+    remove_group(self, name: str) -> None
+        This method stops the agents of a group and forgets it.
+    request_join(self, name: str) -> None
+        This method queues a join event for a group.
+    request_leave(self, name: str, eid: int) -> None
+        This method queues a leave event for a group.
+    pending(self) -> int
+        This method returns the number of queued events.
+    run_pending(self, max_events: Optional[int]=None) -> int
+        This method serves queued events round-robin across the groups.
+    run_event(self, name: str, event: tuple) -> None
+        This method runs one event of a group and records its metrics.
+    metrics(self, name: Optional[str]=None) -> dict[str, Any]
+        This method returns the metrics of one group (or of all groups).
+    close(self) -> None
+        This method stops every group, the shared engine and the transport.
+    '''
+
+    # constructor
+    #
+    def __init__(self, transport: Optional[Transport]=None, engine: Optional[ParallelKeyEngine]=None, **defaults: Any) -> None:
+        '''This is the constructor.'''
+
+        # the manager owns (and closes) the engine only if it creates it
+        #
+        self.transport = transport if transport is not None else OsbrainTransport()
+        self.own_engine = engine is None
+        self.engine = engine if engine is not None else ParallelKeyEngine()
+        self.groups = {}
+        self.queues = {}
+        self.stats = {}
+        self.turns = deque()
+        self.defaults = defaults
+
+        # start the shared nameserver (or broker) once for every group
+        #
+        self.transport.start()
+    #
+    # end constructor
+
+    # method: __enter__
+    #
+    def __enter__(self) -> GroupManager:
+        '''This method returns the manager at the start of a with block.'''
+
+        return self
+    #
+    # end method: __enter__
+
+    # method: __exit__
+    #
+    def __exit__(self, *args) -> None:
+        '''This method closes the manager at the end of a with block.'''
+
+        self.close()
+    #
+    # end method: __exit__
+
+    # method: add_group
+    #
+    def add_group(self, name: str, size: int, **kwargs: Any) -> MemberAgent:
+        '''This method adds a group and queues its initial key exchange.'''
+
+        if name in self.groups:
+            raise ValueError(f"Group '{name}' already exists")
+
+        # the group is deployed on the shared transport when its setup event is served
+        #
+        options = {**self.defaults, **kwargs}
+        group = MemberAgent(size, engine=self.engine, transport=self.transport, start=False, name=name, **options)
+        self.groups[name] = group
+        self.queues[name] = deque([('init',)])
+        self.stats[name] = {'members': 0, 'events': {'init': 0, 'join': 0, 'leave': 0},
+                            'rekey_time': 0.0, 'last_rekey': None, 'failures': 0}
+        self.turns.append(name)
+        return group
+    #
+    # end method: add_group
+
+    # method: remove_group
+    #
+    def remove_group(self, name: str) -> None:
+        '''This method stops the agents of a group and forgets it.'''
+
+        self.groups.pop(name).shutdown_agents()
+        del self.queues[name]
+        del self.stats[name]
+        self.turns.remove(name)
+    #
+    # end method: remove_group
+
+    # method: request_join
+    #
+    def request_join(self, name: str) -> None:
+        '''This method queues a join event for a group.'''
+
+        self.queues[name].append(('join',))
+    #
+    # end method: request_join
+
+    # method: request_leave
+    #
+    def request_leave(self, name: str, eid: int) -> None:
+        '''This method queues a leave event for a group.'''
+
+        self.queues[name].append(('leave', eid))
+    #
+    # end method: request_leave
+
+    # method: pending
+    #
+    def pending(self) -> int:
+        '''This method returns the number of queued events.'''
+
+        return sum(len(queue) for queue in self.queues.values())
+    #
+    # end method: pending
+
+    # method: run_pending
+    #
+    def run_pending(self, max_events: Optional[int]=None) -> int:
+        '''This method serves queued events round-robin across the groups.'''
+
+        # each turn serves the oldest event of the next group with work; the order
+        # carries over between calls so that a bounded run stays fair
+        #
+        served = 0
+        while self.pending() and (max_events is None or served < max_events):
+            name = self.turns[0]
+            self.turns.rotate(-1)
+            if self.queues[name]:
+                self.run_event(name, self.queues[name].popleft())
+                served = served+1
+        return served
+    #
+    # end method: run_pending
+
+    # method: run_event
+    #
+    def run_event(self, name: str, event: tuple) -> None:
+        '''This method runs one event of a group and records its metrics.'''
+
+        group = self.groups[name]
+        stats = self.stats[name]
+        start = time.perf_counter()
+        try:
+            if event[0] == 'init':
+                group.initial_key_exchange()
+            elif event[0] == 'join':
+                group.join_protocol()
+            else:
+                group.leave_protocol(event[1])
+        except Exception:
+            stats['failures'] = stats['failures']+1
+            raise
+        finally:
+            elapsed = time.perf_counter()-start
+            stats['rekey_time'] = stats['rekey_time']+elapsed
+            stats['last_rekey'] = elapsed
+        stats['events'][event[0]] = stats['events'][event[0]]+1
+        stats['members'] = len(group.agents)
+    #
+    # end method: run_event
+
+    # method: metrics
+    #
+    def metrics(self, name: Optional[str]=None) -> dict[str, Any]:
+        '''This method returns the metrics of one group (or of all groups).'''
+
+        # function: report
+        #
+        def report(key: str) -> dict[str, Any]:
+            '''This helper function copies the metrics of a group and adds its queue length.'''
+
+            stats = dict(self.stats[key])
+            stats['events'] = dict(stats['events'])
+            stats['pending'] = len(self.queues[key])
+            return stats
+        #
+        # end function: report
+
+        if name is not None:
+            return report(name)
+        return {key: report(key) for key in self.groups}
+    #
+    # end method: metrics
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method stops every group, the shared engine and the transport.'''
+
+        for name in list(self.groups):
+            self.remove_group(name)
+        if self.own_engine:
+            self.engine.close()
+        self.transport.shutdown()
+    #
+    # end method: close
+#
+# end class: GroupManager
+#
+# end file: group_manager.py
@@ -0,0 +1,483 @@
+# file: hierarchical_agent.py
+#
+'''This file contains the SubgroupAgent and HierarchicalAgent classes.'''
+
+# import modules
+#
+from __future__ import annotations
+import logging
+from math import floor, log
+from typing import Any, Optional
+from osbrain import Proxy
+from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.event_log import log_event, log_enabled, fingerprint
+from tgdhstruct.hierarchical_tree import HierarchicalTree
+from tgdhstruct.key_engine import ParallelKeyEngine
+from tgdhstruct.member_agent import MemberAgent
+from tgdhstruct.transport import Transport, OsbrainTransport
+
+# function: receive_top_bkeys
+#
+def receive_top_bkeys(agent: Proxy, message: str) -> None:
+    '''This helper function processes received top-level blind keys.'''
+
+    data = message.split(':')
+    if log_enabled(logging.DEBUG):
+        agent.log_info(f"Received (top): {data[0]}:{fingerprint(int(data[1]))}")
+    newtree = agent.get_data()
+    node = newtree.top.find_node(data[0].lstrip('<').rstrip('>'), False)
+    node.b_key = int(data[1])
+    agent.set_data(newtree)
+#
+# end function: receive_top_bkeys
+
+# class: SubgroupAgent
+#
+class SubgroupAgent(MemberAgent):
+    '''
+    Description
+    -----------
+    This class runs one subgroup of a hierarchical group as a flat TGDH group.
+
+    Attributes
+    ----------
+    sid : int
+        The ID of the subgroup
+    subgroups : int
+        The number of subgroups in the hierarchical group
+    top : BinaryTree
+        The top-level tree copied by a subgroup created after the initial exchange (None otherwise)
+
+    Methods
+    -------
+    make_tree(self, uid: int) -> HierarchicalTree
+        This method creates the initial view of a member of the subgroup.
+    '''
+
+    # constructor
+    #
+    def __init__(self, size: int, sid: int, subgroups: int, top: Optional[BinaryTree]=None, **kwargs: Any) -> None:
+        '''This is the constructor.'''
+
+        self.sid = sid
+        self.subgroups = subgroups
+        self.top = top
+        super().__init__(size, start=False, name=f'sub_{sid}', **kwargs)
+    #
+    # end constructor
+
+    # method: make_tree
+    #
+    def make_tree(self, uid: int) -> HierarchicalTree:
+        '''This method creates the initial view of a member of the subgroup.'''
+
+        return HierarchicalTree(super().make_tree(uid), self.sid, self.subgroups, self.top)
+    #
+    # end method: make_tree
+#
+# end class: SubgroupAgent
+
+# class: HierarchicalAgent
+#
+class HierarchicalAgent:
+    '''
+    Description
+    -----------
+    This class manages a large group as subgroups that each run their own TGDH tree, combined by a
+    small top-level tree over the subgroup keys.
+
+    A join or leave rekeys only the subgroup it happens in; the other members then receive the
+    blind keys of one top-level path and recompute that path, which is about log2 of the number
+    of subgroups in exponentiations. Once every subgroup is full, a joining member starts a new
+    subgroup (a new top-level leaf) with a member moved out of the smallest subgroup, so no
+    subgroup grows past the subgroup size (or three members, whichever is larger).
+
+    Attributes
+    ----------
+    transport : Transport
+        The transport shared by all subgroups
+    subgroups : dict[int, SubgroupAgent]
+        The subgroups by ID
+    members : dict[int, tuple[int, int]]
+        The subgroup ID and subgroup member ID of every member
+    nextmemb : int
+        The member ID of the next member to join the group
+    top_height : int
+        The maximum height of the initial top-level tree
+    subgroup_size : int
+        The number of members a subgroup holds before joining members start a new subgroup
+    options : dict[str, Any]
+        The settings passed to every subgroup
+
+    Methods
+    -------
+    make_subgroup(self, size: int, sid: int, subgroups: int, top: Optional[BinaryTree]=None) -> SubgroupAgent
+        This method creates the agent of a subgroup with the settings of the group.
+    representative(self, sid: int) -> tuple[int, Proxy]
+        This method returns the member that publishes the top-level keys of a subgroup.
+    initial_key_exchange(self) -> None
+        This method runs the initial key exchange of every subgroup and then of the top level.
+    top_key_exchange(self) -> None
+        This method facilitates the initial key exchange of the top-level tree.
+    refresh_top(self, sid: int) -> None
+        This method passes a new subgroup key up to the group key.
+    new_subgroup(self, sid: int) -> int
+        This method starts a new subgroup with a joining member and a member of a full subgroup and returns the joining member's ID.
+    join_protocol(self) -> int
+        This method adds a member to the smallest subgroup (or a new subgroup once all are full) and returns its member ID.
+    move_member(self, uid: int, sid: int) -> None
+        This method moves a member into another subgroup (the member's old subgroup must keep two members).
+    dissolve_subgroup(self, sid: int) -> int
+        This method shuts down a subgroup, removes it from the top-level tree and returns the subgroup that sponsors the refresh.
+    leave_protocol(self, eid: int) -> None
+        This method facilitates a member leaving its subgroup.
+    group_keys(self) -> set[int]
+        This method returns the group keys held by the members.
+    close(self) -> None
+        This method shuts down all subgroups and the transport.
+    '''
+
+    # constructor
+    #
+    def __init__(self, size: int, subgroup_size: int=8, shared_cache: bool=False, engine: Optional[ParallelKeyEngine]=None, exponent_bits: Optional[int]=None, group: str='modp2048', transport: Optional[Transport]=None, display: bool=True, sparse: bool=False, sponsor_policy: str='rightmost', key_region: Optional[str]=None, rebalance: str='none') -> None:
+        '''This is the constructor.'''
+
+        # split the members evenly over at least two subgroups of at least two members
+        #
+        count = max(2, -(-size//subgroup_size))
+        if size < 2*count:
+            raise ValueError(f"A hierarchical group of {size} members needs subgroups of at least two members")
+        sizes = [size//count + (1 if i < size % count else 0) for i in range(count)]
+
+        # define class data
+        #
+        self.transport = transport if transport is not None else OsbrainTransport()
+        self.subgroups = {}
+        self.members = {}
+        self.nextmemb = size+1
+        self.top_height = floor(log(2*count-2, 2))
+        self.subgroup_size = subgroup_size
+        self.options = {'shared_cache': shared_cache, 'engine': engine, 'exponent_bits': exponent_bits,
+                        'group': group, 'display': display, 'sparse': sparse, 'sponsor_policy': sponsor_policy,
+                        'key_region': key_region, 'rebalance': rebalance}
+        uid = 1
+        for sid, sub_size in enumerate(sizes, 1):
+            self.subgroups[sid] = self.make_subgroup(sub_size, sid, count)
+            for local in range(1, sub_size+1):
+                self.members[uid] = (sid, local)
+                uid = uid+1
+
+        # system deployment and tree initialization
+        #
+        self.transport.start()
+        self.initial_key_exchange()
+    #
+    # end constructor
+
+    # method: make_subgroup
+    #
+    def make_subgroup(self, size: int, sid: int, subgroups: int, top: Optional[BinaryTree]=None) -> SubgroupAgent:
+        '''This method creates the agent of a subgroup with the settings of the group.'''
+
+        # local member IDs repeat across subgroups, so every subgroup publishes under its own prefix
+        #
+        options = dict(self.options)
+        if options['key_region'] is not None:
+            options['key_region'] = f"{options['key_region']}_{sid}"
+        return SubgroupAgent(size, sid, subgroups, top=top, transport=self.transport, **options)
+    #
+    # end method: make_subgroup
+
+    # method: representative
+    #
+    def representative(self, sid: int) -> tuple[int, Proxy]:
+        '''This method returns the member that publishes the top-level keys of a subgroup.'''
+
+        # every member of a subgroup holds the same top-level path, so any one of them will do
+        #
+        agents = self.subgroups[sid].agents
+        key = min(agents)
+        return key, agents[key]
+    #
+    # end method: representative
+
+    # method: initial_key_exchange
+    #
+    def initial_key_exchange(self) -> None:
+        '''This method runs the initial key exchange of every subgroup and then of the top level.'''
+
+        for sub in self.subgroups.values():
+            sub.initial_key_exchange()
+        self.top_key_exchange()
+    #
+    # end method: initial_key_exchange
+
+    # method: top_key_exchange
+    #
+    def top_key_exchange(self) -> None:
+        '''This method facilitates the initial key exchange of the top-level tree.'''
+
+        # print a divider
+        #
+        log_event(logging.INFO, 'key_exchange', kind='top')
+
+        # every member takes its subgroup key as the secret of its subgroup's leaf
+        #
+        for sub in self.subgroups.values():
+            sub.broadcast({key: [('link_subgroup_key', ())] for key in sub.agents})
+
+        # pad the top-level paths of the subgroups so that they line up by level
+        #
+        key_paths = {}
+        co_paths = {}
+        views = {}
+        for sid in self.subgroups:
+            views[sid] = self.representative(sid)[1].get_data()
+            key_path = views[sid].top_key_path()
+            co_path = views[sid].top_co_path()
+            co_paths[sid] = [None]*(self.top_height-len(co_path)) + co_path
+            key_paths[sid] = [None]*(self.top_height-len(key_path)+1) + key_path
+        iters = {sid: 0 for sid in self.subgroups}
+
+        # perform the send-receive communication protocol between the subgroups
+        #
+        for i in range(self.top_height):
+
+            # establish publishers (one per subgroup)
+            #
+            addrs = {}
+            for sid in self.subgroups:
+                addrs[sid] = self.representative(sid)[1].bind('PUB', alias=f'top_{sid}')
+
+            # establish subscribers (every member of a subgroup with a proper co-path node)
+            #
+            for sid, sub in self.subgroups.items():
+                dest_name = co_paths[sid][i]
+                if dest_name is not None:
+                    dest_sid = views[sid].top.find_node(dest_name.lstrip('<').rstrip('>'), False).leaves[0].mid
+                    for agent in sub.agents.values():
+                        agent.connect(addrs[dest_sid], handler=receive_top_bkeys)
+
+            # representatives send blind keys for the proper node (once the subscriptions have taken effect)
+            #
+            self.transport.settle()
+            for sid, sub in self.subgroups.items():
+                key_node = key_paths[sid][i]
+                if key_node is not None:
+                    rep = self.representative(sid)[1]
+                    sub.send_info(rep, f'top_{sid}', f'{key_node}:{rep.get_data().top_blind_key(key_node)}')
+
+            # calculate the top-level keys
+            #
+            self.transport.settle()
+            for sid, sub in self.subgroups.items():
+                if co_paths[sid][i] is not None:
+                    sub.broadcast({key: [('initial_calculate_top_key', (iters[sid],))] for key in sub.agents})
+                    iters[sid] = iters[sid]+1
+
+            # close connections to prevent unnecessary sending/receiving
+            #
+            for sub in self.subgroups.values():
+                sub.close_connections()
+            self.transport.settle()
+            log_event(logging.DEBUG, 'level_done', top_level=self.top_height-i)
+
+        log_event(logging.INFO, 'rekey_done', kind='top', members=len(self.members))
+    #
+    # end method: top_key_exchange
+
+    # method: refresh_top
+    #
+    def refresh_top(self, sid: int) -> None:
+        '''This method passes a new subgroup key up to the group key.'''
+
+        # print a divider
+        #
+        log_event(logging.INFO, 'key_exchange', kind='top_refresh')
+
+        # the members of the subgroup refresh their leaf and top-level path
+        #
+        sub = self.subgroups[sid]
+        sub.broadcast({key: [('link_subgroup_key', ()), ('calculate_top_key', ())] for key in sub.agents})
+
+        # the other members subscribe to the representative of the subgroup
+        #
+        rep_id, rep = self.representative(sid)
+        view = rep.get_data()
+        addr = rep.bind('PUB', alias=f'top_{sid}')
+        others = [other for other in self.subgroups.values() if other is not sub]
+        for other in others:
+            for agent in other.agents.values():
+                agent.connect(addr, handler=receive_top_bkeys)
+
+        # the representative sends the blind keys of its top-level path (once the subscriptions have taken effect)
+        #
+        self.transport.settle()
+        for key_node in view.top_key_path()[:-1]:
+            sub.send_info(rep, f'top_{sid}', f'{key_node}:{view.top_blind_key(key_node)}')
+
+        # every other member recomputes its top-level path
+        #
+        self.transport.settle()
+        for other in others:
+            other.broadcast({key: [('calculate_top_key', ())] for key in other.agents})
+        for each in self.subgroups.values():
+            each.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='top_refresh', subgroup=sid, representative=rep_id)
+    #
+    # end method: refresh_top
+
+    # method: new_subgroup
+    #
+    def new_subgroup(self, sid: int) -> int:
+        '''This method starts a new subgroup with a joining member and a member of a full subgroup and returns the joining member's ID.'''
+
+        # every member adds a top-level leaf for the new subgroup
+        #
+        for sub in self.subgroups.values():
+            results = sub.broadcast({key: [('add_subgroup', ())] for key in sub.agents})
+            new_sid = next(iter(results.values()))['returns'][0]
+        log_event(logging.INFO, 'group_event', kind='new_subgroup', subgroup=new_sid)
+
+        # the new subgroup runs its own initial exchange on a copy of the top-level tree; its first
+        # member takes over from a member of the full subgroup, which then leaves that subgroup
+        #
+        top = self.representative(sid)[1].get_data().top
+        new = self.make_subgroup(2, new_sid, len(self.subgroups)+1, top)
+        new.initial_key_exchange()
+        self.subgroups[new_sid] = new
+        moved = next(uid for uid, (member_sid, _) in self.members.items() if member_sid == sid)
+        self.subgroups[sid].leave_protocol(self.members[moved][1])
+        uid = self.nextmemb
+        self.members[moved] = (new_sid, 1)
+        self.members[uid] = (new_sid, 2)
+        self.nextmemb = self.nextmemb+1
+
+        # both subgroups pass their new keys up to the group key
+        #
+        self.refresh_top(new_sid)
+        self.refresh_top(sid)
+        return uid
+    #
+    # end method: new_subgroup
+
+    # method: join_protocol
+    #
+    def join_protocol(self) -> int:
+        '''This method adds a member to the smallest subgroup (or a new subgroup once all are full) and returns its member ID.'''
+
+        # a subgroup gives up a member only if it keeps two, so subgroups of two grow to three first
+        #
+        sid = min(self.subgroups, key=lambda key: (len(self.subgroups[key].agents), key))
+        sub = self.subgroups[sid]
+        if len(sub.agents) >= max(self.subgroup_size, 3):
+            return self.new_subgroup(sid)
+        sub.join_protocol()
+        uid = self.nextmemb
+        self.members[uid] = (sid, sub.new_id)
+        self.nextmemb = self.nextmemb+1
+        self.refresh_top(sid)
+        return uid
+    #
+    # end method: join_protocol
+
+    # method: move_member
+    #
+    def move_member(self, uid: int, sid: int) -> None:
+        '''This method moves a member into another subgroup (the member's old subgroup must keep two members).'''
+
+        # the member joins the other subgroup under a new agent and then leaves its old subgroup;
+        # the top-level keys are refreshed by the caller
+        #
+        old_sid, local = self.members[uid]
+        dest = self.subgroups[sid]
+        dest.join_protocol()
+        self.members[uid] = (sid, dest.new_id)
+        self.subgroups[old_sid].leave_protocol(local)
+    #
+    # end method: move_member
+
+    # method: dissolve_subgroup
+    #
+    def dissolve_subgroup(self, sid: int) -> int:
+        '''This method shuts down a subgroup, removes it from the top-level tree and returns the subgroup that sponsors the refresh.'''
+
+        # the subgroup's agents are stopped before any key is refreshed
+        #
+        self.subgroups.pop(sid).shutdown_agents()
+        self.transport.settle()
+
+        # every remaining member drops the subgroup's top-level leaf; the sibling side sponsors the refresh
+        #
+        sponsors = set()
+        for sub in self.subgroups.values():
+            results = sub.broadcast({key: [('remove_subgroup', (sid,))] for key in sub.agents})
+            sponsors.update(result['returns'][0] for result in results.values())
+        return sponsors.pop()
+    #
+    # end method: dissolve_subgroup
+
+    # method: leave_protocol
+    #
+    def leave_protocol(self, eid: int) -> None:
+        '''This method facilitates a member leaving its subgroup.'''
+
+        sid, local = self.members[eid]
+        sub = self.subgroups[sid]
+        if len(sub.agents) > 2:
+            del self.members[eid]
+            sub.leave_protocol(local)
+            self.refresh_top(sid)
+            return
+
+        # a subgroup cannot drop below two members: with only two subgroups, a member of the other
+        # subgroup moves in; otherwise the subgroup is dissolved and its last member moves into the
+        # subgroup that sponsors the top-level refresh
+        #
+        others = [other for other in self.subgroups if other != sid]
+        if len(others) == 1:
+            donor = others[0]
+            if len(self.subgroups[donor].agents) < 3:
+                raise ValueError("A hierarchical group needs at least four members")
+            moved = next(uid for uid, (member_sid, _) in self.members.items() if member_sid == donor)
+            self.move_member(moved, sid)
+            del self.members[eid]
+            sub.leave_protocol(local)
+            self.refresh_top(sid)
+            self.refresh_top(donor)
+            return
+        del self.members[eid]
+        remaining = next(uid for uid, (member_sid, _) in self.members.items() if member_sid == sid)
+        dest = self.dissolve_subgroup(sid)
+        dest_sub = self.subgroups[dest]
+        dest_sub.join_protocol()
+        self.members[remaining] = (dest, dest_sub.new_id)
+        self.refresh_top(dest)
+    #
+    # end method: leave_protocol
+
+    # method: group_keys
+    #
+    def group_keys(self) -> set[int]:
+        '''This method returns the group keys held by the members.'''
+
+        return {agent.get_data().group_key() for sub in self.subgroups.values() for agent in sub.agents.values()}
+    #
+    # end method: group_keys
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method shuts down all subgroups and the transport.'''
+
+        log_event(logging.INFO, 'close')
+        for sub in self.subgroups.values():
+            sub.shutdown_agents()
+        self.transport.shutdown()
+    #
+    # end method: close
+#
+# end class: HierarchicalAgent
+#
+# end file: hierarchical_agent.py
@@ -0,0 +1,246 @@
+# file: hierarchical_tree.py
+#
+'''This file contains the HierarchicalTree class.'''
+
+# import modules
+#
+from __future__ import annotations
+from typing import Any, Optional
+from tgdhstruct.binary_tree import BinaryTree, GroupKey
+from tgdhstruct.dh_group import get_group
+from tgdhstruct.key_region import get_region, region_path
+
+# class: HierarchicalTree
+#
+class HierarchicalTree:
+    '''
+    Description
+    -----------
+    This class is a member's view of a hierarchical group: the tree of its own subgroup and a
+    small top-level tree whose leaves are the subgroups.
+
+    The root key of the subgroup tree is the secret of the subgroup's leaf in the top-level tree,
+    and the root key of the top-level tree is the group key. Any attribute that is not defined here
+    is taken from the subgroup tree, so the flat TGDH protocols run unchanged on the subgroup.
+    A key region, if the subgroup tree has one, receives the group key instead of the subgroup key.
+
+    Attributes
+    ----------
+    sub : BinaryTree
+        The tree of the member's subgroup
+    top : BinaryTree
+        The top-level tree (member IDs are subgroup IDs)
+    sid : int
+        The ID of the member's subgroup
+    key_region : str
+        The path prefix of the memory-mapped regions the group key is published to (None to disable)
+
+    Methods
+    -------
+    public_copy(self) -> HierarchicalTree
+        This method returns a copy of the view that carries blind keys only.
+    link_subgroup_key(self) -> None
+        This method makes the subgroup key the secret of the subgroup's top-level leaf.
+    initial_calculate_top_key(self, max_iters: int) -> None
+        This method calculates the top-level keys iteratively.
+    calculate_top_key(self) -> None
+        This method calculates the top-level keys (and so the group key).
+    publish_top_key(self) -> None
+        This method writes the group key to the member's key region.
+    add_subgroup(self) -> int
+        This method adds a top-level leaf for a new subgroup and returns the new subgroup's ID.
+    top_key_path(self) -> list[str]
+        This method returns the names of the nodes on the subgroup's top-level key path.
+    top_co_path(self) -> list[str]
+        This method returns the names of the nodes on the subgroup's top-level co-path.
+    top_blind_key(self, name: str) -> int
+        This method returns the blind key of a top-level node.
+    remove_subgroup(self, sid: int) -> int
+        This method removes a dissolved subgroup from the top-level tree and returns the subgroup that sponsors the refresh.
+    group_key(self) -> int
+        This method returns the group key.
+    current_group_key(self) -> Optional[GroupKey]
+        This method returns the current group key without waiting for a rekey in progress.
+    group_key_for(self, epoch: int) -> Optional[int]
+        This method returns the published group key of the current or previous top-level epoch.
+    '''
+
+    # constructor
+    #
+    def __init__(self, sub: BinaryTree, sid: int, subgroups: int, top: Optional[BinaryTree]=None) -> None:
+        '''This is the constructor.'''
+
+        # the subgroup tree would publish the subgroup key, so the view publishes in its place
+        #
+        self.sub = sub
+        self.sid = sid
+        self.key_region = sub.key_region
+        sub.key_region = None
+
+        # a subgroup created after the initial exchange takes a copy of the existing top-level tree
+        #
+        if top is None:
+            self.top = BinaryTree(subgroups, sid, display=False, exponent_bits=sub.exponent_bits, group=sub.group)
+        else:
+            self.top = top.public_copy()
+            self.top.uid = sid
+            self.top.tree_refresh()
+    #
+    # end constructor
+
+    # method: __getattr__
+    #
+    def __getattr__(self, name: str) -> Any:
+        '''This method takes unknown attributes from the subgroup tree.'''
+
+        if name.startswith('__') or name in ('sub', 'top', 'sid', 'key_region'):
+            raise AttributeError(name)
+        return getattr(self.sub, name)
+    #
+    # end method: __getattr__
+
+    # method: __copy__
+    #
+    def __copy__(self) -> HierarchicalTree:
+        '''This method copies the view with all secret keys removed.'''
+
+        return self.public_copy()
+    #
+    # end method: __copy__
+
+    # method: public_copy
+    #
+    def public_copy(self) -> HierarchicalTree:
+        '''This method returns a copy of the view that carries blind keys only.'''
+
+        # a copy is what a sponsor hands to a joining member, which may not learn earlier keys
+        #
+        view = HierarchicalTree.__new__(HierarchicalTree)
+        view.sub = self.sub.public_copy()
+        view.sid = self.sid
+        view.key_region = self.key_region
+        view.top = self.top.public_copy()
+        return view
+    #
+    # end method: public_copy
+
+    # method: link_subgroup_key
+    #
+    def link_subgroup_key(self) -> None:
+        '''This method makes the subgroup key the secret of the subgroup's top-level leaf.'''
+
+        self.top.my_node.key = self.sub.root.key
+        self.top.my_node.gen_blind_key(self.top.exponent_bits, self.top.group)
+    #
+    # end method: link_subgroup_key
+
+    # method: initial_calculate_top_key
+    #
+    def initial_calculate_top_key(self, max_iters: int) -> None:
+        '''This method calculates the top-level keys iteratively.'''
+
+        self.top.initial_calculate_group_key(max_iters)
+        self.publish_top_key()
+    #
+    # end method: initial_calculate_top_key
+
+    # method: calculate_top_key
+    #
+    def calculate_top_key(self) -> None:
+        '''This method calculates the top-level keys (and so the group key).'''
+
+        # the top-level tree sees no events of its own, so every refresh of its path starts an epoch
+        #
+        self.top.epoch = self.top.epoch+1
+        self.top.calculate_group_key()
+        self.publish_top_key()
+    #
+    # end method: calculate_top_key
+
+    # method: publish_top_key
+    #
+    def publish_top_key(self) -> None:
+        '''This method writes the group key to the member's key region.'''
+
+        if self.key_region is not None and self.top.root.key is not None:
+            region = get_region(region_path(self.key_region, self.sub.uid), get_group(self.top.group).element_bytes)
+            region.write(self.top.epoch, self.top.root.key)
+    #
+    # end method: publish_top_key
+
+    # method: add_subgroup
+    #
+    def add_subgroup(self) -> int:
+        '''This method adds a top-level leaf for a new subgroup and returns the new subgroup's ID.'''
+
+        return self.top.join_event()
+    #
+    # end method: add_subgroup
+
+    # method: top_key_path
+    #
+    def top_key_path(self) -> list[str]:
+        '''This method returns the names of the nodes on the subgroup's top-level key path.'''
+
+        return [node.name for node in self.top.my_node.get_key_path()]
+    #
+    # end method: top_key_path
+
+    # method: top_co_path
+    #
+    def top_co_path(self) -> list[str]:
+        '''This method returns the names of the nodes on the subgroup's top-level co-path.'''
+
+        return [node.name for node in self.top.my_node.get_co_path()]
+    #
+    # end method: top_co_path
+
+    # method: top_blind_key
+    #
+    def top_blind_key(self, name: str) -> int:
+        '''This method returns the blind key of a top-level node.'''
+
+        return self.top.find_node(name.lstrip('<').rstrip('>'), False).b_key
+    #
+    # end method: top_blind_key
+
+    # method: remove_subgroup
+    #
+    def remove_subgroup(self, sid: int) -> int:
+        '''This method removes a dissolved subgroup from the top-level tree and returns the subgroup that sponsors the refresh.'''
+
+        self.top.leave_event(sid)
+        return next(node.mid for node in self.top.get_leaves() if node.ntype == 'spon')
+    #
+    # end method: remove_subgroup
+
+    # method: group_key
+    #
+    def group_key(self) -> int:
+        '''This method returns the group key.'''
+
+        return self.top.root.key
+    #
+    # end method: group_key
+
+    # method: current_group_key
+    #
+    def current_group_key(self) -> Optional[GroupKey]:
+        '''This method returns the current group key without waiting for a rekey in progress.'''
+
+        return self.top.current_group_key()
+    #
+    # end method: current_group_key
+
+    # method: group_key_for
+    #
+    def group_key_for(self, epoch: int) -> Optional[int]:
+        '''This method returns the published group key of the current or previous top-level epoch.'''
+
+        return self.top.group_key_for(epoch)
+    #
+    # end method: group_key_for
+#
+# end class: HierarchicalTree
+#
+# end file: hierarchical_tree.py
@@ -0,0 +1,140 @@
+# file: key_cache.py
+#
+'''This file contains the NodeKeyCache class along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+import threading
+from typing import Optional
+
+# define the process-wide cache registry (trees refer to caches by name so they stay picklable)
+#
+_caches = {}
+_registry_lock = threading.Lock()
+
+# function: get_cache
+#
+def get_cache(name: str) -> NodeKeyCache:
+    '''This function returns the shared cache with a given name, creating it if needed.'''
+
+    with _registry_lock:
+        if name not in _caches:
+            _caches[name] = NodeKeyCache(name)
+        return _caches[name]
+#
+# end function: get_cache
+
+# function: drop_cache
+#
+def drop_cache(name: str) -> None:
+    '''This function discards the shared cache with a given name.'''
+
+    with _registry_lock:
+        cache = _caches.pop(name, None)
+    if cache is not None:
+        cache.clear()
+#
+# end function: drop_cache
+
+# class: NodeKeyCache
+#
+class NodeKeyCache:
+    '''
+    Description
+    -----------
+    This class stores internal node keys so that members in the same process compute each one only once.
+
+    Every member below an internal node derives the same key for it within a group event,
+    so the first member to compute a node publishes the result and the others reuse it.
+    The cache holds secret key material and must only be shared between members of one group.
+
+    The registry is per process: members only share a cache when they run in the same process,
+    i.e. on the in-process transport or on a shared host agent (members_per_host > 1). With one
+    process per member (osbrain, pipe and ZeroMQ transports) every member gets its own cache.
+
+    Attributes
+    ----------
+    name : str
+        The name of the cache (normally one per group)
+    epochs : int
+        The number of most recent epochs that are kept
+    entries : dict[tuple[str, int], tuple[int, Optional[int]]]
+        The (key, blind key) pairs stored by (node name, epoch)
+    hits : int
+        The number of lookups served from the cache
+    misses : int
+        The number of lookups that had to be computed
+
+    Methods
+    -------
+    lookup(self, name: str, epoch: int) -> Optional[tuple[int, Optional[int]]]
+        This method returns the cached key and blind key of a node.
+    store(self, name: str, epoch: int, key: int, b_key: Optional[int]) -> None
+        This method stores the key and blind key of a node.
+    clear(self) -> None
+        This method removes all entries from the cache.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, epochs: int=2) -> None:
+        '''This is the constructor.'''
+
+        self.name = name
+        self.epochs = epochs
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._latest = -1
+        self._lock = threading.Lock()
+    #
+    # end constructor
+
+    # method: lookup
+    #
+    def lookup(self, name: str, epoch: int) -> Optional[tuple[int, Optional[int]]]:
+        '''This method returns the cached key and blind key of a node.'''
+
+        with self._lock:
+            entry = self.entries.get((name, epoch))
+            if entry is None:
+                self.misses = self.misses+1
+            else:
+                self.hits = self.hits+1
+        return entry
+    #
+    # end method: lookup
+
+    # method: store
+    #
+    def store(self, name: str, epoch: int, key: int, b_key: Optional[int]) -> None:
+        '''This method stores the key and blind key of a node.'''
+
+        with self._lock:
+            self.entries.setdefault((name, epoch), (key, b_key))
+
+            # drop the entries of epochs that no member can still be computing
+            #
+            if epoch > self._latest:
+                self._latest = epoch
+                stale = [entry for entry in self.entries if entry[1] <= epoch-self.epochs]
+                for entry in stale:
+                    del self.entries[entry]
+    #
+    # end method: store
+
+    # method: clear
+    #
+    def clear(self) -> None:
+        '''This method removes all entries from the cache.'''
+
+        with self._lock:
+            self.entries.clear()
+            self._latest = -1
+    #
+    # end method: clear
+#
+# end class: NodeKeyCache
+#
+# end file: key_cache.py
@@ -0,0 +1,180 @@
+# file: key_engine.py
+#
+'''This file contains the ParallelKeyEngine class along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+import os
+from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from tgdhstruct.data_node import DataNode
+from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.key_cache import get_cache
+from tgdhstruct.dh_group import get_group
+
+# function: exponentiate
+#
+def exponentiate(task: tuple[int, int, bool, Optional[int], str]) -> tuple[int, Optional[int]]:
+    '''This function computes a node key and (optionally) its blind key in a worker process.'''
+
+    b_key, exponent, blind, bits, group = task
+    dh = get_group(group)
+    node_key = dh.exp(b_key, exponent)
+    if blind:
+        return node_key, dh.blind(DataNode.derive_exponent(node_key, bits))
+    return node_key, None
+#
+# end function: exponentiate
+
+# class: ParallelKeyEngine
+#
+class ParallelKeyEngine:
+    '''
+    Description
+    -----------
+    This class computes the path keys of many trees at once using a pool of worker processes.
+
+    The trees are processed one level at a time from the deepest level up; all exponentiations
+    at a level are independent, so they are deduplicated and farmed out to the pool together.
+
+    Attributes
+    ----------
+    workers : int
+        The number of worker processes
+    chunksize : int
+        The number of tasks sent to a worker at once
+    executor : ProcessPoolExecutor
+        The worker pool (created on first use)
+
+    Methods
+    -------
+    close(self) -> None
+        This method shuts down the worker pool.
+    run_tasks(self, tasks: list[tuple[int, int, bool, Optional[int], str]]) -> list[tuple[int, Optional[int]]]
+        This method computes a list of exponentiation tasks.
+    calculate_group_keys(self, trees: list[BinaryTree]) -> None
+        This method calculates the group key of every tree.
+    initial_calculate_group_keys(self, trees: list[BinaryTree], max_iters: list[int]) -> None
+        This method calculates the first max_iters+1 path keys of every tree.
+    '''
+
+    # constructor
+    #
+    def __init__(self, workers: Optional[int]=None, chunksize: int=1) -> None:
+        '''This is the constructor.'''
+
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunksize = chunksize
+        self.executor = None
+    #
+    # end constructor
+
+    # method: __enter__
+    #
+    def __enter__(self) -> ParallelKeyEngine:
+        '''This method allows the engine to be used as a context manager.'''
+
+        return self
+    #
+    # end method: __enter__
+
+    # method: __exit__
+    #
+    def __exit__(self, *args) -> None:
+        '''This method shuts down the engine at the end of a with block.'''
+
+        self.close()
+    #
+    # end method: __exit__
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method shuts down the worker pool.'''
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+    #
+    # end method: close
+
+    # method: run_tasks
+    #
+    def run_tasks(self, tasks: list[tuple[int, int, bool, Optional[int], str]]) -> list[tuple[int, Optional[int]]]:
+        '''This method computes a list of exponentiation tasks.'''
+
+        # a single task (or a single worker) is not worth the round trip to the pool
+        #
+        if len(tasks) <= 1 or self.workers <= 1:
+            return [exponentiate(task) for task in tasks]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self.executor.map(exponentiate, tasks, chunksize=self.chunksize))
+    #
+    # end method: run_tasks
+
+    # method: calculate_group_keys
+    #
+    def calculate_group_keys(self, trees: list[BinaryTree]) -> None:
+        '''This method calculates the group key of every tree.'''
+
+        self.initial_calculate_group_keys(trees, [None]*len(trees))
+    #
+    # end method: calculate_group_keys
+
+    # method: initial_calculate_group_keys
+    #
+    def initial_calculate_group_keys(self, trees: list[BinaryTree], max_iters: list[Optional[int]]) -> None:
+        '''This method calculates the first max_iters+1 path keys of every tree.'''
+
+        # collect the key path and co-path of every tree (None computes the whole path)
+        #
+        states = []
+        for tree, iters in zip(trees, max_iters):
+            key_path = tree.my_node.get_key_path()
+            co_path = tree.my_node.get_co_path()
+            limit = len(co_path) if iters is None else min(len(co_path), iters+1)
+            states.append([tree, key_path, co_path, 0, limit])
+        if not states:
+            return
+        depth = max(state[1][0].l for state in states)
+
+        # compute level by level, from the deepest parent up to the root
+        #
+        for level in reversed(range(depth)):
+            pending = []
+            tasks = {}
+            for state in states:
+                tree, key_path, co_path, step, limit = state
+                if step >= limit or key_path[step+1].l != level:
+                    continue
+                state[3] = step+1
+                parent = key_path[step+1]
+                cache = get_cache(tree.key_cache) if tree.key_cache is not None else None
+                entry = cache.lookup(parent.name, tree.epoch) if cache is not None else None
+                if entry is not None:
+                    parent.key, parent.b_key = entry
+                    continue
+                task = (int(co_path[step].b_key), key_path[step].exponent(tree.exponent_bits),
+                        parent.ntype != 'root', tree.exponent_bits, tree.group)
+                tasks.setdefault(task, None)
+                pending.append((tree, parent, cache, task))
+
+            # members on the same side of a node share the task, so each is computed once
+            #
+            unique = list(tasks)
+            for task, result in zip(unique, self.run_tasks(unique)):
+                tasks[task] = result
+            for tree, parent, cache, task in pending:
+                parent.key, parent.b_key = tasks[task]
+                if cache is not None:
+                    cache.store(parent.name, tree.epoch, parent.key, parent.b_key)
+        for state in states:
+            state[0].publish_group_key()
+    #
+    # end method: initial_calculate_group_keys
+#
+# end class: ParallelKeyEngine
+#
+# end file: key_engine.py
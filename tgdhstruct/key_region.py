@@ -0,0 +1,190 @@
+# file: key_region.py
+#
+'''This file contains the KeyRegion class along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+import os
+import mmap
+import time
+import struct
+import threading
+from typing import Optional
+
+# define the region layout
+#
+# header: magic, format version, key width (bytes), padding
+# body: sequence number (odd while a write is in progress), epoch, key (fixed width, big-endian)
+#
+MAGIC = b'TGDHKEY\0'
+VERSION = 1
+HEADER = struct.Struct('<8sHHI')
+BODY = struct.Struct('<QQ')
+SEQ_OFFSET = HEADER.size
+KEY_OFFSET = HEADER.size+BODY.size
+
+# define the process-wide region registry (trees refer to regions by path so they stay picklable)
+#
+_regions = {}
+_registry_lock = threading.Lock()
+
+# function: region_path
+#
+def region_path(prefix: str, uid: int) -> str:
+    '''This function returns the path of the region a member publishes its group key to.'''
+
+    return f'{prefix}_{uid}.key'
+#
+# end function: region_path
+
+# function: get_region
+#
+def get_region(path: str, width: int) -> KeyRegion:
+    '''This function returns the writable region at a path, creating it if needed.'''
+
+    with _registry_lock:
+        if path not in _regions:
+            _regions[path] = KeyRegion(path, width)
+        return _regions[path]
+#
+# end function: get_region
+
+# function: drop_region
+#
+def drop_region(path: str) -> None:
+    '''This function closes the region at a path (if this process writes it) and removes the file.'''
+
+    with _registry_lock:
+        region = _regions.pop(path, None)
+    if region is not None:
+        region.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+#
+# end function: drop_region
+
+# function: open_region
+#
+def open_region(path: str) -> KeyRegion:
+    '''This function maps an existing region for reading.'''
+
+    return KeyRegion(path)
+#
+# end function: open_region
+
+# class: KeyRegion
+#
+class KeyRegion:
+    '''
+    Description
+    -----------
+    This class is a memory-mapped file holding a member's current group key and epoch.
+
+    The member writes each finished group key into the region, and consumer processes on the same
+    host read it without calling the member's agent. Writes are guarded by a sequence lock: the
+    writer makes the sequence number odd, writes the epoch and key, and makes it even again, and a
+    reader retries until it sees the same even number before and after its read. The file is
+    created with owner-only permissions, as it holds the group key.
+
+    Attributes
+    ----------
+    path : str
+        The path of the region file
+    width : int
+        The width (in bytes) of the key
+    writable : bool
+        Whether this process writes the region
+
+    Methods
+    -------
+    write(self, epoch: int, key: int) -> None
+        This method publishes a group key and its epoch.
+    read(self) -> Optional[tuple[int, int]]
+        This method returns the latest epoch and group key (None if nothing was published yet).
+    close(self) -> None
+        This method unmaps the region.
+    '''
+
+    # constructor
+    #
+    def __init__(self, path: str, width: Optional[int]=None) -> None:
+        '''This is the constructor.'''
+
+        self.path = path
+        self.writable = width is not None
+
+        # the writer prepares the file next to the destination and moves it into place, so a
+        # reader never maps a region without a header
+        #
+        if self.writable:
+            temp = f'{path}.tmp'
+            fd = os.open(temp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, HEADER.pack(MAGIC, VERSION, width, 0)+bytes(BODY.size+width))
+            finally:
+                os.close(fd)
+            os.replace(temp, path)
+
+        # map the region and check the header
+        #
+        with open(path, 'r+b' if self.writable else 'rb') as file:
+            access = mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ
+            self._map = mmap.mmap(file.fileno(), 0, access=access)
+        magic, version, self.width, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"Not a group key region: {path}")
+    #
+    # end constructor
+
+    # method: write
+    #
+    def write(self, epoch: int, key: int) -> None:
+        '''This method publishes a group key and its epoch.'''
+
+        if not self.writable:
+            raise PermissionError(f"Region is mapped read-only: {self.path}")
+        seq = struct.unpack_from('<Q', self._map, SEQ_OFFSET)[0]
+        struct.pack_into('<Q', self._map, SEQ_OFFSET, seq+1)
+        struct.pack_into('<Q', self._map, SEQ_OFFSET+8, epoch)
+        self._map[KEY_OFFSET:KEY_OFFSET+self.width] = int(key).to_bytes(self.width, 'big')
+        struct.pack_into('<Q', self._map, SEQ_OFFSET, seq+2)
+    #
+    # end method: write
+
+    # method: read
+    #
+    def read(self) -> Optional[tuple[int, int]]:
+        '''This method returns the latest epoch and group key (None if nothing was published yet).'''
+
+        # retry while a write is in progress or one finished between the two sequence reads
+        #
+        while True:
+            seq, epoch = BODY.unpack_from(self._map, SEQ_OFFSET)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            key = self._map[KEY_OFFSET:KEY_OFFSET+self.width]
+            if struct.unpack_from('<Q', self._map, SEQ_OFFSET)[0] == seq:
+                break
+        if seq == 0:
+            return None
+        return epoch, int.from_bytes(key, 'big')
+    #
+    # end method: read
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method unmaps the region.'''
+
+        self._map.close()
+    #
+    # end method: close
+#
+# end class: KeyRegion
+#
+# end file: key_region.py
@@ -4,21 +4,29 @@
 
 # import modules
 #
-import time
+import uuid
+import glob
+import logging
+from typing import Any, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from math import floor, log
-from copy import copy
-from osbrain import run_nameserver
-from osbrain import run_agent
-from osbrain import Proxy, NSProxy, AgentAddress
+from osbrain import Proxy, AgentAddress
 from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.event_log import log_event, log_enabled, fingerprint
+from tgdhstruct.key_cache import drop_cache
+from tgdhstruct.key_region import drop_region, region_path
+from tgdhstruct.key_engine import ParallelKeyEngine
+from tgdhstruct.member_host import MemberHandle, HOST_METHODS, run_tree_calls, new_leaf
+from tgdhstruct.transport import Transport, OsbrainTransport
 
 # function: receive_bkeys
 #
 def receive_bkeys(agent: Proxy, message: str) -> None:
     '''This helper function processes received blind keys.'''
 
-    agent.log_info(f"Received: {message}")
     data = message.split(':')
+    if log_enabled(logging.DEBUG):
+        agent.log_info(f"Received: {data[0]}:{fingerprint(int(data[1]))}")
     newtree = agent.get_data()
     node = newtree.find_node(data[0].lstrip('<').rstrip('>'), False)
     node.b_key = int(data[1])
@@ -26,15 +34,55 @@ def receive_bkeys(agent: Proxy, message: str) -> None:
 #
 # end function: receive_bkeys
 
-# function: receive_tree
+# function: receive_merge
 #
-def receive_tree(agent: Proxy, tree: BinaryTree) -> None:
-    '''This helper function processes received tree object.'''
+def receive_merge(agent: Proxy, packet: tuple[BinaryTree, bool]) -> None:
+    '''This helper function merges a received group tree into the agent's tree.'''
 
-    agent.log_info("Tree received!")
+    if log_enabled(logging.DEBUG):
+        agent.log_info("Merge tree received!")
+    newtree = agent.get_data()
+    newtree.merge_event(*packet)
+    agent.set_data(newtree)
+#
+# end function: receive_merge
+
+# function: receive_join_tree
+#
+def receive_join_tree(agent: Proxy, tree: BinaryTree) -> None:
+    '''This helper function places a joining member (with its pregenerated keys) in the received tree.'''
+
+    if log_enabled(logging.DEBUG):
+        agent.log_info("Tree received!")
+    tree.new_member_protocol(agent.get_data())
+    tree.calculate_group_key()
+    tree.tree_print()
     agent.set_data(tree)
 #
-# end function: receive_tree
+# end function: receive_join_tree
+
+# function: receive_join_bkey
+#
+def receive_join_bkey(agent: Proxy, message: str) -> None:
+    '''This helper function lets the sponsor recompute its path as soon as the joining member's blind key arrives.'''
+
+    receive_bkeys(agent, message)
+    newtree = agent.get_data()
+    newtree.calculate_group_key()
+    newtree.tree_print()
+    agent.set_data(newtree)
+#
+# end function: receive_join_bkey
+
+# function: generate_leaf
+#
+def generate_leaf(self, exponent_bits: Optional[int], group: str) -> int:
+    '''This helper function generates the key pair of a joining member and returns its blind key.'''
+
+    self.data = new_leaf(exponent_bits, group)
+    return self.data.b_key
+#
+# end function: generate_leaf
 
 # function: set_data
 #
@@ -54,6 +102,46 @@ def get_data(self) -> BinaryTree:
 #
 # end function: set_data
 
+# function: run_calls
+#
+def run_calls(self, calls: list[tuple[str, tuple]]) -> dict[str, Any]:
+    '''This helper function runs a sequence of tree methods inside the agent.'''
+
+    return run_tree_calls(self.data, calls)
+#
+# end function: run_calls
+
+# class: BroadcastError
+#
+class BroadcastError(Exception):
+    '''
+    Description
+    -----------
+    This class is raised when a broadcast request fails on one or more agents.
+
+    Attributes
+    ----------
+    errors : dict[int, Exception]
+        The error raised for each failed member
+    results : dict[int, dict[str, Any]]
+        The results of the members that succeeded
+    '''
+
+    # constructor
+    #
+    def __init__(self, errors: dict[int, Exception], results: dict[int, dict[str, Any]]) -> None:
+        '''This is the constructor.'''
+
+        self.errors = errors
+        self.results = results
+        failed = '; '.join(f"{key}: {type(err).__name__}: {(str(err).splitlines() or [''])[0]}"
+                           for key, err in sorted(errors.items()))
+        super().__init__(f"Broadcast failed on {len(errors)} member(s): {failed}")
+    #
+    # end constructor
+#
+# end class: BroadcastError
+
 # class: MemberAgent
 #
 class MemberAgent():
@@ -82,8 +170,37 @@ class MemberAgent():
         The member ID of the sponsor
     new_id = None
         The member ID of the new member
-    nameserver : NSProxy
-        The running nameserver
+    transport : Transport
+        The transport used to run the agents and deliver their messages
+    display : bool
+        Whether the members' trees are exported and printed after each event
+    key_cache : str
+        The name of the node key cache shared by the members (None if disabled); only members that
+        share a process (in-process transport or a host agent) share its entries
+    engine : ParallelKeyEngine
+        The engine used to compute the members' keys in parallel (None computes them serially)
+    exponent_bits : int
+        The group parameter for the length of the exponents derived from node keys (None uses the full keys)
+    group : str
+        The name of the Diffie-Hellman group used by the members
+    members_per_host : int
+        The number of logical members hosted by each agent process
+    hosts : list[Proxy]
+        The host agents (only used when members_per_host is greater than 1)
+    max_concurrency : int
+        The maximum number of agents a broadcast talks to at once
+    name : str
+        The name of the group, used to keep its agent names apart on a shared transport
+    sparse : bool
+        Whether the members keep key material only for their key paths and co-paths
+    sponsor_policy : str
+        How the members pick a sponsor among the valid members: rightmost, least_recent, random
+    merged : list[MemberAgent]
+        The groups merged into this group (their transports are shut down with this group's)
+    key_region : str
+        The path prefix of the memory-mapped regions the members publish the group key to (None to disable)
+    rebalance : str
+        The rebalancing policy of the members' trees: none, lazy, eager
 
     Methods
     -------
@@ -91,23 +208,75 @@ class MemberAgent():
         This method sends information to a publishing channel.
     close_connections(self) -> None:
         This method closes all agent connections.
+    agent_name(self, base: str) -> str:
+        This method returns the transport-wide name of one of the group's agents.
+    spawn_member(self, uid: int) -> Union[Proxy, MemberHandle]:
+        This method starts the agent of a member (or places the member on a host agent).
+    make_tree(self, uid: int) -> BinaryTree:
+        This method creates the initial tree of a member.
+    broadcast(self, calls: dict[int, list[tuple[str, tuple]]]) -> dict[int, dict[str, Any]]:
+        This method runs tree methods on many members at once and collects the results.
+    calculate_keys(self, members: list[int], max_iters: Optional[list[int]]=None) -> None:
+        This method calculates the path keys of a set of members.
+    spawn_members(self, uids: list[int]) -> dict[int, Union[Proxy, MemberHandle]]:
+        This method starts the agents of several members one after another.
+    exchange_paths(self, trees: dict[int, BinaryTree]) -> tuple[dict[int, list[Optional[str]]], dict[int, list[Optional[str]]]]:
+        This method returns the key paths and co-paths of the members, padded so that they line up by level.
+    co_path_source(tree: BinaryTree, name: str) -> int:
+        This method returns the member that publishes the blind key of a co-path node in the initial exchange.
+    blind_key_message(tree: BinaryTree, name: str) -> str:
+        This method returns the message that publishes the blind key of a node.
+    find_subscribers(self, update_paths: dict[int, Optional[Iterable[str]]], names: set[str], sender: int) -> list[int]:
+        This method returns the members (other than the sender) whose update paths contain any of the nodes.
+    set_sponsor(self, results: dict[int, dict[str, Any]]) -> None:
+        This method records the sponsor reported by the broadcast of a group event.
+    remove_members(self, eids: list[int]) -> None:
+        This method forgets the agents of departed members and removes their group key regions.
+    check_partition(self, eids: list[int]) -> list[int]:
+        This method checks the departing members of a partition and returns them without repeats.
+    fresh_names(results: dict[int, dict[str, Any]], sponsors: list[int], published: set[str]) -> dict[int, list[str]]:
+        This method returns the nodes each sponsor computed that are not published yet and marks them published.
+    check_merge(self, other: MemberAgent) -> None:
+        This method checks that another group can be merged into this group.
+    adopt_members(self, other: MemberAgent, offset: int) -> None:
+        This method takes over the agents of a merged group, numbered after the members of this group.
     initial_key_exchange(self) -> None:
         This method facilitates the initial key exchange algorithmically.
+    sponsor_exchange(self, excluded: tuple[int, ...], skip: int, last: int) -> None:
+        This method lets the sponsor publish the refreshed blind keys of its key path.
     join_key_exchange(self) -> None:
         This method facilitates the key exchange for a join event algorithmically.
+    moved_key_exchange(self, update_paths: dict[int, Optional[Iterable[str]]]) -> None:
+        This method lets the sponsor resend the blind keys of the co-path subtrees its rebalancing moved.
+    prepare_joining_member(self) -> int:
+        This method generates the joining member's key pair, subscribes it to the sponsor and returns its blind key.
     join_protocol(self) -> None:
         This method facilitates a new member joining the group.
-    leave_key_exchange(self):
-        This method the key exchange for a leave event algorithmically.
+    leave_key_exchange(self, event: str='leave') -> None:
+        This method facilitates the key exchange for a leave (or merge) event algorithmically.
     leave_protocol(self, eid: int):
         This method facilitates a member leaving the group.
+    partition_key_exchange(self, sponsors: list[int], update_paths: dict[int, set[str]]) -> None:
+        This method facilitates the key exchange for a partition event algorithmically.
+    partition_protocol(self, eids: list[int]) -> None:
+        This method facilitates several members leaving the group at once.
+    merge_protocol(self, other: MemberAgent) -> None:
+        This method merges another group into this group.
+    fingerprints(self) -> dict[int, str]:
+        This method returns the tree fingerprint of every member.
+    find_divergence(self, a: int, b: int) -> Optional[str]:
+        This method returns the deepest node on the shared key path of two members where their trees disagree (None if they agree).
+    drop_regions(self) -> None:
+        This method removes the group key regions of the group's members.
+    shutdown_agents(self) -> None:
+        This method stops the agents of the group and leaves the transport running.
     close(self) -> None:
-        This method shuts down the nameserver.
+        This method shuts down the transport.
     '''
 
     # constructor
     #
-    def __init__(self, size: int) -> None:
+    def __init__(self, size: int, shared_cache: bool=False, engine: Optional[ParallelKeyEngine]=None, exponent_bits: Optional[int]=None, group: str='modp2048', members_per_host: int=1, max_concurrency: int=8, transport: Optional[Transport]=None, display: bool=True, start: bool=True, name: str='', sparse: bool=False, sponsor_policy: str='rightmost', key_region: Optional[str]=None, rebalance: str='none') -> None:
         '''This is the constructor.'''
 
         # define class data
@@ -121,14 +290,33 @@ class MemberAgent():
         self.new_memb = None
         self.spon_id = None
         self.new_id = None
-
-        # system deployment
+        self.key_cache = f'group-{uuid.uuid4().hex}' if shared_cache else None
+        self.engine = engine
+        self.exponent_bits = exponent_bits
+        self.group = group
+        self.members_per_host = members_per_host
+        self.hosts = []
+        self.max_concurrency = max_concurrency
+        self.transport = transport if transport is not None else OsbrainTransport()
+        self.display = display
+        self.name = name
+        self.sparse = sparse
+        self.sponsor_policy = sponsor_policy
+        self.merged = []
+        self.key_region = key_region
+        self.rebalance = rebalance
+
+        # the cache registry is per process, so it is only shared by members that share a process
         #
-        self.nameserver = run_nameserver()
+        if shared_cache and engine is None and members_per_host == 1 and not self.transport.in_process:
+            log_event(logging.WARNING, 'cache_not_shared', transport=type(self.transport).__name__,
+                      reason='one process per member')
 
-        # initialize the tree
+        # system deployment and tree initialization (deferred when start is False)
         #
-        self.initial_key_exchange()
+        if start:
+            self.transport.start()
+            self.initial_key_exchange()
     #
     # end constructor
 
@@ -151,6 +339,277 @@ class MemberAgent():
     #
     # end method: close_connections
 
+    # method: agent_name
+    #
+    def agent_name(self, base: str) -> str:
+        '''This method returns the transport-wide name of one of the group's agents.'''
+
+        return f'{self.name}_{base}' if self.name else base
+    #
+    # end method: agent_name
+
+    # method: spawn_member
+    #
+    def spawn_member(self, uid: int) -> Union[Proxy, MemberHandle]:
+        '''This method starts the agent of a member (or places the member on a host agent).'''
+
+        # every member gets its own agent unless members are hosted
+        #
+        if self.members_per_host <= 1:
+            return self.transport.spawn(self.agent_name(f'mem_{uid}'), (set_data, get_data, run_calls, generate_leaf))
+
+        # place the member on the first host with room, starting a new host if they are full
+        #
+        for hid, host in enumerate(self.hosts):
+            if host.host_size() < self.members_per_host:
+                return MemberHandle(host, hid, uid)
+        hid = len(self.hosts)
+        host = self.transport.spawn(self.agent_name(f'host_{hid}'), HOST_METHODS)
+        host.host_init(hid)
+        self.hosts.append(host)
+        return MemberHandle(host, hid, uid)
+    #
+    # end method: spawn_member
+
+    # method: make_tree
+    #
+    def make_tree(self, uid: int) -> BinaryTree:
+        '''This method creates the initial tree of a member.'''
+
+        return BinaryTree(self.size, uid, display=self.display, key_cache=self.key_cache,
+                          exponent_bits=self.exponent_bits, group=self.group, sparse=self.sparse,
+                          sponsor_policy=self.sponsor_policy, key_region=self.key_region,
+                          rebalance=self.rebalance)
+    #
+    # end method: make_tree
+
+    # method: broadcast
+    #
+    def broadcast(self, calls: dict[int, list[tuple[str, tuple]]]) -> dict[int, dict[str, Any]]:
+        '''This method runs tree methods on many members at once and collects the results.'''
+
+        if not calls:
+            return {}
+
+        # members that share a host agent are served one after another by the same worker
+        #
+        batches = {}
+        for key in calls:
+            agent = self.agents[key]
+            owner = agent.host if isinstance(agent, MemberHandle) else agent
+            batches.setdefault(id(owner), []).append(key)
+
+        # function: run_batch
+        #
+        def run_batch(keys: list[int]) -> dict[int, Any]:
+            '''This helper function runs the requests of the members behind one agent.'''
+
+            out = {}
+            for key in keys:
+                try:
+                    out[key] = self.agents[key].run_calls(calls[key])
+                except Exception as err:
+                    out[key] = err
+            return out
+        #
+        # end function: run_batch
+
+        # send the requests with bounded concurrency and report every failed member
+        #
+        results = {}
+        errors = {}
+        workers = max(1, min(self.max_concurrency, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for out in executor.map(run_batch, batches.values()):
+                for key, value in out.items():
+                    if isinstance(value, Exception):
+                        errors[key] = value
+                    else:
+                        results[key] = value
+        if errors:
+            raise BroadcastError(errors, results)
+        return results
+    #
+    # end method: broadcast
+
+    # method: calculate_keys
+    #
+    def calculate_keys(self, members: list[int], max_iters: Optional[list[int]]=None) -> None:
+        '''This method calculates the path keys of a set of members.'''
+
+        # without an engine every agent computes its own keys, all at once
+        #
+        if self.engine is None:
+            if max_iters is None:
+                calls = {key: [('calculate_group_key', ()), ('tree_print', ())] for key in members}
+            else:
+                calls = {key: [('initial_calculate_group_key', (iters,)), ('tree_print', ())]
+                         for key, iters in zip(members, max_iters)}
+            self.broadcast(calls)
+            return
+
+        # gather the trees so that the engine can batch each level across members
+        #
+        trees = [self.agents[key].get_data() for key in members]
+        if max_iters is None:
+            self.engine.calculate_group_keys(trees)
+        else:
+            self.engine.initial_calculate_group_keys(trees, max_iters)
+
+        # return the updated trees to the agents
+        #
+        for key, tree in zip(members, trees):
+            self.agents[key].set_data(tree)
+            tree.tree_print()
+    #
+    # end method: calculate_keys
+
+    # method: spawn_members
+    #
+    def spawn_members(self, uids: list[int]) -> dict[int, Union[Proxy, MemberHandle]]:
+        '''This method starts the agents of several members one after another.'''
+
+        return {uid: self.spawn_member(uid) for uid in uids}
+    #
+    # end method: spawn_members
+
+    # method: exchange_paths
+    #
+    def exchange_paths(self, trees: dict[int, BinaryTree]) -> tuple[dict[int, list[Optional[str]]], dict[int, list[Optional[str]]]]:
+        '''This method returns the key paths and co-paths of the members, padded so that they line up by level.'''
+
+        key_paths = {}
+        co_paths = {}
+        for uid, tree in trees.items():
+            key_path = [node.name for node in tree.my_node.get_key_path()]
+            co_path = [node.name for node in tree.my_node.get_co_path()]
+            co_paths[uid] = [None]*(self.max_height-len(co_path)) + co_path
+            key_paths[uid] = [None]*(self.max_height-len(key_path)+1) + key_path
+        return key_paths, co_paths
+    #
+    # end method: exchange_paths
+
+    # method: co_path_source
+    #
+    @staticmethod
+    def co_path_source(tree: BinaryTree, name: str) -> int:
+        '''This method returns the member that publishes the blind key of a co-path node in the initial exchange.'''
+
+        return tree.find_node(name.strip('<>'), False).leaves[0].mid
+    #
+    # end method: co_path_source
+
+    # method: blind_key_message
+    #
+    @staticmethod
+    def blind_key_message(tree: BinaryTree, name: str) -> str:
+        '''This method returns the message that publishes the blind key of a node.'''
+
+        return f'{name}:{tree.find_node(name.strip("<>"), False).b_key}'
+    #
+    # end method: blind_key_message
+
+    # method: find_subscribers
+    #
+    def find_subscribers(self, update_paths: dict[int, Optional[Iterable[str]]], names: set[str], sender: int) -> list[int]:
+        '''This method returns the members (other than the sender) whose update paths contain any of the nodes.'''
+
+        return [key for key, path in update_paths.items()
+                if key != sender and path is not None and not names.isdisjoint(path)]
+    #
+    # end method: find_subscribers
+
+    # method: set_sponsor
+    #
+    def set_sponsor(self, results: dict[int, dict[str, Any]]) -> None:
+        '''This method records the sponsor reported by the broadcast of a group event.'''
+
+        for key, result in results.items():
+            if result['ntype'] == 'spon':
+                self.sponsor = self.agents[key]
+                self.spon_id = key
+    #
+    # end method: set_sponsor
+
+    # method: remove_members
+    #
+    def remove_members(self, eids: list[int]) -> None:
+        '''This method forgets the agents of departed members and removes their group key regions.'''
+
+        for eid in eids:
+            del self.agents[eid]
+            self.addr.pop(eid, None)
+            if self.key_region is not None:
+                drop_region(region_path(self.key_region, eid))
+    #
+    # end method: remove_members
+
+    # method: check_partition
+    #
+    def check_partition(self, eids: list[int]) -> list[int]:
+        '''This method checks the departing members of a partition and returns them without repeats.'''
+
+        eids = list(dict.fromkeys(eids))
+        unknown = [eid for eid in eids if eid not in self.agents]
+        if unknown:
+            raise ValueError(f"Members {unknown} are not in the group")
+        if len(self.agents)-len(eids) < 2:
+            raise ValueError("A partition must leave at least two members in the group")
+        return eids
+    #
+    # end method: check_partition
+
+    # method: fresh_names
+    #
+    @staticmethod
+    def fresh_names(results: dict[int, dict[str, Any]], sponsors: list[int], published: set[str]) -> dict[int, list[str]]:
+        '''This method returns the nodes each sponsor computed that are not published yet and marks them published.'''
+
+        fresh = {}
+        for key in sponsors:
+            names = [name for name in results[key]['returns'][0] if name not in published]
+            published.update(names)
+            if names:
+                fresh[key] = names
+        return fresh
+    #
+    # end method: fresh_names
+
+    # method: check_merge
+    #
+    def check_merge(self, other: 'MemberAgent') -> None:
+        '''This method checks that another group can be merged into this group.'''
+
+        # the two groups must be able to reach each other's agents and derive keys the same way
+        #
+        if self.hosts or other.hosts:
+            raise ValueError("Groups with hosted members cannot be merged")
+        if other.transport is self.transport:
+            if other.name == self.name:
+                raise ValueError("Groups sharing a transport need different names to be merged")
+        elif not (isinstance(self.transport, OsbrainTransport) and isinstance(other.transport, OsbrainTransport)):
+            raise ValueError("Only groups on the same transport (or on osbrain) can be merged")
+        if (other.exponent_bits, other.group) != (self.exponent_bits, self.group):
+            raise ValueError("Groups with different exponent lengths or Diffie-Hellman groups cannot be merged")
+    #
+    # end method: check_merge
+
+    # method: adopt_members
+    #
+    def adopt_members(self, other: 'MemberAgent', offset: int) -> None:
+        '''This method takes over the agents of a merged group, numbered after the members of this group.'''
+
+        for key, agent in other.agents.items():
+            self.agents[key+offset] = agent
+        for key, addr in other.addr.items():
+            self.addr[key+offset] = addr
+        other.agents = {}
+        other.addr = {}
+        if other.transport is not self.transport:
+            self.merged.append(other)
+    #
+    # end method: adopt_members
+
     # method: initial_key_exchange
     #
     def initial_key_exchange(self) -> None:
@@ -158,35 +617,17 @@ class MemberAgent():
 
         # print a divider
         #
-        print(f"\n{'Key Exchange (Init)'.center(80, '=')}")
-
-        # initialize all agents with their trees and co-paths
-        #
-        key_paths = []
-        co_paths = []
-        iters = [0]*self.size
-        for i in range(self.size):
-            mem = f'mem_{i+1}'
-            self.agents[i+1] = run_agent(mem)
-            self.agents[i+1].set_method(set_data, get_data)
-            self.agents[i+1].set_data(BinaryTree(self.size, i+1))
-            temp_key_path = []
-            for node in self.agents[i+1].get_data().my_node.get_key_path():
-                temp_key_path.append(node.name)
-            key_paths.append(temp_key_path)
-            temp_co_path = []
-            for node in self.agents[i+1].get_data().my_node.get_co_path():
-                temp_co_path.append(node.name)
-            co_paths.append(temp_co_path)
-
-        # pad the co-path lists to account for co-paths of varying lengths
-        #
-        for i in range(self.size):
-            if len(co_paths[i]) < self.max_height:
-                co_padding = [None]*(self.max_height-len(co_paths[i]))
-                key_padding = [None]*(self.max_height-len(key_paths[i])+1)
-                co_paths[i] = co_padding + co_paths[i]
-                key_paths[i] = key_padding + key_paths[i]
+        log_event(logging.INFO, 'key_exchange', kind='init')
+
+        # initialize all agents with their trees; pad the paths to account for co-paths of varying lengths
+        #
+        uids = list(range(1, self.size+1))
+        self.agents = self.spawn_members(uids)
+        trees = {uid: self.make_tree(uid) for uid in uids}
+        for uid in uids:
+            self.agents[uid].set_data(trees[uid])
+        key_paths, co_paths = self.exchange_paths(trees)
+        iters = {uid: 0 for uid in uids}
 
         # perform the send-receive communication protocol
         #
@@ -196,39 +637,28 @@ class MemberAgent():
             #
             self.addr = {}
             for key, agent in self.agents.items():
-                mem = f'mem_{key}'
-                self.addr[key] = agent.bind('PUB', alias=mem)
+                self.addr[key] = agent.bind('PUB', alias=f'mem_{key}')
 
             # establish subscribers (proper co-path member)
             #
-            for key, agent in self.agents.items():
-                dest_name = co_paths[key-1][i]
-                if dest_name is not None:
-                    dest_node = agent.get_data().find_node(dest_name.lstrip('<').rstrip('>'), False)
-                    dest_mem = dest_node.leaves[0].mid
-                    agent.connect(self.addr[dest_mem], handler=receive_bkeys)
+            subscribers = [uid for uid in uids if co_paths[uid][i] is not None]
+            for uid in subscribers:
+                source = self.co_path_source(trees[uid], co_paths[uid][i])
+                self.agents[uid].connect(self.addr[source], handler=receive_bkeys)
 
             # send blind keys for the proper node
             #
-            print('')
-            for key, agent in self.agents.items():
-                mem = f'mem_{key}'
-                key_node = key_paths[key-1][i]
-                if key_node is not None:
-                    blind_key = agent.get_data().find_node(key_node.lstrip('<').rstrip('>'), False).b_key
-                    message = f'{key_node}:{blind_key}'
-                    self.send_info(agent, mem, message)
+            for uid in uids:
+                if key_paths[uid][i] is not None:
+                    agent = self.agents[uid]
+                    self.send_info(agent, f'mem_{uid}', self.blind_key_message(agent.get_data(), key_paths[uid][i]))
 
             # calculate appropriate blind keys
             #
-            time.sleep(1)
-            for key, agent in self.agents.items():
-                if co_paths[key-1][i] is not None:
-                    newtree = agent.get_data()
-                    newtree.initial_calculate_group_key(iters[key-1])
-                    iters[key-1] = iters[key-1]+1
-                    agent.set_data(newtree)
-                    agent.get_data().tree_print()
+            self.transport.settle()
+            self.calculate_keys(subscribers, [iters[uid] for uid in subscribers])
+            for uid in subscribers:
+                iters[uid] = iters[uid]+1
 
             # close connections to prevent unnecessary sending/receiving
             #
@@ -236,302 +666,425 @@ class MemberAgent():
 
             # increment the level
             #
-            time.sleep(1)
-            print(f"\nSYS: Level {self.max_height-i} finished -- keys exchanged!")
+            self.transport.settle()
+            log_event(logging.DEBUG, 'level_done', level=self.max_height-i)
 
-        print("\nSYS: Tree initialization completed!")
-        print("SYS: All initial members have computed the group key.")
+        log_event(logging.INFO, 'rekey_done', kind='init', members=len(self.agents))
     #
     # end method: initial_key_exchange
 
-    # method: join_key_exchange
+    # method: sponsor_exchange
     #
-    def join_key_exchange(self) -> None:
-        '''This method facilitates the key exchange for a join event algorithmically.'''
-
-        # print a divider
-        #
-        print(f"\n{'Key Exchange (Join)'.center(80, '=')}")
-
-        # get the update paths of all members
-        #
-        update_paths = {}
-        for key, agent in self.agents.items():
-            if key not in (self.spon_id, self.new_id):
-                temp_update_path = []
-                for node in agent.get_data().get_update_path():
-                    temp_update_path.append(node.name)
-                update_paths[key] = list(reversed(temp_update_path))
-            else:
-                update_paths[key] = None
+    def sponsor_exchange(self, excluded: tuple[int, ...], skip: int, last: int) -> None:
+        '''This method lets the sponsor publish the refreshed blind keys of its key path.'''
 
-        # get the sponsor's key path
+        # get the update paths of all other members and the sponsor's key path
         #
-        spon_key_path = []
-        for node in self.sponsor.get_data().my_node.get_key_path():
-            spon_key_path.append(node.name)
+        results = self.broadcast({key: [('get_update_path', ())] for key in self.agents if key not in excluded})
+        update_paths = {key: result['returns'][0] for key, result in results.items()}
+        sponsor_tree = self.sponsor.get_data()
+        spon_key_path = [node.name for node in sponsor_tree.my_node.get_key_path()]
+        mem = f'mem_{self.spon_id}'
 
-        for i in range(len(spon_key_path)-2):
+        for i in range(len(spon_key_path)-last):
 
-            # only the sponsor will publish
+            # only the sponsor will publish; members that need the node subscribe
             #
-            mem = f'mem_{self.spon_id}'
             self.addr[self.spon_id] = self.sponsor.bind('PUB', alias=mem)
+            key_node = spon_key_path[i+skip]
+            for key in self.find_subscribers(update_paths, {key_node}, self.spon_id):
+                self.agents[key].connect(self.addr[self.spon_id], handler=receive_bkeys)
 
-            # establish subscribers (sponsor will publish)
+            # sponsor sends the blind key; let it arrive, then close connections to prevent unnecessary sending/receiving
             #
-            key_node = spon_key_path[i+1]
-            for key, agent in self.agents.items():
-                if update_paths[key] is not None:
-                    if key_node in update_paths[key]:
-                        dest_name = key_node
-                        if dest_name is not None:
-                            agent.connect(self.addr[self.spon_id], handler=receive_bkeys)
+            self.send_info(self.sponsor, mem, self.blind_key_message(sponsor_tree, key_node))
+            self.transport.settle()
+            self.close_connections()
+            log_event(logging.DEBUG, 'level_done', level=sponsor_tree.my_node.l-i-skip)
+        self.moved_key_exchange(update_paths)
+    #
+    # end method: sponsor_exchange
 
-            # sponsor sends appropriate blind keys
-            #
-            blind_key = self.sponsor.get_data().find_node(key_node.lstrip('<').rstrip('>'), False).b_key
-            message = f'{key_node}:{blind_key}'
-            print('')
-            self.send_info(self.sponsor, mem, message)
+    # method: join_key_exchange
+    #
+    def join_key_exchange(self) -> None:
+        '''This method facilitates the key exchange for a join event algorithmically.'''
 
-            # close connections to prevent unnecessary sending/receiving
-            #
-            self.close_connections()
+        # the sponsor and the joining member already share the key of their parent node
+        #
+        log_event(logging.INFO, 'key_exchange', kind='join')
+        self.sponsor_exchange((self.spon_id, self.new_id), 1, 2)
+    #
+    # end method: join_key_exchange
 
-            # increment the level
-            #
-            time.sleep(1)
-            print(f"\nSYS: Level {self.sponsor.get_data().my_node.l-i-1} finished -- keys exchanged!")
+    # method: moved_key_exchange
+    #
+    def moved_key_exchange(self, update_paths: dict[int, Optional[Iterable[str]]]) -> None:
+        '''This method lets the sponsor resend the blind keys of the co-path subtrees its rebalancing moved.'''
+
+        # only members whose co-path gained a moved subtree subscribe
+        #
+        view = self.sponsor.get_data()
+        subscribers = self.find_subscribers(update_paths, {node.name for node in view.moved}, self.spon_id)
+        if not subscribers:
+            return
+        mem = f'mem_{self.spon_id}'
+        self.addr[self.spon_id] = self.sponsor.bind('PUB', alias=mem)
+        for key in subscribers:
+            self.agents[key].connect(self.addr[self.spon_id], handler=receive_bkeys)
+
+        # the sponsor sends the blind keys, lets them arrive and closes connections
         #
-        # end method: join_key_exchange
+        for node in view.moved:
+            self.send_info(self.sponsor, mem, f'{node.name}:{node.b_key}')
+        self.transport.settle()
+        self.close_connections()
+    #
+    # end method: moved_key_exchange
+
+    # method: prepare_joining_member
+    #
+    def prepare_joining_member(self) -> int:
+        '''This method generates the joining member's key pair, subscribes it to the sponsor and returns its blind key.'''
+
+        b_key = self.new_memb.generate_leaf(self.exponent_bits, self.group)
+        self.new_memb.connect(self.addr[self.spon_id], handler=receive_join_tree)
+        return b_key
+    #
+    # end method: prepare_joining_member
 
     # method: join_protocol
     #
     def join_protocol(self) -> None:
         '''This method facilitates a new member joining the group.'''
 
-        print(f"\n{'Join Event'.center(80, '=')}")
+        log_event(logging.INFO, 'group_event', kind='join')
 
         # alert current members that a new member is joining; find the sponsor
         #
-        for key, agent in self.agents.items():
-            newtree = agent.get_data()
-            newtree.join_event()
-            agent.set_data(newtree)
-            if agent.get_data().my_node.ntype == 'spon':
-                self.sponsor = agent
+        results = self.broadcast({key: [('join_event', ())] for key in self.agents})
+        self.new_id = next(iter(results.values()))['returns'][0]
+        self.set_sponsor(results)
 
-        # initialize the joining member
+        # start the joining member (before any helper thread runs, so a forking transport never
+        # forks mid-call) and bind the publishers; the sponsor subscribes to the joining member
         #
-        self.new_id = self.sponsor.get_data().nextmemb-1
-        mem = f'mem_{self.new_id}'
-        self.agents[self.new_id] = run_agent(mem)
+        self.agents[self.new_id] = self.spawn_member(self.new_id)
         self.new_memb = self.agents[self.new_id]
-        self.new_memb.set_method(set_data, get_data)
-        self.new_memb.set_data(None)
-
-        # joining member subscribes to the sponsor
+        mem = f'mem_{self.spon_id}'
+        new_mem = f'mem_{self.new_id}'
+        self.addr[self.spon_id] = self.sponsor.bind('PUB', alias=mem)
+        self.addr[self.new_id] = self.new_memb.bind('PUB', alias=new_mem)
+        self.sponsor.connect(self.addr[self.new_id], handler=receive_join_bkey)
+
+        # the joining member generates its key pair and then subscribes to the sponsor (so the tree
+        # never arrives before its leaf) while the sponsor's tree is fetched and stripped to its
+        # blind keys; the joining member cannot learn any earlier key
         #
-        mem = f'mem_{self.sponsor.get_data().uid}'
-        self.addr[self.sponsor.get_data().uid] = self.sponsor.bind('PUB', alias=mem)
-        dest_mem = self.sponsor.get_data().uid
-        self.new_memb.connect(self.addr[dest_mem], handler=receive_tree)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self.prepare_joining_member)
+            stree = self.sponsor.get_data().public_copy()
+            message = f'{stree.find_node(self.new_id, True).name}:{pending.result()}'
 
-        # sponsor sends the tree to the joining member
+        # the tree goes out first and the new member's blind key follows; each side computes the
+        # group key as soon as its message arrives
         #
-        self.spon_id = self.sponsor.get_data().uid
-        stree = copy(self.sponsor.get_data())
-        stree.my_node.key = None
-        print(f"\nSYS: Member {self.sponsor.get_data().uid} is sending the tree ...\n")
+        log_event(logging.DEBUG, 'tree_sent', sponsor=self.spon_id)
         self.send_info(self.sponsor, mem, stree)
-
-        # allow new member to update its tree
-        #
-        time.sleep(1)
-        newtree = self.new_memb.get_data()
-        newtree.new_member_protocol()
-        self.new_memb.set_data(newtree)
+        self.send_info(self.new_memb, new_mem, message)
+        self.transport.settle()
 
         # close connections
         #
         self.close_connections()
 
-        # new member shares blind key with sponsor
-        #
-        mem = f'mem_{self.new_memb.get_data().uid}'
-        self.addr[self.new_id] = self.new_memb.bind('PUB', alias=mem)
-        self.sponsor.connect(self.addr[self.new_id], handler=receive_bkeys)
-        blind_key = self.new_memb.get_data().my_node.b_key
-        message = f'{self.new_memb.get_data().my_node.name}:{blind_key}'
-        print('')
-        self.send_info(self.new_memb, mem, message)
-
-        # allow the sponsor and new member to calculate the group key
-        #
-        time.sleep(1)
-        newtree_s = self.sponsor.get_data()
-        newtree_s.calculate_group_key()
-        self.sponsor.set_data(newtree_s)
-        self.sponsor.get_data().tree_print()
-        newtree_n = self.new_memb.get_data()
-        newtree_n.calculate_group_key()
-        self.new_memb.set_data(newtree_n)
-        self.new_memb.get_data().tree_print()
-
         # sponsor sends updated blind keys
         #
         self.join_key_exchange()
 
         # allow all remaining members to calculate the group key
         #
-        time.sleep(1)
-        for key, agent in self.agents.items():
-            if key not in (self.spon_id, self.new_id):
-                newtree = agent.get_data()
-                newtree.calculate_group_key()
-                agent.set_data(newtree)
-                agent.get_data().tree_print()
+        self.transport.settle()
+        self.calculate_keys([key for key in self.agents if key not in (self.spon_id, self.new_id)])
 
         # close connections
         #
         self.close_connections()
 
-        print("\nSYS: Tree updation completed!")
-        print("SYS: All members have computed the new group key.")
+        log_event(logging.INFO, 'rekey_done', kind='join', members=len(self.agents))
     #
     # end method: join_protocol
 
     # method: leave_key_exchange
     #
-    def leave_key_exchange(self):
-        '''This method the key exchange for a leave event algorithmically.'''
+    def leave_key_exchange(self, event: str='leave') -> None:
+        '''This method facilitates the key exchange for a leave (or merge) event algorithmically.'''
 
-        # print a divider
+        log_event(logging.INFO, 'key_exchange', kind=event)
+        self.sponsor_exchange((self.spon_id,), 0, 1)
+    #
+    # end method: leave_key_exchange
+
+    # method: leave_protocol
+    #
+    def leave_protocol(self, eid: int):
+        '''This method facilitates a member leaving the group.'''
+
+        log_event(logging.INFO, 'group_event', kind='leave')
+
+        # remove the agent
         #
-        print(f"\n{'Key Exchange (Leave)'.center(80, '=')}")
+        self.agents[eid].shutdown()
+        self.transport.settle()
+        self.remove_members([eid])
 
-        # get the update paths of all members
+        # alert current members that a member is leaving the group; find the sponsor
         #
-        update_paths = {}
-        for key, agent in self.agents.items():
-            if key != self.spon_id:
-                temp_update_path = []
-                for node in agent.get_data().get_update_path():
-                    temp_update_path.append(node.name)
-                update_paths[key] = list(reversed(temp_update_path))
-            else:
-                update_paths[key] = None
+        results = self.broadcast({key: [('leave_event', (eid,))] for key in self.agents})
+        self.set_sponsor(results)
 
-        # get the sponsor's key path
+        # sponsor generates new keys and calculates new group key in one call on its agent
         #
-        spon_key_path = []
-        for node in self.sponsor.get_data().my_node.get_key_path():
-            spon_key_path.append(node.name)
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsor=self.spon_id)
+        self.broadcast({self.spon_id: [('key_generation', ()), ('calculate_group_key', ()), ('tree_print', ())]})
 
-        for i in range(len(spon_key_path)-1):
+        # sponsor sends updated blind keys
+        #
+        self.leave_key_exchange()
 
-            # only the sponsor will publish
-            #
-            mem = f'mem_{self.spon_id}'
-            self.addr[self.spon_id] = self.sponsor.bind('PUB', alias=mem)
+        # allow all remaining members to calculate the group key
+        #
+        self.transport.settle()
+        self.calculate_keys([key for key in self.agents if key != self.spon_id])
 
-            # establish subscribers (sponsor will publish)
+        # close connections
+        #
+        self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='leave', members=len(self.agents))
+    #
+    # end method: leave_protocol
+
+    # method: partition_key_exchange
+    #
+    def partition_key_exchange(self, sponsors: list[int], update_paths: dict[int, set[str]]) -> None:
+        '''This method facilitates the key exchange for a partition event algorithmically.'''
+
+        # print a divider
+        #
+        log_event(logging.INFO, 'key_exchange', kind='partition')
+
+        # the sponsors compute their key paths as far as they can and publish the new blind keys,
+        # until every sponsor has reached the group key
+        #
+        published = set()
+        rounds = 0
+        while True:
+            results = self.broadcast({key: [('calculate_available_keys', ())] for key in sponsors})
+            fresh = self.fresh_names(results, sponsors, published)
+            if not fresh:
+                break
+
+            # every member subscribes to the sponsors that publish nodes of its co-path
             #
-            key_node = spon_key_path[i]
-            for key, agent in self.agents.items():
-                if update_paths[key] is not None:
-                    if key_node in update_paths[key]:
-                        dest_name = key_node
-                        if dest_name is not None:
-                            agent.connect(self.addr[self.spon_id], handler=receive_bkeys)
+            for spon_id, names in fresh.items():
+                self.addr[spon_id] = self.agents[spon_id].bind('PUB', alias=f'mem_{spon_id}')
+                for key in self.find_subscribers(update_paths, set(names), spon_id):
+                    self.agents[key].connect(self.addr[spon_id], handler=receive_bkeys)
 
-            # sponsor sends appropriate blind keys
+            # sponsors send the new blind keys
             #
-            blind_key = self.sponsor.get_data().find_node(key_node.lstrip('<').rstrip('>'), False).b_key
-            message = f'{key_node}:{blind_key}'
-            print('')
-            self.send_info(self.sponsor, mem, message)
+            for spon_id, names in fresh.items():
+                view = self.agents[spon_id].get_data()
+                for key_node in names:
+                    self.send_info(self.agents[spon_id], f'mem_{spon_id}', self.blind_key_message(view, key_node))
 
-            # close connections to prevent unnecessary sending/receiving
+            # let the blind keys arrive, then close connections to prevent unnecessary sending/receiving
             #
+            self.transport.settle()
             self.close_connections()
+            rounds = rounds+1
+            log_event(logging.DEBUG, 'round_done', round=rounds)
+    #
+    # end method: partition_key_exchange
 
-            # increment the level
-            #
-            time.sleep(1)
-            print(f"\nSYS: Level {self.sponsor.get_data().my_node.l-i} finished -- keys exchanged!")
+    # method: partition_protocol
+    #
+    def partition_protocol(self, eids: list[int]) -> None:
+        '''This method facilitates several members leaving the group at once.'''
+
+        # check the departing members before anything is torn down
+        #
+        eids = self.check_partition(eids)
+        log_event(logging.INFO, 'group_event', kind='partition')
+
+        # remove the agents
         #
+        for eid in eids:
+            self.agents[eid].shutdown()
+        self.transport.settle()
+        self.remove_members(eids)
+
+        # alert current members that the members are leaving the group in one pass; find the sponsors
+        #
+        results = self.broadcast({key: [('partition_event', (eids,)), ('get_update_path', ())] for key in self.agents})
+        sponsors = sorted(key for key, result in results.items() if result['ntype'] == 'spon')
+        update_paths = {key: set(result['returns'][1]) for key, result in results.items()}
+        self.spon_id = sponsors[0]
+        self.sponsor = self.agents[self.spon_id]
+
+        # sponsors generate new keys and exchange the blind keys of their paths
+        #
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsors=sponsors)
+        self.broadcast({key: [('key_generation', ())] for key in sponsors})
+        self.partition_key_exchange(sponsors, update_paths)
+        self.moved_key_exchange(update_paths)
+        self.broadcast({key: [('tree_print', ())] for key in sponsors})
+
+        # allow all remaining members to calculate the group key
+        #
+        self.calculate_keys([key for key in self.agents if key not in sponsors])
+
+        # close connections
+        #
+        self.close_connections()
+
+        log_event(logging.INFO, 'rekey_done', kind='partition', members=len(self.agents))
     #
-    # end method: leave_key_exchange
+    # end method: partition_protocol
 
-    # method: leave_protocol
+    # method: merge_protocol
     #
-    def leave_protocol(self, eid: int):
-        '''This method facilitates a member leaving the group.'''
+    def merge_protocol(self, other: 'MemberAgent') -> None:
+        '''This method merges another group into this group.'''
 
-        print(f"\n{'Leave Event'.center(80, '=')}")
+        self.check_merge(other)
+        log_event(logging.INFO, 'group_event', kind='merge')
 
-        # remove the agent
+        # the sponsor (rightmost member) of each group sends its tree, with blind keys only, to the other group
         #
-        self.agents[eid].shutdown()
-        time.sleep(1)
-        del self.agents[eid]
-        del self.addr[eid]
+        offset = next(iter(self.agents.values())).get_data().nextmemb-1
+        packets = []
+        for side, peer, joining in ((self, other, True), (other, self, False)):
+            tree = next(iter(side.agents.values())).get_data()
+            spon_id = list(tree.walk_pre_order(tree.root))[-1].mid
+            sponsor = side.agents[spon_id]
+            tree.blind_root()
+            mem = f'mem_{spon_id}'
+            side.addr[spon_id] = sponsor.bind('PUB', alias=mem)
+            for agent in peer.agents.values():
+                agent.connect(side.addr[spon_id], handler=receive_merge)
+            packets.append((side, sponsor, mem, (tree.public_copy(), joining)))
+            log_event(logging.DEBUG, 'tree_sent', sponsor=spon_id)
+
+        # every member merges the received tree into its own (once the subscriptions have taken effect)
+        #
+        self.transport.settle()
+        for side, sponsor, mem, packet in packets:
+            side.send_info(sponsor, mem, packet)
+        self.transport.settle()
+        self.close_connections()
+        other.close_connections()
 
-        # alert current members that a member is leaving the group; find the sponsor
+        # the members of the other group are renumbered after the members of this group
+        #
+        self.adopt_members(other, offset)
+
+        # the sponsor of the merged tree refreshes its key path
         #
-        for key, agent in self.agents.items():
-            newtree = agent.get_data()
-            newtree.leave_event(eid)
-            agent.set_data(newtree)
-            if agent.get_data().my_node.ntype == 'spon':
-                self.sponsor = agent
-
-        # sponsor generates new keys and calculates new group key
-        #
-        self.spon_id = self.sponsor.get_data().uid
-        print(f"\nSYS: Member {self.sponsor.get_data().uid} is generating new keys ...")
-        newtree = self.sponsor.get_data()
-        newtree.key_generation()
-        self.sponsor.set_data(newtree)
-        newtree = self.sponsor.get_data()
-        newtree.calculate_group_key()
-        self.sponsor.set_data(newtree)
-        self.sponsor.get_data().tree_print()
+        results = self.broadcast({key: [('get_update_path', ())] for key in self.agents})
+        self.set_sponsor(results)
+        log_event(logging.DEBUG, 'sponsor_refresh', sponsor=self.spon_id)
+        self.broadcast({self.spon_id: [('key_generation', ()), ('calculate_group_key', ()), ('tree_print', ())]})
 
         # sponsor sends updated blind keys
         #
-        self.leave_key_exchange()
+        self.leave_key_exchange('merge')
 
         # allow all remaining members to calculate the group key
         #
-        time.sleep(1)
-        for key, agent in self.agents.items():
-            if key != self.spon_id:
-                newtree = agent.get_data()
-                newtree.calculate_group_key()
-                agent.set_data(newtree)
-                agent.get_data().tree_print()
+        self.transport.settle()
+        self.calculate_keys([key for key in self.agents if key != self.spon_id])
 
         # close connections
         #
         self.close_connections()
 
-        print("\nSYS: Tree updation completed!")
-        print("SYS: All members have computed the new group key.")
+        log_event(logging.INFO, 'rekey_done', kind='merge', members=len(self.agents))
     #
-    # end method: leave_protocol
+    # end method: merge_protocol
+
+    # method: fingerprints
+    #
+    def fingerprints(self) -> dict[int, str]:
+        '''This method returns the tree fingerprint of every member.'''
+
+        results = self.broadcast({key: [('tree_fingerprint', ())] for key in self.agents})
+        return {key: result['returns'][0] for key, result in results.items()}
+    #
+    # end method: fingerprints
+
+    # method: find_divergence
+    #
+    def find_divergence(self, a: int, b: int) -> Optional[str]:
+        '''This method returns the deepest node on the shared key path of two members where their trees disagree (None if they agree).'''
+
+        # compare the fingerprints; only if they disagree, gather the child fingerprints each member
+        # holds and walk them down from the root
+        #
+        results = self.broadcast({a: [('tree_fingerprint', ())], b: [('tree_fingerprint', ())]})
+        if results[a]['returns'][0] == results[b]['returns'][0]:
+            return None
+        results = self.broadcast({a: [('known_fingerprints', ())], b: [('known_fingerprints', ())]})
+        return BinaryTree.find_divergence(results[a]['returns'][0], results[b]['returns'][0])
+    #
+    # end method: find_divergence
+
+    # method: drop_regions
+    #
+    def drop_regions(self) -> None:
+        '''This method removes the group key regions of the group's members.'''
+
+        for group in [self]+self.merged:
+            if group.key_region is not None:
+                for path in glob.glob(f'{glob.escape(group.key_region)}_*.key'):
+                    drop_region(path)
+    #
+    # end method: drop_regions
+
+    # method: shutdown_agents
+    #
+    def shutdown_agents(self) -> None:
+        '''This method stops the agents of the group and leaves the transport running.'''
+
+        # hosted members go down with their host agents
+        #
+        owners = self.hosts if self.hosts else list(self.agents.values())
+        for agent in owners:
+            agent.shutdown()
+        self.agents = {}
+        self.hosts = []
+        self.addr = {}
+        if self.key_cache is not None:
+            drop_cache(self.key_cache)
+        self.drop_regions()
+    #
+    # end method: shutdown_agents
 
     # method: close
     #
     def close(self) -> None:
-        '''This method shuts down the nameserver.'''
+        '''This method shuts down the transport.'''
 
         # shutdown the system
         #
-        print(f"\n{'Exiting Program'.center(80, '=')}\n")
-        self.nameserver.shutdown()
+        log_event(logging.INFO, 'close')
+        self.transport.shutdown()
+        for other in self.merged:
+            other.transport.shutdown()
+        if self.key_cache is not None:
+            drop_cache(self.key_cache)
+        self.drop_regions()
     #
     # end method: close
 #
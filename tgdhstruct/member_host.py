@@ -0,0 +1,402 @@
+# file: member_host.py
+#
+'''This file contains the MemberHandle and HostedMember classes along with the host agent functions.'''
+
+# import modules
+#
+from __future__ import annotations
+from typing import Any, Callable, Optional
+from osbrain import Proxy, AgentAddress
+from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.data_node import DataNode
+
+# class: HostedMember
+#
+class HostedMember:
+    '''
+    Description
+    -----------
+    This class lets the protocol handlers act on one logical member inside its host agent.
+
+    Attributes
+    ----------
+    host : Agent
+        The host agent
+    uid : int
+        The member ID of the logical member
+
+    Methods
+    -------
+    get_data(self) -> BinaryTree
+        This method returns the tree of the member.
+    set_data(self, tree: BinaryTree) -> None
+        This method sets the tree of the member.
+    log_info(self, message: str) -> None
+        This method logs a message on behalf of the member.
+    '''
+
+    # constructor
+    #
+    def __init__(self, host: Any, uid: int) -> None:
+        '''This is the constructor.'''
+
+        self.host = host
+        self.uid = uid
+    #
+    # end constructor
+
+    # method: get_data
+    #
+    def get_data(self) -> BinaryTree:
+        '''This method returns the tree of the member.'''
+
+        return self.host.members[self.uid]
+    #
+    # end method: get_data
+
+    # method: set_data
+    #
+    def set_data(self, tree: BinaryTree) -> None:
+        '''This method sets the tree of the member.'''
+
+        self.host.members[self.uid] = tree
+    #
+    # end method: set_data
+
+    # method: log_info
+    #
+    def log_info(self, message: str) -> None:
+        '''This method logs a message on behalf of the member.'''
+
+        self.host.log_info(f"mem_{self.uid}: {message}")
+    #
+    # end method: log_info
+#
+# end class: HostedMember
+
+# function: run_tree_calls
+#
+def run_tree_calls(tree: BinaryTree, calls: list[tuple[str, tuple]]) -> dict[str, Any]:
+    '''This function runs a sequence of tree methods where the tree lives and returns a small summary.'''
+
+    # nodes are returned by name so that no subtree is sent back to the caller
+    #
+    returns = []
+    for name, args in calls:
+        value = getattr(tree, name)(*args)
+        if isinstance(value, DataNode):
+            value = value.name
+        elif isinstance(value, (list, tuple, set)) and all(isinstance(node, DataNode) for node in value):
+            value = [node.name for node in value]
+        returns.append(value)
+    return {'uid': tree.uid, 'ntype': tree.my_node.ntype, 'returns': returns}
+#
+# end function: run_tree_calls
+
+# function: receive_hosted
+#
+def receive_hosted(agent: Any, packet: tuple[int, Any]) -> None:
+    '''This helper function passes a message received from another host to the local subscribers.'''
+
+    agent.host_deliver(*packet)
+#
+# end function: receive_hosted
+
+# function: host_init
+#
+def host_init(self, hid: int) -> None:
+    '''This helper function creates the data attributes of a host agent.'''
+
+    self.hid = hid
+    self.members = {}
+    self.subs = {}
+    self.connected = set()
+    self.pub_addr = None
+#
+# end function: host_init
+
+# function: host_size
+#
+def host_size(self) -> int:
+    '''This helper function returns the number of members on the host.'''
+
+    return len(self.members)
+#
+# end function: host_size
+
+# function: new_leaf
+#
+def new_leaf(exponent_bits: Optional[int], group: str) -> DataNode:
+    '''This function generates the leaf (and key pair) of a joining member before it knows its position.'''
+
+    leaf = DataNode(ntype='mem')
+    leaf.gen_private_key()
+    leaf.gen_blind_key(exponent_bits, group)
+    return leaf
+#
+# end function: new_leaf
+
+# function: host_generate_leaf
+#
+def host_generate_leaf(self, uid: int, exponent_bits: Optional[int], group: str) -> int:
+    '''This helper function generates the key pair of a joining hosted member and returns its blind key.'''
+
+    self.members[uid] = new_leaf(exponent_bits, group)
+    return self.members[uid].b_key
+#
+# end function: host_generate_leaf
+
+# function: host_set_data
+#
+def host_set_data(self, uid: int, tree: Optional[BinaryTree]) -> None:
+    '''This helper function sets the tree of a hosted member.'''
+
+    self.members[uid] = tree
+#
+# end function: host_set_data
+
+# function: host_get_data
+#
+def host_get_data(self, uid: int) -> Optional[BinaryTree]:
+    '''This helper function returns the tree of a hosted member.'''
+
+    return self.members[uid]
+#
+# end function: host_get_data
+
+# function: host_remove
+#
+def host_remove(self, uid: int) -> int:
+    '''This helper function removes a hosted member and returns the number left.'''
+
+    del self.members[uid]
+    for subs in self.subs.values():
+        subs[:] = [sub for sub in subs if sub[0] != uid]
+    return len(self.members)
+#
+# end function: host_remove
+
+# function: host_run_calls
+#
+def host_run_calls(self, uid: int, calls: list[tuple[str, tuple]]) -> dict[str, Any]:
+    '''This helper function runs a sequence of tree methods on a hosted member.'''
+
+    return run_tree_calls(self.members[uid], calls)
+#
+# end function: host_run_calls
+
+# function: host_bind
+#
+def host_bind(self) -> AgentAddress:
+    '''This helper function binds the publishing socket shared by all hosted members.'''
+
+    if self.pub_addr is None:
+        self.pub_addr = self.bind('PUB', alias=f'host_{self.hid}')
+    return self.pub_addr
+#
+# end function: host_bind
+
+# function: host_subscribe
+#
+def host_subscribe(self, uid: int, src: int, src_hid: int, addr: AgentAddress, handler: Callable) -> None:
+    '''This helper function subscribes a hosted member to the messages of another member.'''
+
+    self.subs.setdefault(src, []).append((uid, handler))
+
+    # members on the same host are served locally; other hosts are connected once
+    #
+    if src_hid != self.hid and addr not in self.connected:
+        self.connect(addr, handler=receive_hosted)
+        self.connected.add(addr)
+#
+# end function: host_subscribe
+
+# function: host_deliver
+#
+def host_deliver(self, src: int, message: Any) -> None:
+    '''This helper function hands a message from a member to its local subscribers.'''
+
+    for uid, handler in self.subs.get(src, []):
+        if uid in self.members:
+            handler(HostedMember(self, uid), message)
+#
+# end function: host_deliver
+
+# function: host_publish
+#
+def host_publish(self, src: int, message: Any) -> None:
+    '''This helper function sends a message from a hosted member to all of its subscribers.'''
+
+    self.host_deliver(src, message)
+    if self.pub_addr is not None:
+        self.send(f'host_{self.hid}', (src, message))
+#
+# end function: host_publish
+
+# function: host_close
+#
+def host_close(self) -> None:
+    '''This helper function drops all subscriptions and closes the sockets of the host.'''
+
+    self.subs = {}
+    self.connected = set()
+    self.pub_addr = None
+    self.close_all()
+#
+# end function: host_close
+
+# define the methods installed on every host agent
+#
+HOST_METHODS = (host_init, host_size, host_generate_leaf, host_set_data, host_get_data, host_remove,
+                host_run_calls, host_bind, host_subscribe, host_deliver, host_publish, host_close)
+
+# class: MemberHandle
+#
+class MemberHandle:
+    '''
+    Description
+    -----------
+    This class stands in for the agent of one logical member that lives on a shared host agent.
+
+    It offers the agent calls used by the MemberAgent protocols, so the protocols run unchanged
+    whether each member has its own agent or many members share one.
+
+    Attributes
+    ----------
+    host : Proxy
+        The host agent
+    hid : int
+        The ID of the host agent
+    uid : int
+        The member ID of the logical member
+
+    Methods
+    -------
+    get_data(self) -> BinaryTree
+        This method returns the tree of the member.
+    set_data(self, tree: Optional[BinaryTree]) -> None
+        This method sets the tree of the member.
+    run_calls(self, calls: list[tuple[str, tuple]]) -> dict[str, Any]
+        This method runs a sequence of tree methods on the host.
+    generate_leaf(self, exponent_bits: Optional[int], group: str) -> int
+        This method generates the key pair of the member before it joins.
+    bind(self, kind: str, alias: str) -> tuple[int, int, AgentAddress]
+        This method prepares the member to publish.
+    connect(self, addr: tuple[int, int, AgentAddress], handler: Callable) -> None
+        This method subscribes the member to another member.
+    send(self, channel: str, message: Any) -> None
+        This method publishes a message from the member.
+    close_all(self) -> None
+        This method closes the connections of the host.
+    log_info(self, message: str) -> None
+        This method logs a message on behalf of the member.
+    shutdown(self) -> None
+        This method removes the member from its host (the host stays up for later joins).
+    '''
+
+    # constructor
+    #
+    def __init__(self, host: Proxy, hid: int, uid: int) -> None:
+        '''This is the constructor.'''
+
+        self.host = host
+        self.hid = hid
+        self.uid = uid
+        self.host.host_set_data(uid, None)
+    #
+    # end constructor
+
+    # method: get_data
+    #
+    def get_data(self) -> BinaryTree:
+        '''This method returns the tree of the member.'''
+
+        return self.host.host_get_data(self.uid)
+    #
+    # end method: get_data
+
+    # method: set_data
+    #
+    def set_data(self, tree: Optional[BinaryTree]) -> None:
+        '''This method sets the tree of the member.'''
+
+        self.host.host_set_data(self.uid, tree)
+    #
+    # end method: set_data
+
+    # method: run_calls
+    #
+    def run_calls(self, calls: list[tuple[str, tuple]]) -> dict[str, Any]:
+        '''This method runs a sequence of tree methods on the host.'''
+
+        return self.host.host_run_calls(self.uid, calls)
+    #
+    # end method: run_calls
+
+    # method: generate_leaf
+    #
+    def generate_leaf(self, exponent_bits: Optional[int], group: str) -> int:
+        '''This method generates the key pair of the member before it joins.'''
+
+        return self.host.host_generate_leaf(self.uid, exponent_bits, group)
+    #
+    # end method: generate_leaf
+
+    # method: bind
+    #
+    def bind(self, kind: str, alias: str) -> tuple[int, int, AgentAddress]:
+        '''This method prepares the member to publish.'''
+
+        return self.hid, self.uid, self.host.host_bind()
+    #
+    # end method: bind
+
+    # method: connect
+    #
+    def connect(self, addr: tuple[int, int, AgentAddress], handler: Callable) -> None:
+        '''This method subscribes the member to another member.'''
+
+        src_hid, src, host_addr = addr
+        self.host.host_subscribe(self.uid, src, src_hid, host_addr, handler)
+    #
+    # end method: connect
+
+    # method: send
+    #
+    def send(self, channel: str, message: Any) -> None:
+        '''This method publishes a message from the member.'''
+
+        self.host.host_publish(self.uid, message)
+    #
+    # end method: send
+
+    # method: close_all
+    #
+    def close_all(self) -> None:
+        '''This method closes the connections of the host.'''
+
+        self.host.host_close()
+    #
+    # end method: close_all
+
+    # method: log_info
+    #
+    def log_info(self, message: str) -> None:
+        '''This method logs a message on behalf of the member.'''
+
+        self.host.log_info(f"mem_{self.uid}: {message}")
+    #
+    # end method: log_info
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method removes the member from its host (the host stays up for later joins).'''
+
+        self.host.host_remove(self.uid)
+    #
+    # end method: shutdown
+#
+# end class: MemberHandle
+#
+# end file: member_host.py
@@ -0,0 +1,939 @@
+# file: transport.py
+#
+'''This file contains the Transport classes used to run member agents along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+import time
+import pickle
+import asyncio
+import logging
+import threading
+import multiprocessing
+from types import MethodType
+from collections import deque
+from typing import Any, Callable, Optional
+import zmq
+from osbrain import run_nameserver
+from osbrain import run_agent
+
+# class: LocalAgent
+#
+class LocalAgent:
+    '''
+    Description
+    -----------
+    This class is the agent object of the in-process, pipe and ZeroMQ transports.
+
+    It offers the agent calls that the protocol functions use (set_method, bind, connect,
+    send, close_all, log_info) and records every publication and subscription in an
+    outbox that the broker of the transport processes after each call.
+
+    Attributes
+    ----------
+    name : str
+        The name of the agent
+    handlers : dict[tuple[str, str], list[Callable]]
+        The handlers subscribed to each address
+    outbox : list[tuple]
+        The publications and subscriptions made since the outbox was last taken
+
+    Methods
+    -------
+    set_method(self, *functions: Callable) -> None
+        This method installs functions as methods of the agent.
+    bind(self, kind: str, alias: str) -> tuple[str, str]
+        This method creates a publishing address for the agent.
+    connect(self, addr: tuple[str, str], handler: Callable) -> None
+        This method subscribes a handler to an address.
+    send(self, alias: str, message: Any) -> None
+        This method publishes a message.
+    close_all(self) -> None
+        This method drops all subscriptions and publishing addresses of the agent.
+    log_info(self, message: str) -> None
+        This method logs a message.
+    deliver(self, addr: tuple[str, str], message: Any) -> None
+        This method passes a published message to the subscribed handlers.
+    take_outbox(self) -> list[tuple]
+        This method returns and empties the outbox.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str) -> None:
+        '''This is the constructor.'''
+
+        self.name = name
+        self.handlers = {}
+        self.outbox = []
+    #
+    # end constructor
+
+    # method: set_method
+    #
+    def set_method(self, *functions: Callable) -> None:
+        '''This method installs functions as methods of the agent.'''
+
+        for function in functions:
+            setattr(self, function.__name__, MethodType(function, self))
+    #
+    # end method: set_method
+
+    # method: bind
+    #
+    def bind(self, kind: str, alias: str) -> tuple[str, str]:
+        '''This method creates a publishing address for the agent.'''
+
+        return self.name, alias
+    #
+    # end method: bind
+
+    # method: connect
+    #
+    def connect(self, addr: tuple[str, str], handler: Callable) -> None:
+        '''This method subscribes a handler to an address.'''
+
+        self.handlers.setdefault(addr, []).append(handler)
+        self.outbox.append(('subscribe', addr))
+    #
+    # end method: connect
+
+    # method: send
+    #
+    def send(self, alias: str, message: Any) -> None:
+        '''This method publishes a message.'''
+
+        self.outbox.append(('publish', (self.name, alias), message))
+    #
+    # end method: send
+
+    # method: close_all
+    #
+    def close_all(self) -> None:
+        '''This method drops all subscriptions and publishing addresses of the agent.'''
+
+        self.handlers = {}
+        self.outbox.append(('close',))
+    #
+    # end method: close_all
+
+    # method: log_info
+    #
+    def log_info(self, message: str) -> None:
+        '''This method logs a message.'''
+
+        logging.getLogger(f'tgdhstruct.{self.name}').info(message)
+    #
+    # end method: log_info
+
+    # method: deliver
+    #
+    def deliver(self, addr: tuple[str, str], message: Any) -> None:
+        '''This method passes a published message to the subscribed handlers.'''
+
+        for handler in self.handlers.get(addr, []):
+            handler(self, message)
+    #
+    # end method: deliver
+
+    # method: take_outbox
+    #
+    def take_outbox(self) -> list[tuple]:
+        '''This method returns and empties the outbox.'''
+
+        outbox = self.outbox
+        self.outbox = []
+        return outbox
+    #
+    # end method: take_outbox
+#
+# end class: LocalAgent
+
+# class: Broker
+#
+class Broker:
+    '''
+    Description
+    -----------
+    This class routes the publications of brokered agents to their subscribers.
+
+    Subscribers are resolved when a message is published, so closing a connection afterwards
+    does not drop a message that is already queued.
+
+    Attributes
+    ----------
+    subs : dict[tuple[str, str], list[Endpoint]]
+        The endpoints subscribed to each address
+
+    Methods
+    -------
+    route(self, source: Endpoint, outbox: list[tuple]) -> None
+        This method applies an outbox and delivers the queued messages.
+    drop(self, endpoint: Endpoint) -> None
+        This method removes an endpoint and its addresses.
+    '''
+
+    # constructor
+    #
+    def __init__(self) -> None:
+        '''This is the constructor.'''
+
+        self.subs = {}
+        self._lock = threading.RLock()
+    #
+    # end constructor
+
+    # method: route
+    #
+    def route(self, source: Endpoint, outbox: list[tuple]) -> None:
+        '''This method applies an outbox and delivers the queued messages.'''
+
+        with self._lock:
+            queue = deque((source, entry) for entry in outbox)
+            while queue:
+                endpoint, entry = queue.popleft()
+                if entry[0] == 'subscribe':
+                    subs = self.subs.setdefault(entry[1], [])
+                    if endpoint not in subs:
+                        subs.append(endpoint)
+                elif entry[0] == 'close':
+                    self.drop(endpoint)
+                else:
+                    for target in list(self.subs.get(entry[1], [])):
+                        for produced in target.invoke('deliver', (entry[1], entry[2]), {}):
+                            queue.append((target, produced))
+    #
+    # end method: route
+
+    # method: drop
+    #
+    def drop(self, endpoint: Endpoint) -> None:
+        '''This method removes an endpoint and its addresses.'''
+
+        with self._lock:
+            for addr in list(self.subs):
+                if addr[0] == endpoint.name:
+                    del self.subs[addr]
+                elif endpoint in self.subs[addr]:
+                    self.subs[addr].remove(endpoint)
+    #
+    # end method: drop
+#
+# end class: Broker
+
+# class: Endpoint
+#
+class Endpoint:
+    '''
+    Description
+    -----------
+    This is the base class for the driver-side handles of brokered agents.
+
+    Any attribute that is not defined here is forwarded to the agent as a remote call,
+    and the publications made by the call are routed before the result is returned.
+
+    Attributes
+    ----------
+    name : str
+        The name of the agent
+    broker : Broker
+        The broker of the transport
+
+    Methods
+    -------
+    invoke(self, method: str, args: tuple, kwargs: dict) -> list[tuple]
+        This method runs a call for the broker and returns the outbox it produced.
+    call(self, method: str, *args: Any, **kwargs: Any) -> Any
+        This method runs a call on the agent and routes its publications.
+    execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]
+        This method runs a call on the agent (implemented by each transport).
+    shutdown(self) -> None
+        This method stops the agent.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, broker: Broker) -> None:
+        '''This is the constructor.'''
+
+        self.name = name
+        self.broker = broker
+        self._lock = threading.Lock()
+    #
+    # end constructor
+
+    # method: __getattr__
+    #
+    def __getattr__(self, method: str) -> Callable:
+        '''This method forwards unknown attributes to the agent as remote calls.'''
+
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return lambda *args, **kwargs: self.call(method, *args, **kwargs)
+    #
+    # end method: __getattr__
+
+    # method: invoke
+    #
+    def invoke(self, method: str, args: tuple, kwargs: dict) -> list[tuple]:
+        '''This method runs a call for the broker and returns the outbox it produced.'''
+
+        with self._lock:
+            ok, result, outbox = self.execute(method, args, kwargs)
+        if not ok:
+            raise result
+        return outbox
+    #
+    # end method: invoke
+
+    # method: call
+    #
+    def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        '''This method runs a call on the agent and routes its publications.'''
+
+        with self._lock:
+            ok, result, outbox = self.execute(method, args, kwargs)
+        self.broker.route(self, outbox)
+        if not ok:
+            raise result
+        return result
+    #
+    # end method: call
+
+    # method: execute
+    #
+    def execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]:
+        '''This method runs a call on the agent (implemented by each transport).'''
+
+        raise NotImplementedError
+    #
+    # end method: execute
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method stops the agent.'''
+
+        self.broker.drop(self)
+    #
+    # end method: shutdown
+#
+# end class: Endpoint
+
+# function: run_local
+#
+def run_local(agent: LocalAgent, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]:
+    '''This function runs a call on a local agent and packs the result with its outbox.'''
+
+    try:
+        result = getattr(agent, method)(*args, **kwargs)
+        return True, result, agent.take_outbox()
+    except Exception as err:
+        return False, err, agent.take_outbox()
+#
+# end function: run_local
+
+# function: serve_agent
+#
+def serve_agent(name: str, methods: tuple[Callable], channel: Any) -> None:
+    '''This function runs a local agent in a worker process and answers calls from a channel.'''
+
+    agent = LocalAgent(name)
+    agent.set_method(*methods)
+    while True:
+        request = channel.recv()
+        if request is None:
+            break
+        reply = run_local(agent, *request)
+
+        # exceptions that cannot be pickled are sent back as plain errors
+        #
+        try:
+            channel.send(reply)
+        except Exception:
+            channel.send((False, RuntimeError(repr(reply[1])), reply[2]))
+    channel.close()
+#
+# end function: serve_agent
+
+# class: LocalEndpoint
+#
+class LocalEndpoint(Endpoint):
+    '''
+    Description
+    -----------
+    This class is the handle of an agent that lives in the calling process.
+
+    Calls pass their arguments and results by value, as they would to an agent in another process.
+
+    Attributes
+    ----------
+    agent : LocalAgent
+        The agent
+
+    Methods
+    -------
+    execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]
+        This method runs a call on the agent.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, broker: Broker, methods: tuple[Callable]) -> None:
+        '''This is the constructor.'''
+
+        super().__init__(name, broker)
+        self.agent = LocalAgent(name)
+        self.agent.set_method(*methods)
+    #
+    # end constructor
+
+    # method: execute
+    #
+    def execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]:
+        '''This method runs a call on the agent.'''
+
+        # arguments and results are copied so that the agent behaves like a remote one
+        #
+        args, kwargs = pickle.loads(pickle.dumps((args, kwargs)))
+        reply = run_local(self.agent, method, args, kwargs)
+        try:
+            return pickle.loads(pickle.dumps(reply))
+        except Exception:
+            return False, RuntimeError(repr(reply[1])), reply[2]
+    #
+    # end method: execute
+#
+# end class: LocalEndpoint
+
+# class: ChannelEndpoint
+#
+class ChannelEndpoint(Endpoint):
+    '''
+    Description
+    -----------
+    This class is the handle of an agent that runs in a worker process behind a channel.
+
+    Attributes
+    ----------
+    channel : Any
+        The driver side of the channel (anything with send, recv and close; None once stopped)
+    process : multiprocessing.Process
+        The worker process
+
+    Methods
+    -------
+    execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]
+        This method sends a call to the worker process and waits for the reply.
+    shutdown(self) -> None
+        This method stops the worker process.
+    '''
+
+    # constructor
+    #
+    def __init__(self, name: str, broker: Broker, channel: Any, process: multiprocessing.Process) -> None:
+        '''This is the constructor.'''
+
+        super().__init__(name, broker)
+        self.channel = channel
+        self.process = process
+    #
+    # end constructor
+
+    # method: execute
+    #
+    def execute(self, method: str, args: tuple, kwargs: dict) -> tuple[bool, Any, list[tuple]]:
+        '''This method sends a call to the worker process and waits for the reply.'''
+
+        self.channel.send((method, args, kwargs))
+        return self.channel.recv()
+    #
+    # end method: execute
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method stops the worker process.'''
+
+        super().shutdown()
+        with self._lock:
+            if self.channel is None:
+                return
+            if self.process.is_alive():
+                self.channel.send(None)
+                self.process.join()
+            self.channel.close()
+            self.channel = None
+    #
+    # end method: shutdown
+#
+# end class: ChannelEndpoint
+
+# class: ZmqChannel
+#
+class ZmqChannel:
+    '''
+    Description
+    -----------
+    This class wraps a ZeroMQ request/reply socket as a channel of Python objects.
+
+    Attributes
+    ----------
+    socket : zmq.Socket
+        The socket
+
+    Methods
+    -------
+    send(self, obj: Any) -> None
+        This method sends an object.
+    recv(self) -> Any
+        This method receives an object.
+    close(self) -> None
+        This method closes the socket.
+    '''
+
+    # constructor
+    #
+    def __init__(self, socket: zmq.Socket) -> None:
+        '''This is the constructor.'''
+
+        self.socket = socket
+    #
+    # end constructor
+
+    # method: send
+    #
+    def send(self, obj: Any) -> None:
+        '''This method sends an object.'''
+
+        self.socket.send_pyobj(obj)
+    #
+    # end method: send
+
+    # method: recv
+    #
+    def recv(self) -> Any:
+        '''This method receives an object.'''
+
+        return self.socket.recv_pyobj()
+    #
+    # end method: recv
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method closes the socket.'''
+
+        self.socket.close(linger=0)
+    #
+    # end method: close
+#
+# end class: ZmqChannel
+
+# function: serve_zmq_agent
+#
+def serve_zmq_agent(name: str, methods: tuple[Callable], addr: str) -> None:
+    '''This function connects a worker process to the driver with ZeroMQ and serves a local agent.'''
+
+    context = zmq.Context()
+    socket = context.socket(zmq.REP)
+    socket.connect(addr)
+    serve_agent(name, methods, ZmqChannel(socket))
+    context.term()
+#
+# end function: serve_zmq_agent
+
+# class: Transport
+#
+class Transport:
+    '''
+    Description
+    -----------
+    This is the base class for the transports that MemberAgent runs on.
+
+    A transport starts agents with a set of methods installed and returns handles that
+    support remote calls plus bind, connect, send, close_all, log_info and shutdown.
+
+    Global Data
+    -----------
+    bool: in_process
+        Whether the agents run in the calling process (and so share its process-wide state)
+
+    Methods
+    -------
+    start(self) -> None
+        This method prepares the transport.
+    forks(self) -> bool
+        This method returns whether agents are started by forking the calling process.
+    spawn(self, name: str, methods: tuple[Callable]) -> Any
+        This method starts an agent and installs methods on it.
+    settle(self) -> None
+        This method waits until published messages have been delivered.
+    settle_async(self) -> None
+        This method waits (without blocking the event loop) until published messages have been delivered.
+    shutdown(self) -> None
+        This method stops the transport and all of its agents.
+    '''
+
+    # define whether the agents share the calling process
+    #
+    in_process = False
+
+    # method: start
+    #
+    def start(self) -> None:
+        '''This method prepares the transport.'''
+
+        pass
+    #
+    # end method: start
+
+    # method: forks
+    #
+    def forks(self) -> bool:
+        '''This method returns whether agents are started by forking the calling process.'''
+
+        # a forked child keeps every lock another thread held at the time, so callers only spawn
+        # from other threads when this is False
+        #
+        return True
+    #
+    # end method: forks
+
+    # method: spawn
+    #
+    def spawn(self, name: str, methods: tuple[Callable]) -> Any:
+        '''This method starts an agent and installs methods on it.'''
+
+        raise NotImplementedError
+    #
+    # end method: spawn
+
+    # method: settle
+    #
+    def settle(self) -> None:
+        '''This method waits until published messages have been delivered.'''
+
+        pass
+    #
+    # end method: settle
+
+    # method: settle_async
+    #
+    async def settle_async(self) -> None:
+        '''This method waits (without blocking the event loop) until published messages have been delivered.'''
+
+        self.settle()
+    #
+    # end method: settle_async
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method stops the transport and all of its agents.'''
+
+        pass
+    #
+    # end method: shutdown
+#
+# end class: Transport
+
+# class: OsbrainTransport
+#
+class OsbrainTransport(Transport):
+    '''
+    Description
+    -----------
+    This class runs every agent as an osbrain agent registered with a nameserver.
+
+    Attributes
+    ----------
+    delay : float
+        The time (in seconds) allowed for published messages to arrive
+    nameserver : NSProxy
+        The running nameserver
+
+    Methods
+    -------
+    start(self) -> None
+        This method starts the nameserver.
+    spawn(self, name: str, methods: tuple[Callable]) -> Proxy
+        This method starts an osbrain agent and installs methods on it.
+    settle(self) -> None
+        This method waits for published messages to arrive.
+    settle_async(self) -> None
+        This method waits for published messages to arrive without blocking the event loop.
+    shutdown(self) -> None
+        This method shuts down the nameserver and its agents.
+    '''
+
+    # constructor
+    #
+    def __init__(self, delay: float=1.0) -> None:
+        '''This is the constructor.'''
+
+        self.delay = delay
+        self.nameserver = None
+    #
+    # end constructor
+
+    # method: start
+    #
+    def start(self) -> None:
+        '''This method starts the nameserver.'''
+
+        self.nameserver = run_nameserver()
+    #
+    # end method: start
+
+    # method: spawn
+    #
+    def spawn(self, name: str, methods: tuple[Callable]) -> Any:
+        '''This method starts an osbrain agent and installs methods on it.'''
+
+        # agents register with this transport's nameserver so that several groups can share a process
+        #
+        agent = run_agent(name, nsaddr=self.nameserver.addr())
+        agent.set_method(*methods)
+        return agent
+    #
+    # end method: spawn
+
+    # method: settle
+    #
+    def settle(self) -> None:
+        '''This method waits for published messages to arrive.'''
+
+        time.sleep(self.delay)
+    #
+    # end method: settle
+
+    # method: settle_async
+    #
+    async def settle_async(self) -> None:
+        '''This method waits for published messages to arrive without blocking the event loop.'''
+
+        await asyncio.sleep(self.delay)
+    #
+    # end method: settle_async
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method shuts down the nameserver and its agents.'''
+
+        if self.nameserver is not None:
+            self.nameserver.shutdown()
+            self.nameserver = None
+    #
+    # end method: shutdown
+#
+# end class: OsbrainTransport
+
+# class: InProcessTransport
+#
+class InProcessTransport(Transport):
+    '''
+    Description
+    -----------
+    This class runs every agent as an object in the calling process.
+
+    Publications are queued by the broker and delivered before the publishing call returns.
+
+    Attributes
+    ----------
+    broker : Broker
+        The message broker
+
+    Methods
+    -------
+    forks(self) -> bool
+        This method returns False, as no process is started.
+    spawn(self, name: str, methods: tuple[Callable]) -> LocalEndpoint
+        This method creates an in-process agent.
+    '''
+
+    # define whether the agents share the calling process
+    #
+    in_process = True
+
+    # constructor
+    #
+    def __init__(self) -> None:
+        '''This is the constructor.'''
+
+        self.broker = Broker()
+    #
+    # end constructor
+
+    # method: forks
+    #
+    def forks(self) -> bool:
+        '''This method returns False, as no process is started.'''
+
+        return False
+    #
+    # end method: forks
+
+    # method: spawn
+    #
+    def spawn(self, name: str, methods: tuple[Callable]) -> LocalEndpoint:
+        '''This method creates an in-process agent.'''
+
+        return LocalEndpoint(name, self.broker, methods)
+    #
+    # end method: spawn
+#
+# end class: InProcessTransport
+
+# class: PipeTransport
+#
+class PipeTransport(Transport):
+    '''
+    Description
+    -----------
+    This class runs every agent in a worker process connected by a multiprocessing pipe.
+
+    Attributes
+    ----------
+    broker : Broker
+        The message broker (publications are relayed through the calling process)
+    endpoints : list[ChannelEndpoint]
+        The running agents
+    context : multiprocessing.context.BaseContext
+        The multiprocessing context used to start the workers
+
+    Methods
+    -------
+    forks(self) -> bool
+        This method returns whether the workers are started with the fork start method.
+    track(self, endpoint: ChannelEndpoint) -> None
+        This method records a running agent and forgets the ones that have been shut down.
+    spawn(self, name: str, methods: tuple[Callable]) -> ChannelEndpoint
+        This method starts an agent in a worker process.
+    shutdown(self) -> None
+        This method stops all worker processes.
+    '''
+
+    # constructor
+    #
+    def __init__(self, start_method: Optional[str]=None) -> None:
+        '''This is the constructor.'''
+
+        self.broker = Broker()
+        self.endpoints = []
+        self.context = multiprocessing.get_context(start_method)
+    #
+    # end constructor
+
+    # method: forks
+    #
+    def forks(self) -> bool:
+        '''This method returns whether the workers are started with the fork start method.'''
+
+        return self.context.get_start_method() == 'fork'
+    #
+    # end method: forks
+
+    # method: track
+    #
+    def track(self, endpoint: ChannelEndpoint) -> None:
+        '''This method records a running agent and forgets the ones that have been shut down.'''
+
+        self.endpoints = [running for running in self.endpoints if running.channel is not None]
+        self.endpoints.append(endpoint)
+    #
+    # end method: track
+
+    # method: spawn
+    #
+    def spawn(self, name: str, methods: tuple[Callable]) -> ChannelEndpoint:
+        '''This method starts an agent in a worker process.'''
+
+        parent, child = self.context.Pipe()
+        process = self.context.Process(target=serve_agent, args=(name, methods, child), name=name, daemon=True)
+        process.start()
+        child.close()
+        endpoint = ChannelEndpoint(name, self.broker, parent, process)
+        self.track(endpoint)
+        return endpoint
+    #
+    # end method: spawn
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method stops all worker processes.'''
+
+        for endpoint in self.endpoints:
+            endpoint.shutdown()
+        self.endpoints = []
+    #
+    # end method: shutdown
+#
+# end class: PipeTransport
+
+# class: ZmqTransport
+#
+class ZmqTransport(PipeTransport):
+    '''
+    Description
+    -----------
+    This class runs every agent in a worker process connected by a ZeroMQ request/reply socket.
+
+    Attributes
+    ----------
+    zmq_context : zmq.Context
+        The ZeroMQ context of the calling process
+    host : str
+        The interface the request sockets bind to
+
+    Methods
+    -------
+    spawn(self, name: str, methods: tuple[Callable]) -> ChannelEndpoint
+        This method starts an agent in a worker process.
+    shutdown(self) -> None
+        This method stops all worker processes and the ZeroMQ context.
+    '''
+
+    # constructor
+    #
+    def __init__(self, host: str='tcp://127.0.0.1', start_method: Optional[str]=None) -> None:
+        '''This is the constructor.'''
+
+        super().__init__(start_method)
+        self.zmq_context = zmq.Context()
+        self.host = host
+    #
+    # end constructor
+
+    # method: spawn
+    #
+    def spawn(self, name: str, methods: tuple[Callable]) -> ChannelEndpoint:
+        '''This method starts an agent in a worker process.'''
+
+        socket = self.zmq_context.socket(zmq.REQ)
+        port = socket.bind_to_random_port(self.host)
+        addr = f'{self.host}:{port}'
+        process = self.context.Process(target=serve_zmq_agent, args=(name, methods, addr), name=name, daemon=True)
+        process.start()
+        endpoint = ChannelEndpoint(name, self.broker, ZmqChannel(socket), process)
+        self.track(endpoint)
+        return endpoint
+    #
+    # end method: spawn
+
+    # method: shutdown
+    #
+    def shutdown(self) -> None:
+        '''This method stops all worker processes and the ZeroMQ context.'''
+
+        super().shutdown()
+        self.zmq_context.term()
+    #
+    # end method: shutdown
+#
+# end class: ZmqTransport
+#
+# end file: transport.py
@@ -0,0 +1,424 @@
+# file: tree_snapshot.py
+#
+'''This file contains the TreeSnapshot class along with helper functions.'''
+
+# import modules
+#
+from __future__ import annotations
+import os
+import sys
+import json
+import mmap
+import struct
+import bisect
+from array import array
+from typing import Optional
+from anytree import LevelOrderIter
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+from Crypto.Random import get_random_bytes
+from tgdhstruct.data_node import DataNode
+from tgdhstruct.binary_tree import BinaryTree
+from tgdhstruct.dh_group import get_group
+
+# define the snapshot layout
+#
+# header: magic, format version, flags, metadata length (followed by the JSON metadata)
+# arrays: heap index (u64), member ID (i64), node type (u8), blind key present (u8), blind keys (fixed width)
+# secret: salt, nonce, tag and ciphertext of my private key (only present when flags & FLAG_SECRET)
+#
+MAGIC = b'TGDHSNAP'
+VERSION = 1
+FLAG_SECRET = 0x1
+HEADER = struct.Struct('<8sHHI')
+NTYPES = ('root', 'inter', 'mem', 'spon')
+MAX_DEPTH = 63
+
+# function: _align
+#
+def _align(offset: int) -> int:
+    '''This helper function rounds an offset up to the next multiple of eight.'''
+
+    return (offset+7) & ~7
+#
+# end function: _align
+
+# function: _derive_secret
+#
+def _derive_secret(secret: bytes, salt: bytes) -> bytes:
+    '''This helper function derives the AES key that protects my private key.'''
+
+    return HKDF(secret, 32, salt, SHA256, context=b'tgdhstruct snapshot')
+#
+# end function: _derive_secret
+
+# function: _int_array
+#
+def _int_array(view: memoryview, code: str) -> memoryview:
+    '''This helper function interprets little-endian snapshot data as an integer array.'''
+
+    if sys.byteorder == 'little':
+        return view.cast(code)
+    data = array(code, view.tobytes())
+    data.byteswap()
+    return memoryview(data)
+#
+# end function: _int_array
+
+# function: save_snapshot
+#
+def save_snapshot(tree: BinaryTree, path: str, secret: Optional[bytes]=None) -> None:
+    '''This function writes a binary snapshot of a tree to a file.'''
+
+    # collect the nodes in heap order (level order visits the heap indices in ascending order)
+    #
+    nodes = list(LevelOrderIter(tree.root))
+    count = len(nodes)
+    width = get_group(tree.group).element_bytes
+    heap = array('Q', bytes(8*count))
+    mids = array('q', bytes(8*count))
+    ntypes = bytearray(count)
+    present = bytearray(count)
+    bkeys = bytearray(width*count)
+    my_row = -1
+    for row, node in enumerate(nodes):
+        if node.l > MAX_DEPTH:
+            raise ValueError(f"Snapshot supports trees up to depth {MAX_DEPTH}, node {node.name} is deeper.")
+        heap[row] = (1 << node.l) | node.v
+        mids[row] = -1 if node.mid is None else node.mid
+        ntypes[row] = NTYPES.index(node.ntype)
+        if node.b_key is not None:
+            present[row] = 1
+            bkeys[row*width:(row+1)*width] = int(node.b_key).to_bytes(width, 'big')
+        if node is tree.my_node:
+            my_row = row
+    if sys.byteorder != 'little':
+        heap.byteswap()
+        mids.byteswap()
+
+    # describe the tree attributes in the metadata block
+    #
+    meta = {
+        'uid': tree.uid,
+        'size': tree.size,
+        'nextmemb': tree.nextmemb,
+        'height': tree.height,
+        'nodetrack': tree.nodetrack,
+        'nodemax': tree.nodemax,
+        'count': count,
+        'width': width,
+        'my_row': my_row,
+        'rebalance': tree.rebalance,
+        'slack': tree.slack,
+        'sparse': tree.sparse,
+        'sponsor_policy': tree.sponsor_policy,
+        'key_region': tree.key_region,
+        'display': tree.display,
+        'sponsored': {str(mid): epoch for mid, epoch in tree.sponsored.items()},
+        'exponent_bits': tree.exponent_bits,
+        'group': tree.group,
+        'epoch': tree.epoch,
+    }
+    if tree.my_node is not None and tree.my_node.rsa_pub is not None:
+        meta['rsa_pub'] = tree.my_node.rsa_pub.hex()
+
+    # encrypt my private key if a secret is provided
+    #
+    flags = 0
+    sealed = b''
+    if secret is not None and tree.my_node is not None and tree.my_node.key is not None:
+        flags = flags | FLAG_SECRET
+        salt = get_random_bytes(16)
+        key = int(tree.my_node.key)
+        cipher = AES.new(_derive_secret(secret, salt), AES.MODE_GCM)
+        cipher.update(MAGIC)
+        ciphertext, tag = cipher.encrypt_and_digest(key.to_bytes((key.bit_length()+7)//8, 'big'))
+        sealed = salt+cipher.nonce+tag+ciphertext
+        meta['sealed'] = len(sealed)
+    metabytes = json.dumps(meta, separators=(',', ':')).encode('utf-8')
+
+    # write the snapshot next to the destination and move it into place
+    #
+    temp = f'{path}.tmp'
+    with open(temp, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, flags, len(metabytes)))
+        file.write(metabytes)
+        offset = HEADER.size+len(metabytes)
+        file.write(bytes(_align(offset)-offset))
+        file.write(heap.tobytes())
+        file.write(mids.tobytes())
+        file.write(ntypes)
+        file.write(present)
+        file.write(bkeys)
+        file.write(sealed)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, path)
+#
+# end function: save_snapshot
+
+# function: load_snapshot
+#
+def load_snapshot(path: str) -> TreeSnapshot:
+    '''This function maps a snapshot file into memory without materializing the tree.'''
+
+    return TreeSnapshot(path)
+#
+# end function: load_snapshot
+
+# class: TreeSnapshot
+#
+class TreeSnapshot:
+    '''
+    Description
+    -----------
+    This class provides zero-copy access to a memory-mapped tree snapshot.
+
+    Attributes
+    ----------
+    path : str
+        The path of the snapshot file
+    meta : dict
+        The tree attributes stored in the snapshot
+    count : int
+        The number of nodes in the snapshot
+    width : int
+        The width (in bytes) of each blind key
+    heap : memoryview
+        The heap index (1 << l | v) of each node in ascending order
+    mids : memoryview
+        The member ID of each node (-1 if the node has no member)
+    ntypes : memoryview
+        The node type code of each node
+    present : memoryview
+        Whether each node has a blind key
+    bkeys : memoryview
+        The fixed-width blind keys of all nodes
+    sealed : memoryview
+        The encrypted private key of my node (empty if not stored)
+
+    Methods
+    -------
+    close(self) -> None
+        This method releases the memory map.
+    find_row(self, l: int, v: int) -> int
+        This method returns the row of the node with index <l,v> or -1 if it does not exist.
+    node_name(self, row: int) -> str
+        This method returns the name of the node stored in a row.
+    mid(self, row: int) -> Optional[int]
+        This method returns the member ID of the node stored in a row.
+    ntype(self, row: int) -> str
+        This method returns the type of the node stored in a row.
+    blind_key(self, row: int) -> Optional[int]
+        This method returns the blind key of the node stored in a row.
+    unseal(self, secret: bytes) -> int
+        This method decrypts my private key.
+    group_key(self, secret: bytes) -> Optional[int]
+        This method calculates the group key directly from the mapped blind keys.
+    restore(self, secret: Optional[bytes]=None, display: Optional[bool]=None) -> BinaryTree
+        This method materializes the snapshot as a BinaryTree.
+    '''
+
+    # constructor
+    #
+    def __init__(self, path: str) -> None:
+        '''This is the constructor.'''
+
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+
+        # parse the header and metadata
+        #
+        magic, version, self.flags, metalen = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a tree snapshot.")
+        if version > VERSION:
+            raise ValueError(f"Snapshot version {version} is not supported (expected <= {VERSION}).")
+        self.version = version
+        self.meta = json.loads(bytes(view[HEADER.size:HEADER.size+metalen]))
+        self.count = self.meta['count']
+        self.width = self.meta['width']
+
+        # map the arrays without copying them
+        #
+        offset = _align(HEADER.size+metalen)
+        self.heap = _int_array(view[offset:offset+8*self.count], 'Q')
+        offset = offset+8*self.count
+        self.mids = _int_array(view[offset:offset+8*self.count], 'q')
+        offset = offset+8*self.count
+        self.ntypes = view[offset:offset+self.count]
+        offset = offset+self.count
+        self.present = view[offset:offset+self.count]
+        offset = offset+self.count
+        self.bkeys = view[offset:offset+self.width*self.count]
+        offset = offset+self.width*self.count
+        self.sealed = view[offset:offset+self.meta.get('sealed', 0)]
+        self._tree = None
+    #
+    # end constructor
+
+    # method: close
+    #
+    def close(self) -> None:
+        '''This method releases the memory map.'''
+
+        for view in (self.heap, self.mids, self.ntypes, self.present, self.bkeys, self.sealed):
+            view.release()
+        self._map.close()
+    #
+    # end method: close
+
+    # method: find_row
+    #
+    def find_row(self, l: int, v: int) -> int:
+        '''This method returns the row of the node with index <l,v> or -1 if it does not exist.'''
+
+        index = (1 << l) | v
+        row = bisect.bisect_left(self.heap, index)
+        if row < self.count and self.heap[row] == index:
+            return row
+        return -1
+    #
+    # end method: find_row
+
+    # method: node_name
+    #
+    def node_name(self, row: int) -> str:
+        '''This method returns the name of the node stored in a row.'''
+
+        index = self.heap[row]
+        l = index.bit_length()-1
+        return f'<{l},{index ^ (1 << l)}>'
+    #
+    # end method: node_name
+
+    # method: mid
+    #
+    def mid(self, row: int) -> Optional[int]:
+        '''This method returns the member ID of the node stored in a row.'''
+
+        mid = self.mids[row]
+        return None if mid < 0 else mid
+    #
+    # end method: mid
+
+    # method: ntype
+    #
+    def ntype(self, row: int) -> str:
+        '''This method returns the type of the node stored in a row.'''
+
+        return NTYPES[self.ntypes[row]]
+    #
+    # end method: ntype
+
+    # method: blind_key
+    #
+    def blind_key(self, row: int) -> Optional[int]:
+        '''This method returns the blind key of the node stored in a row.'''
+
+        if not self.present[row]:
+            return None
+        return int.from_bytes(self.bkeys[row*self.width:(row+1)*self.width], 'big')
+    #
+    # end method: blind_key
+
+    # method: unseal
+    #
+    def unseal(self, secret: bytes) -> int:
+        '''This method decrypts my private key.'''
+
+        if not self.flags & FLAG_SECRET:
+            raise ValueError(f"{self.path} does not contain a private key.")
+        sealed = bytes(self.sealed)
+        salt, nonce, tag, ciphertext = sealed[:16], sealed[16:32], sealed[32:48], sealed[48:]
+        cipher = AES.new(_derive_secret(secret, salt), AES.MODE_GCM, nonce=nonce)
+        cipher.update(MAGIC)
+        return int.from_bytes(cipher.decrypt_and_verify(ciphertext, tag), 'big')
+    #
+    # end method: unseal
+
+    # method: group_key
+    #
+    def group_key(self, secret: bytes) -> Optional[int]:
+        '''This method calculates the group key directly from the mapped blind keys.'''
+
+        # walk from my node up to the root, combining my key with each co-path blind key
+        #
+        index = self.heap[self.meta['my_row']]
+        key = self.unseal(secret)
+        group = get_group(self.meta.get('group', 'modp2048'))
+        while index > 1:
+            l = (index ^ 1).bit_length()-1
+            row = self.find_row(l, (index ^ 1) ^ (1 << l))
+            b_key = self.blind_key(row)
+            if b_key is None:
+                return None
+            key = group.exp(b_key, DataNode.derive_exponent(key, self.meta.get('exponent_bits')))
+            index = index >> 1
+        return key
+    #
+    # end method: group_key
+
+    # method: restore
+    #
+    def restore(self, secret: Optional[bytes]=None, display: Optional[bool]=None) -> BinaryTree:
+        '''This method materializes the snapshot as a BinaryTree.'''
+
+        # the tree is only materialized once
+        #
+        if self._tree is not None:
+            return self._tree
+
+        # restore the tree attributes without building a new tree (display defaults to the saved setting)
+        #
+        meta = self.meta
+        if display is None:
+            display = meta.get('display', True)
+        tree = BinaryTree(meta['size'], meta['uid'], build=False, display=display,
+                          rebalance=meta.get('rebalance', 'none'), slack=meta.get('slack', 0),
+                          exponent_bits=meta.get('exponent_bits'), group=meta.get('group', 'modp2048'),
+                          sparse=meta.get('sparse', False),
+                          sponsor_policy=meta.get('sponsor_policy', 'rightmost'),
+                          key_region=meta.get('key_region'))
+        tree.nextmemb = meta['nextmemb']
+        tree.height = meta['height']
+        tree.nodetrack = meta['nodetrack']
+        tree.nodemax = meta['nodemax']
+        tree.epoch = meta.get('epoch', 0)
+        tree.sponsored = {int(mid): epoch for mid, epoch in meta.get('sponsored', {}).items()}
+
+        # create the nodes in reverse heap order, so both children of a node exist before it and
+        # are linked below it in one step (no per-attach walks up the tree)
+        #
+        nodes = {}
+        for row in reversed(range(self.count)):
+            index = self.heap[row]
+            l = index.bit_length()-1
+            node = DataNode(l=l, v=index ^ (1 << l), ntype=self.ntype(row), mid=self.mid(row))
+            node.b_key = self.blind_key(row)
+            if (index << 1) in nodes:
+                node.adopt(nodes[index << 1], nodes[(index << 1) | 1])
+            nodes[index] = node
+        tree.root = nodes[1]
+
+        # restore my node and its private key; the path keys are recomputed locally
+        #
+        if meta['my_row'] >= 0:
+            tree.my_node = nodes[self.heap[meta['my_row']]]
+            if 'rsa_pub' in meta:
+                tree.my_node.rsa_pub = bytes.fromhex(meta['rsa_pub'])
+            if secret is not None:
+                tree.my_node.key = self.unseal(secret)
+                if all(node.b_key is not None for node in tree.my_node.get_co_path()):
+                    tree.calculate_group_key()
+        self._tree = tree
+        return tree
+    #
+    # end method: restore
+#
+# end class: TreeSnapshot
+#
+# end file: tree_snapshot.py